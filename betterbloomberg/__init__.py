@@ -1,9 +1,37 @@
+from .cache import *
+from .cassette import *
+from .catalogue import *
+from .coalesce import *
+from .fake import *
 from .field import *
+from .intraday import *
+from .metrics import *
 from .portfolio import *
 from .reference_data import *
 from .screen import *
 from .search import *
+from .session import *
+from .store import *
 from .study import *
+from .subscription import *
+from .sweep import *
+from .client import *
+
+request_dict = {
+    "ReferenceDataRequest": ReferenceDataRequest,
+    "HistoricalDataRequest": HistoricalDataRequest,
+    "IntradayBarRequest": IntradayBarRequest,
+    "IntradayTickRequest": IntradayTickRequest,
+    "FieldSearch": FieldSearch,
+    "FieldInfo": FieldInfo,
+    "PortfolioDataRequest": PortfolioDataRequest,
+    "PortfolioBatchRequest": PortfolioBatchRequest,
+    "EQS": EQS,
+    "GovernmentSearch": GovernmentSearch,
+    "CurveSearch": CurveSearch,
+    "SecuritySearch": SecuritySearch,
+    "Study": Study
+}
 
 
 def get(req_type: str = "ReferenceDataRequest", **kwargs):
@@ -11,8 +39,8 @@ def get(req_type: str = "ReferenceDataRequest", **kwargs):
     Wrapper function for BetterBloomberg data requests.
 
     This is a simple function to call one of the available Bloomberg Services
-    and return the data member of the class. Look at the function's
-    `request_dict` data member to see what is available.
+    and return the data member of the class. Look at the module's
+    `request_dict` member to see what is available.
 
     Parameters
     ----------
@@ -26,17 +54,52 @@ def get(req_type: str = "ReferenceDataRequest", **kwargs):
     -------
     pd.DataFrame
     """
-    request_dict = {
-        "ReferenceDataRequest": ReferenceDataRequest,
-        "HistoricalDataRequest": HistoricalDataRequest,
-        "FieldSearch": FieldSearch,
-        "FieldInfo": FieldInfo,
-        "PortfolioDataRequest": PortfolioDataRequest,
-        "EQS": EQS,
-        "GovernmentSearch": GovernmentSearch,
-        "CurveSearch": CurveSearch,
-        "SecuritySearch": SecuritySearch,
-        "Study": Study
-    }
-
+    # only the frame is returned, so don't hold on to the raw response
+    kwargs.setdefault("keep_raw", False)
     return request_dict[req_type](**kwargs).data
+
+
+def get_many(specs, max_in_flight: int = None, raise_errors: bool = False, **kwargs) -> list:
+    """
+    Run many requests of any type at the same time.
+
+    The requests are sent through an AsyncClient, so they share the pooled
+    sessions and are answered concurrently.
+
+    Parameters
+    ----------
+    specs : list
+        one dict of request arguments per request. The 'req_type' key selects
+        the request type and defaults to 'ReferenceDataRequest' e.g.
+        {"req_type": "EQS", "name": "Core Capital Ratios", ...}
+    max_in_flight : int
+        maximum number of blpapi requests outstanding at once. Unlimited if
+        None.
+    raise_errors : bool
+        raise the first error instead of returning it in place of the result
+    **kwargs :
+        AsyncClient arguments e.g. host and port
+
+    Returns
+    -------
+    list
+        the data member of each request, or the exception it raised, in the
+        order of `specs`
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    client = AsyncClient(max_in_flight=max_in_flight, **kwargs)
+
+    async def run():
+        return await asyncio.gather(
+            *[client.get(**spec) for spec in specs], return_exceptions=not raise_errors
+        )
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run())
+    # already inside an event loop e.g. a notebook
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, run()).result()
@@ -0,0 +1,127 @@
+"""
+Cell-level persistent cache for reference data.
+
+Each cell is keyed by security, field, canonicalised overrides and as-of date
+and stored in a SQLite database, so it can be shared between processes and
+jobs. A ReferenceDataRequest given a cache only sends the cells that are
+missing or older than the field's time to live, and merges the cached cells
+into its result.
+"""
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import date
+
+__all__ = ["ReferenceCache", ]
+
+
+class ReferenceCache(object):
+
+    def __init__(self, path: str = ":memory:", ttl: dict = None, default_ttl: float = None):
+        """
+        Reference Data Cache
+
+        Parameters
+        ----------
+        path : str
+            SQLite database file. Defaults to an in-memory database.
+        ttl : dict
+            time to live in seconds per field e.g. {"PX_LAST": 60}
+        default_ttl : float
+            time to live in seconds for fields not in `ttl`. Cells never
+            expire within their as-of date if None.
+        """
+        self.path = path
+        self.ttl = ttl if ttl is not None else dict()
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cells ("
+            "security TEXT, field TEXT, overrides TEXT, as_of TEXT, value BLOB, stored REAL, "
+            "PRIMARY KEY (security, field, overrides, as_of))"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def canonical(overrides: dict) -> str:
+        """Overrides as a key that does not depend on order or value type."""
+        return json.dumps(sorted([str(k), str(v)] for (k, v) in (overrides or dict()).items()))
+
+    @staticmethod
+    def as_of_key(as_of=None) -> str:
+        if as_of is None:
+            as_of = date.today()
+        if isinstance(as_of, date):
+            as_of = as_of.strftime("%Y%m%d")
+        return as_of
+
+    def is_fresh(self, field: str, stored: float, now: float) -> bool:
+        ttl = self.ttl.get(field, self.default_ttl)
+        return ttl is None or now - stored < ttl
+
+    def get(self, securities, fields, overrides=None, as_of=None) -> dict:
+        """
+        Fresh cached cells for the securities and fields.
+
+        Returns
+        -------
+        dict
+            {security: {field: value}} for the cells found
+        """
+        fields = set(fields)
+        ovrds = ReferenceCache.canonical(overrides)
+        as_of = ReferenceCache.as_of_key(as_of)
+        now = time.time()
+        found = dict()
+        with self.lock:
+            # stay under SQLite's limit on bound parameters
+            for i in range(0, len(securities), 500):
+                block = securities[i:i + 500]
+                rows = self.conn.execute(
+                    "SELECT security, field, value, stored FROM cells "
+                    "WHERE overrides = ? AND as_of = ? AND security IN ({0})".format(
+                        ", ".join("?" * len(block))
+                    ),
+                    [ovrds, as_of] + list(block)
+                )
+                for (security, field, value, stored) in rows:
+                    if field in fields and self.is_fresh(field, stored, now):
+                        found.setdefault(security, dict())[field] = pickle.loads(value)
+            num_found = sum(len(x) for x in found.values())
+            self.hits += num_found
+            self.misses += len(securities) * len(fields) - num_found
+        return found
+
+    def put(self, response_dict: dict, overrides=None, as_of=None) -> None:
+        """Store the cells of a processed reference data response."""
+        ovrds = ReferenceCache.canonical(overrides)
+        as_of = ReferenceCache.as_of_key(as_of)
+        now = time.time()
+        rows = [
+            (security, field, ovrds, as_of, pickle.dumps(value), now)
+            for (security, values) in response_dict.items()
+            for (field, value) in values.items()
+        ]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        """Hit and miss counters, in cells."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM cells")
+            self.conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,280 @@
+"""
+Record and replay the raw responses of Bloomberg requests.
+
+While recording, every request sent on a pooled session is captured with the
+message trees of its response events, as plain python values. A Cassette is
+saved as a gzip compressed pickle, so only load cassettes you recorded.
+
+Replaying serves the recorded events through the fake backend, so the request
+classes run unchanged from `generate_request` to `process_response` at full
+speed and without a terminal. Requests are matched on their type and
+contents, and a request sent several times gets its recorded responses in
+order. This makes incidents reproducible and lets the decoding be profiled
+and benchmarked on production payloads offline.
+
+    cassette = bb.Cassette("prices.cassette")
+    with cassette.record():
+        bb.ReferenceDataRequest(securities, fields)
+    with bb.Cassette.load("prices.cassette").replay():
+        data = bb.ReferenceDataRequest(securities, fields).data
+"""
+import contextlib
+import datetime
+import gzip
+import json
+import pickle
+import threading
+import blpapi
+from .core import BlpDataRequest
+from .fake import FakeBackend, request_failure, use_fake, REQUEST_STATUS
+from .session import PooledSession, SessionPool
+from .subscription import Subscription
+
+__all__ = ["Cassette", ]
+
+RESPONSE_EVENTS = (
+    blpapi.Event.PARTIAL_RESPONSE,
+    blpapi.Event.RESPONSE,
+    blpapi.Event.REQUEST_STATUS,
+)
+VERSION = 1
+
+
+def to_py(element, skip_null: bool = False):
+    """Plain python value of an element: dicts, lists and scalars."""
+    if element.isArray():
+        return [
+            to_py(value, skip_null) if hasattr(value, "isArray") else value
+            for value in (element.getValue(i) for i in range(element.numValues()))
+        ]
+    if element.datatype() == blpapi.DataType.CHOICE:
+        choice = element.getChoice()
+        return {str(choice.name()): to_py(choice, skip_null)}
+    if element.isComplexType():
+        return {
+            str(e.name()): to_py(e, skip_null)
+            for e in element.elements()
+            if not (skip_null and e.isNull())
+        }
+    if element.isNull():
+        return None
+    value = element.getValue()
+    return value if isinstance(value, (bool, int, float, str, datetime.date, datetime.time)) else str(value)
+
+
+def canonical(value):
+    """Request contents with the types the real and fake requests disagree on removed."""
+    if isinstance(value, dict):
+        return {k: canonical(v) for (k, v) in value.items() if v is not None}
+    if isinstance(value, list):
+        return [canonical(v) for v in value]
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=None).isoformat()
+    return str(value)
+
+
+def covers(recorded, asked) -> bool:
+    """True if the recorded request has everything set in the asked request."""
+    if isinstance(asked, dict):
+        return isinstance(recorded, dict) and all(
+            k in recorded and covers(recorded[k], v) for (k, v) in asked.items()
+        )
+    if isinstance(asked, list):
+        return isinstance(recorded, list) and len(recorded) == len(asked) and all(
+            covers(r, a) for (r, a) in zip(recorded, asked)
+        )
+    return recorded == asked
+
+
+class RecordingEventQueue(blpapi.event.EventQueue):
+
+    def __init__(self, cassette):
+        """EventQueue that captures the response events taken from it."""
+        super(RecordingEventQueue, self).__init__()
+        self.cassette = cassette
+
+    def nextEvent(self, timeout: int = 0):
+        event = super(RecordingEventQueue, self).nextEvent(timeout)
+        self.cassette.capture(event)
+        return event
+
+
+class RecordingSession(blpapi.Session):
+
+    def __init__(self, options, handler, cassette):
+        """Session that captures the requests sent on it."""
+        super(RecordingSession, self).__init__(options, handler)
+        self.cassette = cassette
+
+    def sendRequest(self, request, identity=None, correlationId=None, eventQueue=None, requestLabel=""):
+        # captured before sending, so the first response finds the request
+        if correlationId is not None:
+            self.cassette.sent(correlationId, request)
+        cid = super(RecordingSession, self).sendRequest(
+            request, identity, correlationId, eventQueue, requestLabel
+        )
+        if correlationId is None:
+            self.cassette.sent(cid, request)
+        return cid
+
+
+class RecordingPooledSession(PooledSession):
+
+    def __init__(self, host: str, port: int, options: dict = None, cassette=None):
+        super(RecordingPooledSession, self).__init__(host, port, options)
+        self.cassette = cassette
+
+    def create_session(self):
+        return RecordingSession(self.session_options(), self.process_event, self.cassette)
+
+    def event_queue(self):
+        return RecordingEventQueue(self.cassette)
+
+    def process_event(self, event, session):
+        self.cassette.capture(event)
+        super(RecordingPooledSession, self).process_event(event, session)
+
+
+class RecordingSessionPool(SessionPool):
+
+    def __init__(self, cassette):
+        """Pool of sessions recording into `cassette`."""
+        super(RecordingSessionPool, self).__init__()
+        self.cassette = cassette
+
+    def create(self, host: str, port: int, options: dict = None) -> PooledSession:
+        return RecordingPooledSession(host, port, options, self.cassette)
+
+
+class CassetteBackend(FakeBackend):
+
+    def __init__(self, cassette, **kwargs):
+        """Fake backend answering with the recorded responses of `cassette`."""
+        super(CassetteBackend, self).__init__(**kwargs)
+        self.cassette = cassette
+        # times each recorded request has been replayed
+        self.replays = dict()
+
+    def generate(self, request_type: str, fields: dict):
+        matches = self.cassette.find(request_type, fields)
+        if len(matches) == 0:
+            return iter([(REQUEST_STATUS, request_failure(
+                "NOT_RECORDED", "No recorded response for {0}".format(request_type)
+            ))])
+        key = id(matches[0])
+        with self.lock:
+            count = self.replays.get(key, 0)
+            self.replays[key] = count + 1
+        # repeated requests get the later recordings, then the last one again
+        return iter(matches[min(count, len(matches) - 1)]["events"])
+
+
+class Cassette(object):
+
+    def __init__(self, path: str = None):
+        """
+        Recorded requests and their raw responses
+
+        Parameters
+        ----------
+        path : str
+            file the cassette is saved to when recording ends
+        """
+        self.path = path
+        self.interactions = list()
+        # cid -> interaction still being served
+        self.in_flight = dict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.interactions)
+
+    def sent(self, correlation_id, request) -> None:
+        element = request.asElement()
+        interaction = {
+            "request_type": str(element.name()),
+            "request": to_py(element, skip_null=True),
+            "events": list(),
+        }
+        with self.lock:
+            self.in_flight[correlation_id.value()] = interaction
+
+    def capture(self, event) -> None:
+        """Add the messages of a response event to the requests they answer."""
+        event_type = event.eventType()
+        if event_type not in RESPONSE_EVENTS:
+            return
+        routed = dict()
+        for message in event:
+            cid = message.correlationIds()[0].value()
+            if cid in self.in_flight:
+                routed.setdefault(cid, list()).append(
+                    (str(message.messageType()), to_py(message.asElement()))
+                )
+        with self.lock:
+            for (cid, messages) in routed.items():
+                interaction = self.in_flight[cid]
+                interaction["events"].append((event_type, messages))
+                if event_type != blpapi.Event.PARTIAL_RESPONSE:
+                    del self.in_flight[cid]
+                    self.interactions.append(interaction)
+
+    def find(self, request_type: str, request: dict) -> list:
+        """Recorded interactions of the request, exact matches first."""
+        asked = canonical(request)
+        key = json.dumps(asked, sort_keys=True)
+        exact, partial = list(), list()
+        for interaction in self.interactions:
+            if interaction["request_type"] != request_type:
+                continue
+            recorded = canonical(interaction["request"])
+            if json.dumps(recorded, sort_keys=True) == key:
+                exact.append(interaction)
+            elif covers(recorded, asked):
+                partial.append(interaction)
+        return exact or partial
+
+    @contextlib.contextmanager
+    def record(self):
+        """
+        Record every request sent inside the block, on sessions of its own.
+        The cassette is saved to `path` on exit if it has one.
+        """
+        recording_pool = RecordingSessionPool(self)
+        previous = BlpDataRequest.session_pool, Subscription.session_pool
+        BlpDataRequest.session_pool = Subscription.session_pool = recording_pool
+        try:
+            yield self
+        finally:
+            BlpDataRequest.session_pool, Subscription.session_pool = previous
+            recording_pool.close()
+            if self.path is not None:
+                self.save()
+
+    def replay(self, **kwargs):
+        """
+        Answer every request sent inside the block from the cassette.
+
+        Parameters
+        ----------
+        **kwargs :
+            FakeBackend arguments e.g. latency to replay at production
+            speed instead of full speed
+
+        Returns
+        -------
+        context manager yielding the FakeSessionPool
+        """
+        return use_fake(CassetteBackend(self, **kwargs))
+
+    def save(self, path: str = None) -> None:
+        with gzip.open(path or self.path, "wb") as f:
+            pickle.dump({"version": VERSION, "interactions": self.interactions}, f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str):
+        with gzip.open(path, "rb") as f:
+            content = pickle.load(f)
+        cassette = cls(path)
+        cassette.interactions = content["interactions"]
+        return cassette
@@ -0,0 +1,120 @@
+"""
+Local field-metadata catalogue.
+
+The catalogue bulk-loads FieldInfo results, including datatype and ftype, in
+concurrent batches from ``//blp/apiflds`` and keeps them in a JSON file, so it
+is available offline and reloads in milliseconds. Entries are indexed by field
+id and by mnemonic. Field lists can be validated before a large request is
+sent, so an INVALID_FIELD is caught before it costs a batch.
+"""
+import json
+import os
+from .errors import FieldError
+from .field import FieldInfo
+
+__all__ = ["FieldCatalogue", ]
+
+# source of the FieldErrors of fields the catalogue rejects
+CATALOGUE_SOURCE = "FieldCatalogue"
+
+
+class FieldCatalogue(object):
+
+    def __init__(self, path: str = None, batch_size: int = 100, **kwargs):
+        """
+        Field Catalogue
+
+        Parameters
+        ----------
+        path : str
+            JSON file the catalogue is saved to and reloaded from. Kept in
+            memory only if None.
+        batch_size : int
+            number of fields per FieldInfoRequest when loading
+        **kwargs :
+            passed to FieldInfo e.g. host and port
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.kwargs = kwargs
+        self.fields = dict()
+        self.mnemonics = dict()
+        self.invalid = set()
+        if path is not None and os.path.exists(path):
+            self.reload()
+
+    def __contains__(self, field):
+        return self.lookup(field) is not None
+
+    def __len__(self):
+        return len(self.fields)
+
+    def add(self, field_id: str, info: dict) -> None:
+        self.fields[field_id] = info
+        self.mnemonics[info["mnemonic"].upper()] = field_id
+        self.invalid.discard(field_id.upper())
+
+    def lookup(self, field: str):
+        """Metadata of a field given its mnemonic or id, or None if unknown."""
+        if field in self.fields:
+            return self.fields[field]
+        field_id = self.mnemonics.get(field.upper())
+        if field_id is None:
+            return None
+        return self.fields[field_id]
+
+    def datatype(self, field: str):
+        info = self.lookup(field)
+        return None if info is None else info["datatype"]
+
+    def load(self, field_ids) -> None:
+        """Request the metadata of the fields in concurrent batches and save it."""
+        req = FieldInfo(list(field_ids), batch_size=self.batch_size, **self.kwargs)
+        for (field_id, info) in req.raw.items():
+            self.add(field_id, info)
+        self.invalid.update(f.upper() for f in req.field_errors)
+        self.save()
+
+    def validate(self, fields, fetch: bool = True) -> list:
+        """
+        Check a field list against the catalogue.
+
+        Parameters
+        ----------
+        fields : list
+            mnemonics or ids
+        fetch : bool
+            load fields the catalogue does not know yet. Unknown fields are
+            treated as invalid if False.
+
+        Returns
+        -------
+        list
+            FieldError for each invalid field
+        """
+        unknown = [f for f in fields if f not in self and f.upper() not in self.invalid]
+        if fetch and len(unknown) > 0:
+            self.load(unknown)
+        return [
+            FieldError(
+                security=None, field=f, source=CATALOGUE_SOURCE, code=None,
+                category="BAD_FLD", message="Unknown field", subcategory="INVALID_FIELD"
+            )
+            for f in fields if f not in self
+        ]
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with open(self.path + ".tmp", "w") as fh:
+            json.dump({"fields": self.fields, "invalid": sorted(self.invalid)}, fh)
+        os.replace(self.path + ".tmp", self.path)
+
+    def reload(self) -> None:
+        with open(self.path) as fh:
+            saved = json.load(fh)
+        self.fields = dict()
+        self.mnemonics = dict()
+        for (field_id, info) in saved["fields"].items():
+            self.add(field_id, info)
+        self.invalid = set(saved["invalid"])
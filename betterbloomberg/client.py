@@ -0,0 +1,225 @@
+"""
+asyncio interface to the request classes.
+
+The client builds a request object without sending it and runs its own
+`send_request` with dispatching deferred, so each class decides what is sent,
+how many requests can be outstanding and how messages are parsed, as it does
+when blocking. Each deferred blpapi request is then sent through the pooled
+session's event handler and awaits a future that is resolved when the final
+response for its CorrelationId arrives. The collected messages are handed to
+the request object's own `process_response`, so the parsing is the same as
+for the blocking classes. Hundreds of requests can be in flight from a single
+event loop.
+
+Cancelling the awaiting task cancels the blpapi request with the session. The
+`timeout`, `retries` and `backoff` arguments of the request class apply to
+each blpapi request as they do for the blocking classes, and a request lost
+with a terminated session is sent again on the restarted session.
+"""
+import asyncio
+import time
+import blpapi
+from .core import correlation_ids
+
+__all__ = ["AsyncClient", ]
+
+
+class AsyncClient(object):
+
+    def __init__(self, host="localhost", port=8194, session_options=None, max_in_flight=None):
+        """
+        Async Bloomberg Client
+
+        Parameters
+        ----------
+        host : str
+            server host
+        port : int
+            server port
+        session_options : dict
+            extra ``blpapi.SessionOptions`` settings keyed by setter name
+        max_in_flight : int
+            maximum number of blpapi requests outstanding at once from this
+            client. Unlimited if None.
+        """
+        self.host = host
+        self.port = port
+        self.session_options = session_options
+        self.max_in_flight = max_in_flight
+        self.semaphore = None
+
+    async def get(self, req_type="ReferenceDataRequest", **kwargs):
+        """
+        Run one of the available request types and return its data member.
+
+        Parameters
+        ----------
+        req_type : str or type
+            key of `betterbloomberg.request_dict` or a BlpDataRequest subclass
+        **kwargs :
+            relevant parameters and arguments for the request
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        if isinstance(req_type, str):
+            from . import request_dict
+            req_type = request_dict[req_type]
+        kwargs.setdefault("host", self.host)
+        kwargs.setdefault("port", self.port)
+        kwargs.setdefault("session_options", self.session_options)
+        kwargs.setdefault("keep_raw", False)
+        # only blocks the loop the first time a session or service is opened
+        req = req_type(send=False, **kwargs)
+        req.metrics.start_memory()
+        try:
+            start = time.perf_counter()
+            req.deferred = list()
+            try:
+                req.send_request()
+            finally:
+                deferred, req.deferred = req.deferred, None
+            for (requests, max_in_flight, on_message, on_response, on_retry) in deferred:
+                responses = await self.dispatch(
+                    req, requests, max_in_flight, on_message, on_response, on_retry
+                )
+                if on_message is None:
+                    req.receive(responses)
+            start = req.metrics.lap("send", start)
+            req.data = req.process_response()
+            req.metrics.lap("process", start)
+        except BaseException as ex:
+            req.metrics.error = ex.__class__.__name__
+            raise
+        finally:
+            req.metrics.finish("response")
+        return req.data
+
+    async def reference(self, securities, fields, **kwargs):
+        """Reference Data Request. See ReferenceDataRequest."""
+        return await self.get("ReferenceDataRequest", securities=securities, fields=fields, **kwargs)
+
+    async def history(self, securities, fields, start, end=None, **kwargs):
+        """Historical Data Request. See HistoricalDataRequest."""
+        return await self.get(
+            "HistoricalDataRequest", securities=securities, fields=fields, start=start, end=end, **kwargs
+        )
+
+    async def dispatch(
+            self, req, requests, max_in_flight=None, on_message=None, on_response=None, on_retry=None) -> list:
+        """
+        Send the requests of a deferred ``req.dispatch`` call and await their
+        response messages. The arguments are those of
+        ``BlpDataRequest.dispatch``.
+        """
+        limit = None if max_in_flight is None else asyncio.Semaphore(max_in_flight)
+
+        async def serve(index, request):
+            messages = await self.send_retry(req, request, index, on_message, limit, on_retry)
+            if on_response is not None:
+                on_response(index)
+            return messages
+
+        return list(await asyncio.gather(*[serve(i, request) for (i, request) in enumerate(requests)]))
+
+    async def send_retry(self, req, request, index=0, on_message=None, limit=None, on_retry=None) -> list:
+        """
+        Send one of the blpapi requests of `req` with its timeout and retries.
+        If `limit` is given, a semaphore, it is held while the request is
+        outstanding. ``on_retry(index)`` is called before each resend. After
+        the session was lost the request is rebuilt on the restarted session
+        with ``req.renew_request``.
+        """
+        lost = False
+        for attempt in range(req.retries + 1):
+            if lost:
+                request = req.renew_request(request)
+                lost = False
+            try:
+                if limit is None:
+                    return await self.attempt(req, request, index, on_message)
+                async with limit:
+                    return await self.attempt(req, request, index, on_message)
+            except asyncio.TimeoutError:
+                if attempt == req.retries:
+                    raise TimeoutError("Request not served within {0}s".format(req.timeout))
+            except ConnectionError:
+                if attempt == req.retries:
+                    raise
+                lost = True
+            if on_retry is not None:
+                on_retry(index)
+            await asyncio.sleep(req.backoff * 2 ** attempt)
+
+    async def attempt(self, req, request, index, on_message) -> list:
+        if not req.pooled_session.is_alive():
+            # restarting blocks the loop, but only once per lost session
+            req.session = req.pooled_session.start()
+        return await asyncio.wait_for(
+            self.send(req.pooled_session, request, index, on_message, req.metrics), req.timeout
+        )
+
+    async def send(self, pooled_session, request, index=0, on_message=None, metrics=None) -> list:
+        """
+        Send one blpapi request and await the list of its response messages.
+        If `on_message` is given each message is passed to
+        ``on_message(index, message)`` on the event loop as it arrives instead.
+        Requests sent, events and messages are counted in `metrics` if given.
+        """
+        if self.semaphore is None and self.max_in_flight is not None:
+            self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        if self.semaphore is None:
+            return await self._send(pooled_session, request, index, on_message, metrics)
+        async with self.semaphore:
+            return await self._send(pooled_session, request, index, on_message, metrics)
+
+    async def _send(self, pooled_session, request, index, on_message, metrics) -> list:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        messages = list()
+
+        def collect(event_type, event_messages):
+            if future.done():
+                return
+            if event_type == blpapi.Event.REQUEST_STATUS:
+                future.set_exception(Exception("Request failed: {0}".format(event_messages[0])))
+                return
+            if event_type == blpapi.Event.SESSION_STATUS:
+                future.set_exception(ConnectionError("Session lost while waiting for a response"))
+                return
+            if metrics is not None:
+                metrics.events += 1
+                for message in event_messages:
+                    metrics.message(message)
+            if on_message is None:
+                messages.extend(event_messages)
+            else:
+                start = time.perf_counter()
+                try:
+                    for message in event_messages:
+                        on_message(index, message)
+                except Exception as ex:
+                    future.set_exception(ex)
+                    return
+                if metrics is not None:
+                    metrics.lap("decode", start)
+            if event_type == blpapi.Event.RESPONSE:
+                future.set_result(messages)
+
+        def on_event(event_type, event_messages):
+            # called on the blpapi event handler thread
+            loop.call_soon_threadsafe(collect, event_type, event_messages)
+
+        cid = blpapi.CorrelationId(next(correlation_ids))
+        pooled_session.register(cid, on_event)
+        session = pooled_session.session
+        session.sendRequest(request, correlationId=cid)
+        if metrics is not None:
+            metrics.sent += 1
+        try:
+            return await future
+        except asyncio.CancelledError:
+            pooled_session.unregister(cid)
+            session.cancel(cid)
+            raise
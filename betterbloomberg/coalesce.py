@@ -0,0 +1,181 @@
+"""
+Single-flight coalescing of reference data requests across threads.
+
+Threads asking a Coalescer for reference data within the same short window
+are merged into one ReferenceDataRequest. Only the cells asked for are
+requested: securities are grouped by the fields asked for them and one block
+is sent per group, so merging never fetches cells nobody asked for. An ask
+whose cells are all covered by a request already in flight waits for that
+request instead of sending its own. Every caller gets back the slice of the
+merged frame it asked for.
+"""
+import threading
+import time
+from .cache import ReferenceCache
+from .reference_data import ReferenceDataRequest
+
+__all__ = ["Coalescer", ]
+
+
+class Flight(object):
+
+    def __init__(self, key):
+        """Merged asks for one ReferenceDataRequest"""
+        self.key = key
+        # dicts keep the order the cells were first asked for
+        self.securities = dict()
+        self.fields = dict()
+        # security -> fields asked for it
+        self.cells = dict()
+        self.done = threading.Event()
+        self.request = None
+        self.error = None
+
+    def add(self, securities, fields) -> None:
+        self.securities.update(dict.fromkeys(securities))
+        self.fields.update(dict.fromkeys(fields))
+        for s in securities:
+            self.cells.setdefault(s, dict()).update(dict.fromkeys(fields))
+
+    def covers(self, securities, fields) -> bool:
+        return all(s in self.cells and all(f in self.cells[s] for f in fields) for s in securities)
+
+
+class MergedRequest(ReferenceDataRequest):
+
+    def __init__(self, cells: dict, securities, fields, overrides=None, **kwargs):
+        """
+        Reference Data Request for the cells of merged asks
+
+        Parameters
+        ----------
+        cells : dict
+            fields asked for each security. Cells of the securities by
+            fields product that were not asked for are not requested.
+        """
+        self.cells = cells
+        super(MergedRequest, self).__init__(securities, fields, overrides, **kwargs)
+
+    def groups(self):
+        # securities grouped by the fields asked for them that still need requesting
+        missing = dict()
+        for (securities, fields) in super(MergedRequest, self).groups():
+            for sec_id in securities:
+                asked = tuple(f for f in fields if f in self.cells[sec_id])
+                if len(asked) > 0:
+                    missing.setdefault(asked, list()).append(sec_id)
+        return [(securities, list(fields)) for (fields, securities) in missing.items()]
+
+
+class Coalescer(object):
+
+    def __init__(self, window: float = 0.005, **kwargs):
+        """
+        Reference Data Request Coalescer
+
+        Parameters
+        ----------
+        window : float
+            seconds asks are collected for before the merged request is sent
+        **kwargs :
+            passed to every ReferenceDataRequest e.g. host, port or cache
+        """
+        self.window = window
+        self.kwargs = kwargs
+        self.lock = threading.Lock()
+        # key -> flight still collecting asks
+        self.open = dict()
+        # key -> flights sent and not yet served
+        self.in_flight = dict()
+        self.asks = 0
+        self.sent = 0
+
+    def stats(self) -> dict:
+        """Number of asks and of merged requests sent for them."""
+        return {"asks": self.asks, "sent": self.sent}
+
+    def reference(self, securities, fields, overrides=None, partial=False, **kwargs):
+        """
+        Reference data for the securities and fields, served by a merged
+        request.
+
+        Parameters
+        ----------
+        securities : array-like, str
+            security identifiers
+        fields : array-like, str
+            reference fields
+        overrides : dict
+            override fields and values. Only asks with the same overrides and
+            request arguments are merged.
+        partial : bool
+            return the cells received even if some of the cells asked for
+            failed. Otherwise the FieldErrors of the failed cells are raised.
+        **kwargs :
+            ReferenceDataRequest arguments e.g. typed
+
+        Returns
+        -------
+        pd.DataFrame
+            the slice of the merged frame for the securities and fields
+        """
+        securities = securities if type(securities) == list else [securities, ]
+        fields = fields if type(fields) == list else [fields, ]
+        key = (ReferenceCache.canonical(overrides), repr(sorted(kwargs.items())))
+        leader = False
+        with self.lock:
+            self.asks += 1
+            flight = next(
+                (f for f in self.in_flight.get(key, list()) if f.covers(securities, fields)), None
+            )
+            if flight is None:
+                flight = self.open.get(key)
+                if flight is None:
+                    flight = self.open[key] = Flight(key)
+                    leader = True
+                flight.add(securities, fields)
+        if leader:
+            self.fly(flight, overrides, kwargs)
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return self.slice(flight.request, securities, fields, partial)
+
+    def fly(self, flight, overrides, kwargs) -> None:
+        """Collect asks for the window, then send the merged request."""
+        time.sleep(self.window)
+        with self.lock:
+            del self.open[flight.key]
+            self.in_flight.setdefault(flight.key, list()).append(flight)
+            self.sent += 1
+        try:
+            request_kwargs = dict(self.kwargs)
+            request_kwargs.update(kwargs)
+            flight.request = MergedRequest(
+                flight.cells, list(flight.securities), list(flight.fields), overrides, partial=True,
+                **request_kwargs
+            )
+            # build the frame once, before the callers slice it
+            flight.request.data
+        except Exception as ex:
+            flight.error = ex
+        finally:
+            with self.lock:
+                self.in_flight[flight.key].remove(flight)
+                if len(self.in_flight[flight.key]) == 0:
+                    del self.in_flight[flight.key]
+            flight.done.set()
+
+    @staticmethod
+    def slice(request, securities, fields, partial):
+        if not partial:
+            asked_secs, asked_fields = set(securities), set(fields)
+            errors = [
+                e for e in request.error_list if e.security in asked_secs and e.field in asked_fields
+            ]
+            if len(errors) > 0:
+                raise Exception(errors)
+        data = request.data
+        if request.typed:
+            return data.reindex(index=securities, columns=fields)
+        return data.reindex(index=fields, columns=securities)
@@ -0,0 +1,233 @@
+"""
+Typed columnar buffers for decoding response elements.
+
+`TypedColumns` decodes blpapi elements straight into one numpy array per
+column, choosing the array type from the element's schema datatype (or a
+hint such as a field catalogue datatype): float64, int64, datetime64[ns],
+bool, strings and plain objects. Frames built from it have one dtype per
+column instead of object columns. Integer and bool columns with missing
+values become pandas nullable arrays, and repetitive strings such as
+currencies or exchange codes become categoricals.
+"""
+from datetime import date, datetime
+import blpapi
+import numpy as np
+import pandas as pd
+
+FLOAT = "float"
+INT = "int"
+DATETIME = "datetime"
+BOOL = "bool"
+STRING = "string"
+OBJECT = "object"
+
+DATATYPE_KINDS = {
+    blpapi.DataType.FLOAT32: FLOAT,
+    blpapi.DataType.FLOAT64: FLOAT,
+    blpapi.DataType.DECIMAL: FLOAT,
+    blpapi.DataType.INT32: INT,
+    blpapi.DataType.INT64: INT,
+    blpapi.DataType.DATE: DATETIME,
+    blpapi.DataType.DATETIME: DATETIME,
+    blpapi.DataType.BOOL: BOOL,
+    blpapi.DataType.STRING: STRING,
+    blpapi.DataType.CHAR: STRING,
+    blpapi.DataType.ENUMERATION: STRING,
+}
+
+# FieldInfo datatype values, the schema datatype enumeration of //blp/apiflds
+# (ftype labels such as "Price" or "Character" are not datatypes)
+CATALOGUE_KINDS = {
+    "Float32": FLOAT,
+    "Float64": FLOAT,
+    "Double": FLOAT,
+    "Decimal": FLOAT,
+    "Int32": INT,
+    "Int64": INT,
+    "Date": DATETIME,
+    "Datetime": DATETIME,
+    "Bool": BOOL,
+    "String": STRING,
+    "Char": STRING,
+    "Enumeration": STRING,
+}
+
+FILL = {
+    FLOAT: np.nan,
+    INT: 0,
+    DATETIME: np.datetime64("NaT"),
+    BOOL: False,
+    STRING: None,
+    OBJECT: None,
+}
+
+DTYPES = {
+    FLOAT: "float64",
+    INT: "int64",
+    DATETIME: "datetime64[ns]",
+    BOOL: "bool",
+    STRING: object,
+    OBJECT: object,
+}
+
+
+def to_datetime64(value):
+    if isinstance(value, datetime):
+        value = pd.Timestamp(value)
+        if value.tzinfo is not None:
+            value = value.tz_convert(None)
+        return value.to_datetime64()
+    return np.datetime64(value, "ns")
+
+
+DECODERS = {
+    FLOAT: lambda element: element.getValueAsFloat(),
+    INT: lambda element: element.getValueAsInteger(),
+    DATETIME: lambda element: to_datetime64(element.getValue()),
+    BOOL: lambda element: element.getValueAsBool(),
+    STRING: lambda element: element.getValueAsString(),
+    OBJECT: lambda element: element.getValue(),
+}
+
+
+def value_kind(value):
+    """Column kind of a plain python value."""
+    if isinstance(value, bool):
+        return BOOL
+    if isinstance(value, int):
+        return INT
+    if isinstance(value, float):
+        return FLOAT
+    if isinstance(value, (date, datetime, np.datetime64)):
+        return DATETIME
+    if isinstance(value, str):
+        return STRING
+    return OBJECT
+
+
+class TypedColumns(object):
+
+    def __init__(self, capacity: int = 16, hints: dict = None):
+        """
+        Typed Column Buffer
+
+        Parameters
+        ----------
+        capacity : int
+            number of rows to allocate up front. Columns grow as needed.
+        hints : dict
+            column kind per column name, used instead of the element datatype
+            when the column is created
+        """
+        self.capacity = max(capacity, 1)
+        self.hints = hints if hints is not None else dict()
+        self.num_rows = 0
+        self.kinds = dict()
+        self.values = dict()
+        self.valid = dict()
+
+    def add(self, name: str, kind: str) -> None:
+        self.kinds[name] = kind
+        self.values[name] = np.full(self.capacity, FILL[kind], dtype=DTYPES[kind])
+        self.valid[name] = np.zeros(self.capacity, dtype=bool)
+
+    def grow(self, row: int) -> None:
+        capacity = max(row + 1, 2 * self.capacity)
+        for (name, kind) in self.kinds.items():
+            extra = capacity - self.capacity
+            self.values[name] = np.concatenate(
+                [self.values[name], np.full(extra, FILL[kind], dtype=DTYPES[kind])]
+            )
+            self.valid[name] = np.concatenate([self.valid[name], np.zeros(extra, dtype=bool)])
+        self.capacity = capacity
+
+    def demote(self, name: str) -> None:
+        """Turn a column into an object column when a value does not fit its type."""
+        values = self.values[name].astype(object)
+        values[~self.valid[name]] = None
+        self.kinds[name] = OBJECT
+        self.values[name] = values
+
+    def store(self, row: int, name: str, value) -> None:
+        if row >= self.capacity:
+            self.grow(row)
+        self.values[name][row] = value
+        self.valid[name][row] = True
+        self.num_rows = max(self.num_rows, row + 1)
+
+    def set(self, row: int, name: str, element) -> None:
+        """Decode a scalar element into the column according to its datatype."""
+        if name not in self.kinds:
+            kind = self.hints.get(name) or DATATYPE_KINDS.get(element.datatype(), OBJECT)
+            self.add(name, kind)
+        if element.isNull():
+            return
+        try:
+            value = DECODERS[self.kinds[name]](element)
+        except Exception:
+            self.demote(name)
+            value = element.getValue()
+        self.store(row, name, value)
+
+    def set_value(self, row: int, name: str, value) -> None:
+        """Store a plain python value, e.g. a cached cell or a bulk frame."""
+        kind = value_kind(value)
+        if name not in self.kinds:
+            self.add(name, self.hints.get(name) or kind)
+        if self.kinds[name] == OBJECT:
+            pass
+        elif kind != self.kinds[name] and not (kind == INT and self.kinds[name] == FLOAT):
+            self.demote(name)
+        elif kind == DATETIME:
+            value = to_datetime64(value)
+        self.store(row, name, value)
+
+    def column(self, name: str):
+        n = self.num_rows
+        kind = self.kinds[name]
+        values = self.values[name][:n]
+        valid = self.valid[name][:n]
+        if kind == INT and not valid.all():
+            return pd.arrays.IntegerArray(values, ~valid)
+        if kind == BOOL and not valid.all():
+            return pd.arrays.BooleanArray(values, ~valid)
+        if kind == STRING:
+            num_valid = valid.sum()
+            # intern repetitive strings as categoricals
+            if num_valid > 0 and 2 * len(pd.unique(values[valid])) <= num_valid:
+                return pd.Categorical(values)
+        return values
+
+    def frame(self, index=None, columns=None) -> pd.DataFrame:
+        """
+        Build a frame with one typed column per column name.
+
+        Parameters
+        ----------
+        index : list
+            row labels, one per row
+        columns : list
+            column names to put first, in order
+        """
+        columns = list(columns) if columns is not None else list()
+        names = [c for c in columns if c in self.kinds] + [c for c in self.kinds if c not in columns]
+        if index is not None:
+            self.num_rows = max(self.num_rows, len(index))
+            if self.num_rows > self.capacity:
+                self.grow(self.num_rows - 1)
+        return pd.DataFrame({name: self.column(name) for name in names}, index=index)
+
+    def to_dict(self, index) -> dict:
+        """{row label: {column: value}} of the cells that hold a value."""
+        result = dict()
+        for name in self.kinds:
+            values = self.values[name]
+            for row in np.flatnonzero(self.valid[name][:self.num_rows]):
+                value = values[row]
+                if isinstance(value, np.datetime64):
+                    # item() of a datetime64[ns] is an int
+                    value = pd.Timestamp(value)
+                elif isinstance(value, np.generic):
+                    value = value.item()
+                result.setdefault(index[row], dict())[name] = value
+        return result
@@ -1,10 +1,24 @@
+import itertools
+import threading
+import time
 import blpapi
 import pandas as pd
 from abc import ABCMeta, abstractmethod
+from collections import deque
+from concurrent.futures import CancelledError
+from .metrics import RequestMetrics
+from .session import pool
+
+# unique across every request sent from this process
+correlation_ids = itertools.count(1)
 
 
 class BlpDataRequest(object, metaclass=ABCMeta):
     use_pandas = True
+    session_pool = pool
+    # parse each response message as it arrives with the `process_message`
+    # the class defines, instead of keeping the messages for `process_response`
+    streaming = False
 
     def __init__(
             self,
@@ -12,37 +26,141 @@ class BlpDataRequest(object, metaclass=ABCMeta):
             port=8194,
             service_type=None,
             request_type=None,
+            session_options=None,
+            send=True,
+            keep_raw=True,
+            timeout=None,
+            retries=0,
+            backoff=0.5,
             **kwargs):
         """
         Abstract Bloomberg Request Class
+
+        Sessions are taken from `session_pool`, so every request to the same
+        host, port and session options shares one started session and each
+        service is only opened once. The time spent in each phase and the
+        messages received are recorded in `metrics`, see
+        ``betterbloomberg.metrics``.
+
+        Parameters
+        ----------
+        host : str
+            server host
+        port : int
+            server port
+        session_options : dict
+            extra ``blpapi.SessionOptions`` settings keyed by setter name
+            without the ``set`` prefix e.g. {"MaxPendingRequests": 2048}
+        send : bool
+            send the request and process the response straight away. If False
+            the request is only generated, so it can be sent by the caller
+            e.g. the AsyncClient.
+        keep_raw : bool
+            keep the raw processed response once `data` has been converted to
+            a frame. Set to False to only hold one copy of large results.
+        timeout : float
+            seconds each blpapi request has to be fully served in before it is
+            cancelled. No deadline if None.
+        retries : int
+            number of times a request that timed out or was lost with its
+            session is sent again. Only the failed requests of a chunked
+            request are resent.
+        backoff : float
+            seconds to wait before the first retry, doubled on each retry
         """
         self.host = host
         self.port = port
+        self.session_options = session_options
+        self.keep_raw = keep_raw
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cancelled = threading.Event()
+        # dispatch calls recorded instead of sent, see `dispatch`
+        self.deferred = None
         if service_type is None:
             self.service_type = self.__class__.service_type
         if request_type is None:
             self.request_type = self.__class__.request_type
-        self.session = BlpDataRequest.session_handle(self.host, self.port)
-        self.service = BlpDataRequest.service_handle(self.session, self.service_type)
+        self.metrics = RequestMetrics(self.__class__.__name__, self.service_type, self.request_type)
+        start = time.perf_counter()
+        self.pooled_session = self.session_handle(self.host, self.port, self.session_options)
+        self.pooled_session.start()
+        start = self.metrics.lap("session", start)
+        self.service = self.service_handle(self.pooled_session, self.service_type)
+        start = self.metrics.lap("service", start)
+        self.session = self.pooled_session.session
         self.request = self.service.createRequest(self.request_type)
+        self.requests = [self.request, ]
         self.generate_request()
-        self.send_request()
-        self.data = self.process_response()
+        self.metrics.lap("generate", start)
+        if send:
+            self.metrics.start_memory()
+            try:
+                start = time.perf_counter()
+                self.send_request()
+                start = self.metrics.lap("send", start)
+                self.data = self.process_response()
+                self.metrics.lap("process", start)
+            except Exception as ex:
+                self.metrics.error = ex.__class__.__name__
+                raise
+            finally:
+                self.metrics.finish("response")
 
     @property
     def data(self):
-        """Handler for Data member. This is the processed response."""
+        """
+        Handler for Data member. This is the processed response as a frame,
+        or the `raw` processed response if `use_pandas` is False.
+        """
         if self.use_pandas:
-            return pd.DataFrame(self.__data)
-        return self.__data
+            return self.frame
+        return self.raw
 
     @data.setter
     def data(self, value):
-        self.__data = value
+        self.raw = value
+        self._frame = None
 
     @data.deleter
     def data(self):
-        del self.__data
+        del self.raw
+        del self._frame
+
+    @property
+    def frame(self):
+        """
+        The processed response converted with `to_frame`. The conversion is
+        done on first access and the same frame is returned afterwards.
+        """
+        if self._frame is None:
+            start = time.perf_counter()
+            self._frame = self.to_frame(self.raw)
+            self.metrics.lap("frame", start)
+            self.metrics.finish("frame")
+            if not self.keep_raw:
+                self.raw = None
+                self.release_buffers()
+        return self._frame
+
+    def to_frame(self, raw):
+        """Convert the raw processed response to a frame."""
+        return pd.DataFrame(raw)
+
+    def release_raw(self):
+        """Build the frame if needed and free the raw processed response."""
+        frame = self.frame
+        self.raw = None
+        self.release_buffers()
+        return frame
+
+    def release_buffers(self) -> None:
+        """
+        Free the buffers the raw response was built from. Called when the raw
+        response is released.
+        """
+        pass
 
     @property
     @abstractmethod
@@ -58,41 +176,193 @@ class BlpDataRequest(object, metaclass=ABCMeta):
     def generate_request(self):
         pass
 
-    def send_request(self, correlation_id: int = None) -> None:
+    def send_request(self) -> None:
         """
-        Send the constructed request through the service member.
+        Send the constructed request(s) through the session member.
         """
-        eQ = blpapi.event.EventQueue()
-        if correlation_id is not None:
-            cid = blpapi.CorrelationId(correlation_id)
-        self.session.sendRequest(self.request, eventQueue=eQ)
-        while True:
-            eventObj = eQ.nextEvent(timeout=500)
-            if eventObj.eventType() == blpapi.event.Event.RESPONSE:
-                # A RESPONSE Message indicates the request has been fully served
-                break
-        self.response = eventObj
+        if self.streaming:
+            self.dispatch(self.requests, on_message=self.process_message)
+        else:
+            self.receive(self.dispatch(self.requests))
+
+    def receive(self, responses: list) -> None:
+        """
+        Store the response messages of each request for `process_response`.
+        Single-request classes keep the list of messages of their request.
+        """
+        self.response = responses[0]
+
+    def renew_request(self, request):
+        """
+        Copy of `request` created on the service of the current session. A
+        request created on a session that has been terminated is rebuilt
+        with this before it is sent on the restarted session.
+        """
+        service = self.service_handle(self.pooled_session, self.service_type)
+        renewed = service.createRequest(str(request.asElement().name()))
+        renewed.asElement().fromPy(request.asElement().toPy())
+        return renewed
+
+    def cancel(self) -> None:
+        """
+        Cancel the requests in flight. Can be called from another thread; the
+        sending thread raises CancelledError.
+        """
+        self.cancelled.set()
+
+    def dispatch(self, requests, max_in_flight: int = None, on_message=None, on_response=None,
+                 on_retry=None) -> list:
+        """
+        Send several requests at the same time on the session.
+
+        Each request is sent with its own CorrelationId to a shared EventQueue
+        and the response messages are demultiplexed by CorrelationId as they
+        arrive. Requests that are not served within `timeout`, or that are
+        lost because the session was terminated, are cancelled and sent again
+        up to `retries` times with exponential `backoff`. When the session is
+        restarted the requests still to be sent are rebuilt on the new
+        session with `renew_request` and replaced in `requests`.
+
+        Parameters
+        ----------
+        requests : list
+            blpapi requests created from the service member
+        max_in_flight : int
+            maximum number of requests outstanding at once. All requests are
+            sent immediately if None.
+        on_message : callable
+            called as ``on_message(index, message)`` for each response message
+            as it arrives, instead of keeping the message. The event is
+            released as soon as its messages have been handled.
+        on_response : callable
+            called as ``on_response(index)`` once the request at `index` has
+            been fully served
+        on_retry : callable
+            called as ``on_retry(index)`` when the request at `index` failed
+            and will be sent again, to drop what was parsed from the failed
+            attempt
+
+        If `deferred` is a list the call is appended to it instead, as a
+        tuple of the arguments, and empty lists are returned. This is how the
+        AsyncClient runs the `send_request` of each class and sends what it
+        dispatches on its event loop.
+
+        Returns
+        -------
+        list
+            response messages for each request, in the order of `requests`.
+            Empty lists if `on_message` is given.
+
+        Raises
+        ------
+        TimeoutError
+            a request timed out more than `retries` times
+        ConnectionError
+            the session was lost more than `retries` times
+        CancelledError
+            `cancel` was called
+        """
+        if self.deferred is not None:
+            self.deferred.append((requests, max_in_flight, on_message, on_response, on_retry))
+            return [list() for _ in requests]
+        eQ = self.pooled_session.event_queue()
+        messages = [list() for _ in requests]
+        attempts = [0] * len(requests)
+        queued = deque(range(len(requests)))
+        # (time it can be sent again, index) of requests backing off
+        waiting = list()
+        # cid -> (index, deadline)
+        pending = dict()
+
+        def fail(i, error):
+            if attempts[i] > self.retries:
+                raise error
+            # messages of the failed attempt are dropped or overwritten
+            messages[i] = list()
+            if on_retry is not None:
+                on_retry(i)
+            waiting.append((time.monotonic() + self.backoff * 2 ** (attempts[i] - 1), i))
+
+        try:
+            while queued or pending or waiting:
+                if self.cancelled.is_set():
+                    raise CancelledError("Request cancelled")
+                now = time.monotonic()
+                for item in [w for w in waiting if w[0] <= now]:
+                    waiting.remove(item)
+                    queued.append(item[1])
+                while queued and (max_in_flight is None or len(pending) < max_in_flight):
+                    i = queued.popleft()
+                    cid = blpapi.CorrelationId(next(correlation_ids))
+                    attempts[i] += 1
+                    self.session.sendRequest(requests[i], correlationId=cid, eventQueue=eQ)
+                    self.metrics.sent += 1
+                    deadline = None if self.timeout is None else time.monotonic() + self.timeout
+                    pending[cid.value()] = (i, deadline)
+
+                # wake up in time for the next deadline or retry
+                wake = [d for (_, d) in pending.values() if d is not None] + [t for (t, _) in waiting]
+                wait = 500 if len(wake) == 0 else min(500, max(1, int(1000 * (min(wake) - now))))
+                eventObj = eQ.nextEvent(timeout=wait)
+                event_type = eventObj.eventType()
+                if event_type in (
+                        blpapi.event.Event.PARTIAL_RESPONSE,
+                        blpapi.event.Event.RESPONSE,
+                        blpapi.event.Event.REQUEST_STATUS):
+                    served = set()
+                    self.metrics.events += 1
+                    for message in eventObj:
+                        cid = message.correlationIds()[0].value()
+                        if cid not in pending:
+                            continue
+                        if event_type == blpapi.event.Event.REQUEST_STATUS:
+                            raise Exception("Request failed: {0}".format(message))
+                        self.metrics.message(message)
+                        if on_message is None:
+                            messages[pending[cid][0]].append(message)
+                        else:
+                            start = time.perf_counter()
+                            on_message(pending[cid][0], message)
+                            self.metrics.lap("decode", start)
+                        if event_type == blpapi.event.Event.RESPONSE:
+                            # A RESPONSE Message indicates the request has been fully served
+                            served.add(cid)
+                    for cid in served:
+                        i = pending.pop(cid)[0]
+                        if on_response is not None:
+                            on_response(i)
+
+                if not self.pooled_session.is_alive():
+                    # the requests in flight are lost with the session
+                    lost, pending = pending, dict()
+                    for (i, _) in lost.values():
+                        fail(i, ConnectionError("Session lost while waiting for a response"))
+                    self.session = self.pooled_session.start()
+                    for i in set(queued) | {i for (_, i) in waiting}:
+                        requests[i] = self.renew_request(requests[i])
+                    continue
+                now = time.monotonic()
+                for (cid, (i, deadline)) in list(pending.items()):
+                    if deadline is not None and now > deadline:
+                        self.session.cancel(blpapi.CorrelationId(cid))
+                        del pending[cid]
+                        fail(i, TimeoutError("Request not served within {0}s".format(self.timeout)))
+        finally:
+            # whatever is still outstanding when giving up is cancelled
+            for cid in pending:
+                self.session.cancel(blpapi.CorrelationId(cid))
+        return messages
 
     @abstractmethod
     def process_response(self):
         pass
 
-    @staticmethod
-    def session_handle(host: str, port: int):
-        """Session handler. Add options"""
-        sessionOptions = blpapi.SessionOptions()
-        sessionOptions.setServerHost(host)
-        sessionOptions.setServerPort(port)
-        _session = blpapi.Session(sessionOptions)
-        return _session
+    @classmethod
+    def session_handle(cls, host: str, port: int, options: dict = None):
+        """Session handler. Returns the pooled session for the host and port."""
+        return cls.session_pool.get(host, port, options)
 
     @staticmethod
-    def service_handle(session, service_type):
-        """Service handler. Fail if session does not start."""
-        sess = session
-        if not sess.start():
-            print("Failed to start session")
-        # opens the service for the session
-        if not sess.openService(service_type):
-            print("failed to open {0} service".format(service_type))
-        return sess.getService(service_type)
+    def service_handle(pooled_session, service_type):
+        """Service handler. Starts the session and opens the service once."""
+        return pooled_session.service(service_type)
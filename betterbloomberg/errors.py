@@ -31,3 +31,12 @@ def as_field_error(sec_id, node):
         subcat = info.getElement("subcategory").getValue()
         return FieldError(security=sec_id, field=fld, source=src, code=code, category=cat, message=msg,
                           subcategory=subcat)
+
+
+def security_error_cells(error, fields):
+    """ expand a SecurityError into a FieldError for each requested field """
+    return [
+        FieldError(security=error.sec_id, field=fld, source=error.source, code=error.code,
+                   category=error.category, message=error.message, subcategory=error.subcategory)
+        for fld in fields
+    ]
@@ -0,0 +1,1235 @@
+"""
+In-process fake of the Bloomberg API for offline load and concurrency tests.
+
+A FakeSessionPool hands out pooled sessions backed by a FakeBackend instead of
+a terminal, so every request class runs unchanged through the session and
+service handles of BlpDataRequest. The backend answers the ``//blp/refdata``,
+``//blp/instruments``, ``//blp/apiflds`` and ``//blp/tasvc`` requests with
+messages shaped like the real responses and filled with deterministic
+synthetic values, and acknowledges ``//blp/mktdata`` subscriptions.
+
+Responses are delivered from a scheduler thread after a configurable latency,
+split into PARTIAL_RESPONSE events the way the server splits them. Pending
+requests are counted in the server's units of 10 securities by 128 fields
+against MaxPendingRequests, and requests over the limit are rejected with a
+RequestFailure. Bad securities and fields, failed requests, requests that are
+never answered and terminated sessions can be injected to exercise the error
+handling, timeouts and retries.
+
+    with bb.use_fake(bb.FakeBackend(latency=0.05)) as fake:
+        data = bb.ReferenceDataRequest(securities, fields).data
+"""
+import collections
+import contextlib
+import datetime
+import heapq
+import itertools
+import math
+import queue
+import random
+import threading
+import time
+import zlib
+import blpapi
+from .core import BlpDataRequest
+from .session import PooledSession, SessionPool
+from .subscription import Subscription
+
+__all__ = ["FakeBackend", "FakeSessionPool", "use_fake"]
+
+PARTIAL_RESPONSE = blpapi.Event.PARTIAL_RESPONSE
+RESPONSE = blpapi.Event.RESPONSE
+REQUEST_STATUS = blpapi.Event.REQUEST_STATUS
+FINAL_EVENTS = (RESPONSE, REQUEST_STATUS)
+
+SERVICES = {
+    "//blp/refdata": {
+        "ReferenceDataRequest",
+        "HistoricalDataRequest",
+        "BeqsRequest",
+        "PortfolioDataRequest",
+        "IntradayBarRequest",
+        "IntradayTickRequest",
+    },
+    "//blp/instruments": {"instrumentListRequest", "curveListRequest", "govtListRequest"},
+    "//blp/apiflds": {"FieldInfoRequest", "FieldSearchRequest"},
+    "//blp/tasvc": {"studyRequest"},
+    "//blp/mktdata": set(),
+}
+
+# sub-columns of the bulk fields, the first one naming the member security
+BULK_FIELDS = {
+    "INDX_MWEIGHT": ["Member Ticker and Exchange Code", "Percentage Weight"],
+    "INDX_MEMBERS": ["Member Ticker and Exchange Code"],
+    "DVD_HIST_ALL": ["Declared Date", "Ex-Date", "Dividend Amount", "Dividend Type"],
+}
+
+# elements of each position of the portfolio fields
+PORTFOLIO_FIELDS = {
+    "PORTFOLIO_MEMBERS": ["Security"],
+    "PORTFOLIO_MWEIGHT": ["Security", "Weight"],
+    "PORTFOLIO_MPOSITION": ["Security", "Position"],
+    "PORTFOLIO_MPRICE": ["Security", "Price"],
+    "PORTFOLIO_DATA": ["Security", "Position", "Market Value", "Cost", "Weight"],
+}
+
+# blpapi default of the MaxPendingRequests session option
+MAX_PENDING_REQUESTS = 1024
+
+TRADING_HOURS = (datetime.time(13, 30), datetime.time(20, 0))
+
+# ids handed out to requests sent without a CorrelationId
+fake_correlation_ids = itertools.count(1 << 48)
+
+
+def unit(*key) -> float:
+    """Deterministic number in [0, 1) for the key."""
+    return zlib.crc32("|".join(str(k) for k in key).encode()) / 2 ** 32
+
+
+def datatype(value):
+    if isinstance(value, bool):
+        return blpapi.DataType.BOOL
+    if isinstance(value, int):
+        return blpapi.DataType.INT64
+    if isinstance(value, float):
+        return blpapi.DataType.FLOAT64
+    if isinstance(value, datetime.datetime):
+        return blpapi.DataType.DATETIME
+    if isinstance(value, datetime.date):
+        return blpapi.DataType.DATE
+    if isinstance(value, datetime.time):
+        return blpapi.DataType.TIME
+    if isinstance(value, dict):
+        return blpapi.DataType.SEQUENCE
+    return blpapi.DataType.STRING
+
+
+def error_info(category: str, subcategory: str, message: str, code: int = -1) -> dict:
+    return {
+        "source": "fake",
+        "code": code,
+        "category": category,
+        "message": message,
+        "subcategory": subcategory,
+    }
+
+
+def request_failure(category: str, description: str) -> list:
+    reason = {
+        "source": "fake",
+        "errorCode": -1,
+        "category": category,
+        "description": description,
+        "subcategory": category,
+    }
+    return [("RequestFailure", {"reason": reason})]
+
+
+def parse_date(value) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(str(value), "%Y%m%d").date()
+
+
+def business_days(start, end) -> list:
+    day, end = parse_date(start), parse_date(end)
+    days = list()
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def period_ends(days: list, periodicity: str) -> list:
+    """Last business day of each period."""
+    keys = {
+        "WEEKLY": lambda d: d.isocalendar()[:2],
+        "MONTHLY": lambda d: (d.year, d.month),
+        "QUARTERLY": lambda d: (d.year, (d.month - 1) // 3),
+        "SEMI_ANNUALLY": lambda d: (d.year, (d.month - 1) // 6),
+        "YEARLY": lambda d: d.year,
+    }
+    if periodicity not in keys:
+        return days
+    last = dict()
+    for day in days:
+        last[keys[periodicity](day)] = day
+    return list(last.values())
+
+
+def trading_times(start: datetime.datetime, end: datetime.datetime, step: datetime.timedelta):
+    """Times every `step` within the trading hours of business days."""
+    t = start
+    while t < end:
+        if t.weekday() < 5 and TRADING_HOURS[0] <= t.time() < TRADING_HOURS[1]:
+            yield t
+            t += step
+        elif t.weekday() < 5 and t.time() < TRADING_HOURS[0]:
+            t = datetime.datetime.combine(t.date(), TRADING_HOURS[0], t.tzinfo)
+        else:
+            t = datetime.datetime.combine(t.date() + datetime.timedelta(days=1), TRADING_HOURS[0], t.tzinfo)
+
+
+def chunks(items, size: int):
+    """Consecutive lists of `size` items, at least one even if empty."""
+    chunk = list()
+    sent = False
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = list()
+            sent = True
+    if chunk or not sent:
+        yield chunk
+
+
+def respond(message_type: str, bodies):
+    """Events of one message per body, the last one as the RESPONSE."""
+    previous = None
+    for body in bodies:
+        if previous is not None:
+            yield PARTIAL_RESPONSE, [(message_type, previous)]
+        previous = body
+    if previous is None:
+        raise ValueError("No {0} messages generated".format(message_type))
+    yield RESPONSE, [(message_type, previous)]
+
+
+def format_value(name, value, indent: int) -> list:
+    pad = "    " * indent
+    if isinstance(value, dict):
+        lines = ["{0}{1} = {{".format(pad, name)]
+        for (k, v) in value.items():
+            lines.extend(format_value(k, v, indent + 1))
+        return lines + [pad + "}"]
+    if isinstance(value, list):
+        lines = ["{0}{1}[] = {{".format(pad, name)]
+        for v in value:
+            lines.extend(format_value(name, v, indent + 1))
+        return lines + [pad + "}"]
+    if isinstance(value, str):
+        value = '"{0}"'.format(value)
+    return ["{0}{1} = {2}".format(pad, name, value)]
+
+
+class FakeElement(object):
+    __slots__ = ("_name", "_value")
+
+    def __init__(self, name, value):
+        """Read-only element over a plain python value, with the ``blpapi.Element`` interface."""
+        self._name = name if isinstance(name, blpapi.Name) else blpapi.Name(name)
+        self._value = value
+
+    def name(self):
+        return self._name
+
+    def datatype(self):
+        if isinstance(self._value, list):
+            return datatype(self._value[0]) if self._value else blpapi.DataType.STRING
+        return datatype(self._value)
+
+    def isArray(self) -> bool:
+        return isinstance(self._value, list)
+
+    def isComplexType(self) -> bool:
+        return isinstance(self._value, dict)
+
+    def isNull(self) -> bool:
+        return self._value is None
+
+    def numValues(self) -> int:
+        if isinstance(self._value, list):
+            return len(self._value)
+        return 0 if self._value is None else 1
+
+    def numElements(self) -> int:
+        return len(self._value) if isinstance(self._value, dict) else 0
+
+    def item(self, index: int):
+        if isinstance(self._value, list):
+            return self._value[index]
+        if index != 0 or self._value is None:
+            raise IndexError("Index {0} out of range for {1}".format(index, self._name))
+        return self._value
+
+    def getValue(self, index: int = 0):
+        value = self.item(index)
+        if isinstance(value, dict):
+            return FakeElement(self._name, value)
+        return value
+
+    def getValueAsElement(self, index: int = 0):
+        value = self.item(index)
+        if not isinstance(value, dict):
+            raise TypeError("{0} is not a complex type".format(self._name))
+        return FakeElement(self._name, value)
+
+    def getValueAsString(self, index: int = 0) -> str:
+        value = self.item(index)
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        return str(value)
+
+    def getValueAsFloat(self, index: int = 0) -> float:
+        return float(self.item(index))
+
+    def getValueAsInteger(self, index: int = 0) -> int:
+        return int(self.item(index))
+
+    def getValueAsBool(self, index: int = 0) -> bool:
+        return bool(self.item(index))
+
+    def getValueAsDatetime(self, index: int = 0):
+        return self.item(index)
+
+    def hasElement(self, name, excludeNullElements: bool = False) -> bool:
+        if not isinstance(self._value, dict) or str(name) not in self._value:
+            return False
+        return not excludeNullElements or self._value[str(name)] is not None
+
+    def getElement(self, name):
+        if not isinstance(self._value, dict):
+            raise TypeError("{0} is not a complex type".format(self._name))
+        key = list(self._value)[name] if isinstance(name, int) else str(name)
+        if key not in self._value:
+            raise blpapi.NotFoundException("Sub-element '{0}' does not exist.".format(key), 0)
+        return FakeElement(key, self._value[key])
+
+    def getElementAsString(self, name) -> str:
+        return self.getElement(name).getValueAsString()
+
+    def getElementAsFloat(self, name) -> float:
+        return self.getElement(name).getValueAsFloat()
+
+    def getElementAsInteger(self, name) -> int:
+        return self.getElement(name).getValueAsInteger()
+
+    def getElementAsBool(self, name) -> bool:
+        return self.getElement(name).getValueAsBool()
+
+    def getElementAsDatetime(self, name):
+        return self.getElement(name).getValueAsDatetime()
+
+    def getElementValue(self, name):
+        return self.getElement(name).getValue()
+
+    def elements(self) -> list:
+        if not isinstance(self._value, dict):
+            return list()
+        return [FakeElement(k, v) for (k, v) in self._value.items()]
+
+    def values(self) -> list:
+        return [self.getValue(i) for i in range(self.numValues())]
+
+    def toPy(self):
+        return self._value
+
+    def __str__(self):
+        return "\n".join(format_value(self._name, self._value, 0)) + "\n"
+
+
+class FakeMessage(object):
+
+    def __init__(self, message_type: str, body: dict, correlation_ids=()):
+        """Message over a plain python body, with the ``blpapi.Message`` interface."""
+        self.element = FakeElement(message_type, body)
+        self.correlation_ids = list(correlation_ids)
+
+    def messageType(self):
+        return self.element.name()
+
+    def correlationIds(self) -> list:
+        return self.correlation_ids
+
+    def asElement(self):
+        return self.element
+
+    def numElements(self) -> int:
+        return self.element.numElements()
+
+    def hasElement(self, name, excludeNullElements: bool = False) -> bool:
+        return self.element.hasElement(name, excludeNullElements)
+
+    def getElement(self, name):
+        return self.element.getElement(name)
+
+    def toPy(self):
+        return self.element.toPy()
+
+    def __str__(self):
+        return str(self.element)
+
+
+class FakeEvent(object):
+
+    def __init__(self, event_type: int, messages: list):
+        self.event_type = event_type
+        self.messages = messages
+
+    def eventType(self) -> int:
+        return self.event_type
+
+    def __iter__(self):
+        return iter(self.messages)
+
+
+class FakeEventQueue(object):
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def put(self, event) -> None:
+        self.queue.put(event)
+
+    def nextEvent(self, timeout: int = 0):
+        """Next event, or a TIMEOUT event after `timeout` milliseconds. Waits forever if 0."""
+        try:
+            return self.queue.get(timeout=timeout / 1000 if timeout else None)
+        except queue.Empty:
+            return FakeEvent(blpapi.Event.TIMEOUT, list())
+
+    def tryNextEvent(self):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def purge(self) -> None:
+        with self.queue.mutex:
+            self.queue.queue.clear()
+
+
+class FakeRequestElement(object):
+
+    def __init__(self, name: str):
+        """Writable request element, with the setters of ``blpapi.Element``."""
+        self._name = name
+        self.children = dict()
+        self.items = list()
+        self.value = None
+        self.choice = None
+
+    def name(self):
+        return blpapi.Name(self._name)
+
+    def getElement(self, name):
+        return self.children.setdefault(str(name), FakeRequestElement(str(name)))
+
+    def hasElement(self, name, excludeNullElements: bool = False) -> bool:
+        return str(name) in self.children
+
+    def setElement(self, name, value) -> None:
+        self.getElement(name).setValue(value)
+
+    def setValue(self, value) -> None:
+        self.value = value
+
+    def appendValue(self, value) -> None:
+        self.items.append(value)
+
+    def appendElement(self):
+        element = FakeRequestElement(self._name)
+        self.items.append(element)
+        return element
+
+    def setChoice(self, name):
+        self.choice = str(name)
+        return self.getElement(name)
+
+    def getChoice(self):
+        return self.getElement(self.choice)
+
+    def numValues(self) -> int:
+        return len(self.items) if self.items else int(self.value is not None)
+
+    def toPy(self):
+        if self.items:
+            return [i.toPy() if isinstance(i, FakeRequestElement) else i for i in self.items]
+        if self.children:
+            return {k: v.toPy() for (k, v) in self.children.items()}
+        return self.value
+
+    def fromPy(self, value) -> None:
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    self.appendElement().fromPy(item)
+                else:
+                    self.appendValue(item)
+        elif isinstance(value, dict):
+            for (name, child) in value.items():
+                self.getElement(name).fromPy(child)
+            if len(value) == 1:
+                self.choice = next(iter(value))
+        else:
+            self.setValue(value)
+
+
+class FakeRequest(object):
+
+    def __init__(self, service: str, request_type: str, session=None):
+        """Request built with the ``blpapi.Request`` setters."""
+        self.service = service
+        self.request_type = request_type
+        # only the session the service was opened on can send the request
+        self.session = session
+        self.element = FakeRequestElement(request_type)
+
+    def set(self, name, value) -> None:
+        self.element.setElement(name, value)
+
+    def append(self, name, value) -> None:
+        self.element.getElement(name).appendValue(value)
+
+    def getElement(self, name):
+        return self.element.getElement(name)
+
+    def asElement(self):
+        return self.element
+
+    def toPy(self) -> dict:
+        return self.element.toPy() or dict()
+
+    def __str__(self):
+        return "\n".join(format_value(self.request_type, self.toPy(), 0)) + "\n"
+
+
+class FakeService(object):
+
+    def __init__(self, name: str, session=None):
+        self._name = name
+        self.session = session
+
+    def name(self) -> str:
+        return self._name
+
+    def createRequest(self, request_type: str):
+        if request_type not in SERVICES[self._name]:
+            raise blpapi.NotFoundException(
+                "Request type '{0}' not found in {1}".format(request_type, self._name), 0
+            )
+        return FakeRequest(self._name, request_type, self.session)
+
+
+class Stream(object):
+    __slots__ = ("session", "cid", "queue", "events", "cost", "cancelled")
+
+    def __init__(self, session, cid, event_queue, events, cost: int):
+        """The events still to be delivered for one request."""
+        self.session = session
+        self.cid = cid
+        self.queue = event_queue
+        self.events = events
+        self.cost = cost
+        self.cancelled = False
+
+
+class FakeSession(object):
+
+    def __init__(self, backend, handler=None, max_pending: int = MAX_PENDING_REQUESTS):
+        """
+        Session answered by `backend`, with the ``blpapi.Session`` interface.
+
+        Parameters
+        ----------
+        backend : FakeBackend
+            generates and delivers the responses
+        handler : callable
+            session event handler, called as ``handler(event, session)``
+        max_pending : int
+            MaxPendingRequests, counted in server request units
+        """
+        self.backend = backend
+        self.handler = handler
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.streams = dict()
+        self.pending = 0
+        self.services = set()
+        # security -> correlation ids subscribed to it
+        self.subscriptions = dict()
+        self.started = False
+        self.stopped = False
+
+    def status(self, message_type: str) -> None:
+        if self.handler is not None:
+            self.handler(FakeEvent(blpapi.Event.SESSION_STATUS, [FakeMessage(message_type, dict())]), self)
+
+    def start(self) -> bool:
+        if self.backend.refuse_start:
+            self.status("SessionStartupFailure")
+            return False
+        self.started = True
+        self.backend.sessions.append(self)
+        self.status("SessionStarted")
+        return True
+
+    def stop(self) -> bool:
+        self.terminate()
+        return True
+
+    def terminate(self) -> None:
+        """Drop every request in flight and report the session as terminated."""
+        with self.lock:
+            if self.stopped:
+                return
+            self.stopped = True
+            for stream in self.streams.values():
+                stream.cancelled = True
+            self.streams.clear()
+            self.pending = 0
+        self.status("SessionConnectionDown")
+        self.status("SessionTerminated")
+
+    def openService(self, name: str) -> bool:
+        if name not in SERVICES:
+            return False
+        self.services.add(name)
+        return True
+
+    def getService(self, name: str):
+        if name not in self.services:
+            raise blpapi.NotFoundException("Service '{0}' is not open".format(name), 0)
+        return FakeService(name, self)
+
+    def sendRequest(self, request, identity=None, correlationId=None, eventQueue=None, requestLabel=""):
+        if correlationId is None:
+            correlationId = blpapi.CorrelationId(next(fake_correlation_ids))
+        if request.session is not None and request.session is not self:
+            raise blpapi.InvalidArgumentException("Request was created by another session", 0)
+        events, cost = self.backend.serve(request)
+        stream = Stream(self, correlationId, eventQueue, events, cost)
+        with self.lock:
+            if self.stopped:
+                raise ConnectionError("Session is terminated")
+            if self.pending + cost > self.max_pending:
+                stream.cost = 0
+                stream.events = iter([(REQUEST_STATUS, request_failure(
+                    "LIMIT", "Exceeded MaxPendingRequests of {0}".format(self.max_pending)
+                ))])
+                self.backend.count("rejected")
+            self.pending += stream.cost
+            self.streams[correlationId.value()] = stream
+            self.backend.peak(self.pending)
+        if stream.events is not None:
+            self.backend.schedule(self.backend.delay(request), stream)
+        return correlationId
+
+    def release(self, stream) -> None:
+        with self.lock:
+            if self.streams.pop(stream.cid.value(), None) is not None:
+                self.pending -= stream.cost
+
+    def cancel(self, correlationId) -> None:
+        with self.lock:
+            stream = self.streams.get(correlationId.value())
+            if stream is None:
+                return
+            stream.cancelled = True
+        self.release(stream)
+        self.backend.count("cancelled")
+
+    def deliver(self, stream, event) -> None:
+        if stream.queue is not None:
+            stream.queue.put(event)
+        elif self.handler is not None:
+            self.handler(event, self)
+
+    def subscribe(self, subscriptionList, identity=None, requestLabel=""):
+        for i in range(subscriptionList.size()):
+            topic = subscriptionList.topicStringAt(i).split("?")[0]
+            security = topic.replace("//blp/mktdata/ticker/", "").replace("//blp/mktdata/", "")
+            cid = subscriptionList.correlationIdAt(i)
+            if security in self.backend.bad_securities:
+                reason = error_info("BAD_SEC", "INVALID_SECURITY", "Unknown security")
+                message = FakeMessage("SubscriptionFailure", {"reason": reason}, [cid])
+            else:
+                self.subscriptions.setdefault(security, set()).add(cid.value())
+                message = FakeMessage("SubscriptionStarted", dict(), [cid])
+            if self.handler is not None:
+                self.handler(FakeEvent(blpapi.Event.SUBSCRIPTION_STATUS, [message]), self)
+
+    def unsubscribe(self, subscriptionList) -> None:
+        for i in range(subscriptionList.size()):
+            cid = subscriptionList.correlationIdAt(i).value()
+            for cids in self.subscriptions.values():
+                cids.discard(cid)
+
+    def publish(self, security: str, values: dict) -> None:
+        for cid in list(self.subscriptions.get(security, ())):
+            message = FakeMessage("MarketDataEvents", dict(values), [blpapi.CorrelationId(cid)])
+            if self.handler is not None:
+                self.handler(FakeEvent(blpapi.Event.SUBSCRIPTION_DATA, [message]), self)
+
+
+class FakePooledSession(PooledSession):
+
+    def __init__(self, host: str, port: int, options: dict = None, backend=None):
+        """Pooled session whose sessions are FakeSessions answered by `backend`."""
+        super(FakePooledSession, self).__init__(host, port, options)
+        self.backend = backend
+
+    def create_session(self):
+        max_pending = self.options.get("MaxPendingRequests", MAX_PENDING_REQUESTS)
+        return FakeSession(self.backend, self.process_event, max_pending)
+
+    def event_queue(self):
+        return FakeEventQueue()
+
+
+class FakeSessionPool(SessionPool):
+
+    def __init__(self, backend=None):
+        """
+        Pool of fake sessions, to be set as the `session_pool` of the request
+        classes.
+
+        Parameters
+        ----------
+        backend : FakeBackend
+            answers the requests of every session. A default backend with no
+            latency if None.
+        """
+        super(FakeSessionPool, self).__init__()
+        self.backend = backend if backend is not None else FakeBackend()
+
+    def create(self, host: str, port: int, options: dict = None) -> PooledSession:
+        return FakePooledSession(host, port, options, self.backend)
+
+
+class FakeBackend(object):
+
+    def __init__(
+            self,
+            latency=0.0,
+            message_latency: float = 0.0,
+            partial_size: int = 10,
+            rows_per_message: int = 1000,
+            bad_securities=None,
+            bad_fields=None,
+            hang_securities=None,
+            failure_rate: float = 0.0,
+            universe_size: int = 100,
+            members: int = 20,
+            bulk_rows: int = 10,
+            tick_interval: float = 60.0,
+            history: int = 1000,
+            seed: int = 0):
+        """
+        Fake Bloomberg server
+
+        Parameters
+        ----------
+        latency : float or callable
+            seconds before the first message of each request is delivered, or
+            ``latency(request_type, request)`` returning them, e.g. to add
+            jitter or model large requests
+        message_latency : float
+            seconds between consecutive messages of one request
+        partial_size : int
+            securities per PARTIAL_RESPONSE message of reference data
+            requests and screens
+        rows_per_message : int
+            bars, ticks, study rows or search results per message
+        bad_securities : iterable
+            securities answered with an INVALID_SECURITY error
+        bad_fields : iterable
+            fields answered with an INVALID_FIELD error
+        hang_securities : iterable
+            requests for these securities are never answered, until cancelled
+        failure_rate : float
+            probability of a request failing with a RequestFailure status
+        universe_size : int
+            number of securities screens and portfolios are drawn from
+        members : int
+            number of members of each screen, portfolio and index
+        bulk_rows : int
+            rows of bulk fields other than index members
+        tick_interval : float
+            seconds between synthetic ticks of each event type
+        history : int
+            number of sent requests kept in `requests`
+        seed : int
+            seed of the failure injection
+        """
+        self.latency = latency
+        self.message_latency = message_latency
+        self.partial_size = partial_size
+        self.rows_per_message = rows_per_message
+        self.bad_securities = set(bad_securities or ())
+        self.bad_fields = set(bad_fields or ())
+        self.hang_securities = set(hang_securities or ())
+        self.failure_rate = failure_rate
+        self.universe = ["EQ{0:04d} US Equity".format(i) for i in range(universe_size)]
+        self.members = members
+        self.bulk_rows = bulk_rows
+        self.tick_interval = tick_interval
+        self.random = random.Random(seed)
+        self.refuse_start = False
+        self.generators = {
+            "ReferenceDataRequest": self.reference_data,
+            "HistoricalDataRequest": self.historical_data,
+            "BeqsRequest": self.screen,
+            "PortfolioDataRequest": self.portfolio,
+            "IntradayBarRequest": self.intraday_bars,
+            "IntradayTickRequest": self.intraday_ticks,
+            "instrumentListRequest": self.instrument_list,
+            "curveListRequest": self.curve_list,
+            "govtListRequest": self.govt_list,
+            "FieldInfoRequest": self.field_info,
+            "FieldSearchRequest": self.field_search,
+            "studyRequest": self.study,
+        }
+        self.requests = collections.deque(maxlen=history)
+        self.sessions = list()
+        self.counts = collections.Counter()
+        self.peak_pending = 0
+        self.lock = threading.Condition()
+        self.heap = list()
+        self.order = itertools.count()
+        self.thread = None
+
+    # bookkeeping
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+    def peak(self, pending: int) -> None:
+        with self.lock:
+            self.peak_pending = max(self.peak_pending, pending)
+
+    def stats(self) -> dict:
+        """Requests sent, rejected over MaxPendingRequests, failed and cancelled, and the peak pending units."""
+        with self.lock:
+            stats = {k: self.counts[k] for k in ("sent", "rejected", "failed", "cancelled")}
+            stats["peak_pending"] = self.peak_pending
+            return stats
+
+    def terminate(self) -> None:
+        """Terminate every live session, losing the requests in flight."""
+        for session in list(self.sessions):
+            session.terminate()
+        self.sessions = [s for s in self.sessions if not s.stopped]
+
+    def publish(self, security: str, values: dict) -> None:
+        """Send a market data update for `security` to its subscribers, on the calling thread."""
+        for session in list(self.sessions):
+            session.publish(security, values)
+
+    # scheduling
+
+    def delay(self, request) -> float:
+        if callable(self.latency):
+            return self.latency(request.request_type, request.toPy())
+        return self.latency
+
+    def serve(self, request):
+        """Events for the request and its cost in pending request units."""
+        fields = request.toPy()
+        self.count("sent")
+        self.requests.append((request.request_type, fields))
+        securities = fields.get("securities") or [fields.get("security")]
+        cost = 1
+        if "securities" in fields:
+            cost = math.ceil(len(securities) / 10) * max(1, math.ceil(len(fields.get("fields") or ()) / 128))
+        if self.hang_securities.intersection(s for s in securities if s is not None):
+            return None, cost
+        if self.failure_rate > 0 and self.random.random() < self.failure_rate:
+            self.count("failed")
+            return iter([(REQUEST_STATUS, request_failure("INJECTED", "Injected request failure"))]), cost
+        return self.generate(request.request_type, fields), cost
+
+    def generate(self, request_type: str, fields: dict):
+        """Events answering a request, as ``(event_type, [(message_type, body)])``."""
+        return self.generators[request_type](fields)
+
+    def schedule(self, delay: float, stream) -> None:
+        with self.lock:
+            heapq.heappush(self.heap, (time.monotonic() + delay, next(self.order), stream))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="FakeBackend", daemon=True)
+                self.thread.start()
+            self.lock.notify()
+
+    def run(self) -> None:
+        while True:
+            with self.lock:
+                while len(self.heap) == 0 or self.heap[0][0] > time.monotonic():
+                    self.lock.wait(None if len(self.heap) == 0 else self.heap[0][0] - time.monotonic())
+                stream = heapq.heappop(self.heap)[2]
+            self.step(stream)
+
+    def step(self, stream) -> None:
+        """Deliver the next event of the stream and schedule the one after."""
+        if stream.cancelled:
+            return
+        try:
+            event_type, messages = next(stream.events)
+        except StopIteration:
+            stream.session.release(stream)
+            return
+        except Exception as e:
+            event_type, messages = REQUEST_STATUS, request_failure("BAD_ARGS", str(e))
+        event = FakeEvent(event_type, [FakeMessage(t, body, [stream.cid]) for (t, body) in messages])
+        if event_type in FINAL_EVENTS:
+            stream.session.release(stream)
+        stream.session.deliver(stream, event)
+        if event_type not in FINAL_EVENTS:
+            self.schedule(self.message_latency, stream)
+
+    # synthetic values
+
+    def value(self, security: str, field: str, date=None, overrides=()):
+        """Deterministic synthetic value of a field, typed by its mnemonic."""
+        name = field.upper()
+        u = unit(security, name, date, *overrides)
+        if name.endswith("_DT") or name.endswith("DATE"):
+            return datetime.date(2000, 1, 1) + datetime.timedelta(days=int(u * 9000))
+        if "CRNCY" in name:
+            return ["USD", "EUR", "GBP", "JPY"][int(u * 4)]
+        if "TICKER" in name or "SECURITY" in name or name.endswith("_DES"):
+            return security
+        if "NAME" in name or "TYPE" in name:
+            return "{0} {1}".format(name.title(), int(u * 10))
+        if "VOLUME" in name or name.endswith("_OUT") or "NUM" in name:
+            return int(u * 10 ** 7)
+        if date is None:
+            return round(10 + 490 * u, 4)
+        # prices drift with the date around the level of the security
+        level = 10 + 490 * unit(security, name, *overrides)
+        return round(level * (0.9 + 0.2 * u), 4)
+
+    def members_of(self, *key) -> list:
+        """Deterministic members drawn from the universe for the key."""
+        ranked = sorted(self.universe, key=lambda s: unit(s, *key))
+        return ranked[:self.members]
+
+    def bulk(self, security: str, field: str, overrides=()) -> list:
+        columns = BULK_FIELDS[field]
+        if columns[0].startswith("Member"):
+            members = self.members_of(security, field, *overrides)
+            return [
+                dict([(columns[0], m)] + [(c, self.value(m, c, None, overrides)) for c in columns[1:]])
+                for m in members
+            ]
+        return [
+            {c: self.value(security, c, i, overrides) for c in columns}
+            for i in range(self.bulk_rows)
+        ]
+
+    @staticmethod
+    def overrides(fields: dict) -> tuple:
+        return tuple(
+            "{0}={1}".format(o.get("fieldId"), o.get("value")) for o in fields.get("overrides") or ()
+        )
+
+    def security_error(self, security: str):
+        if security in self.bad_securities:
+            return error_info("BAD_SEC", "INVALID_SECURITY", "Unknown/Invalid security [{0}]".format(security))
+        return None
+
+    # generators, one per request type
+
+    def reference_data(self, fields: dict):
+        overrides = self.overrides(fields)
+        security_data = list()
+        for (i, security) in enumerate(fields.get("securities") or ()):
+            data = {"security": security, "eidData": [], "fieldExceptions": [], "sequenceNumber": i}
+            error = self.security_error(security)
+            if error is not None:
+                data["securityError"] = error
+                data["fieldData"] = dict()
+            else:
+                data["fieldData"] = dict()
+                for field in fields.get("fields") or ():
+                    if field in self.bad_fields:
+                        data["fieldExceptions"].append({
+                            "fieldId": field,
+                            "errorInfo": error_info("BAD_FLD", "INVALID_FIELD", "Field not valid"),
+                        })
+                    elif field in BULK_FIELDS:
+                        data["fieldData"][field] = self.bulk(security, field, overrides)
+                    else:
+                        data["fieldData"][field] = self.value(security, field, None, overrides)
+            security_data.append(data)
+        return respond(
+            "ReferenceDataResponse",
+            ({"securityData": chunk} for chunk in chunks(security_data, self.partial_size))
+        )
+
+    def historical_data(self, fields: dict):
+        overrides = self.overrides(fields)
+        days = period_ends(
+            business_days(fields["startDate"], fields.get("endDate") or datetime.date.today()),
+            fields.get("periodicitySelection") or "DAILY"
+        )
+        if fields.get("maxDataPoints"):
+            days = days[-int(fields["maxDataPoints"]):]
+
+        def bodies():
+            for (i, security) in enumerate(fields.get("securities") or ()):
+                data = {"security": security, "eidData": [], "sequenceNumber": i, "fieldExceptions": []}
+                error = self.security_error(security)
+                if error is not None:
+                    data["securityError"] = error
+                    data["fieldData"] = list()
+                    yield {"securityData": data}
+                    continue
+                valid = list()
+                for field in fields.get("fields") or ():
+                    if field in self.bad_fields:
+                        data["fieldExceptions"].append({
+                            "fieldId": field,
+                            "errorInfo": error_info(
+                                "BAD_FLD", "NOT_APPLICABLE_TO_HIST_DATA", "Not valid for historical data"
+                            ),
+                        })
+                    else:
+                        valid.append(field)
+                data["fieldData"] = [
+                    dict([("date", day)] + [(f, self.value(security, f, day, overrides)) for f in valid])
+                    for day in days
+                ]
+                yield {"securityData": data}
+
+        return respond("HistoricalDataResponse", bodies())
+
+    def screen(self, fields: dict):
+        overrides = self.overrides(fields)
+        members = self.members_of(fields.get("screenName"), fields.get("screenType"), *overrides)
+        security_data = [
+            {
+                "security": m,
+                "fieldData": {
+                    "Ticker": m.split(" ")[0],
+                    "Short Name": "{0} Corp".format(m.split(" ")[0]),
+                    "Market Cap": self.value(m, "CUR_MKT_CAP", None, overrides),
+                },
+            }
+            for m in members
+        ]
+        return respond(
+            "BeqsResponse",
+            (
+                {"data": {"securityData": chunk, "fieldDisplayUnits": {}}}
+                for chunk in chunks(security_data, self.partial_size)
+            )
+        )
+
+    def portfolio(self, fields: dict):
+        overrides = self.overrides(fields)
+        security_data = list()
+        for (i, port_id) in enumerate(fields.get("securities") or ()):
+            data = {"security": port_id, "eidData": [], "fieldExceptions": [], "sequenceNumber": i}
+            error = self.security_error(port_id)
+            if error is not None:
+                data["securityError"] = error
+                data["fieldData"] = dict()
+                security_data.append(data)
+                continue
+            members = self.members_of(port_id, *overrides)
+            data["fieldData"] = dict()
+            for field in fields.get("fields") or ():
+                names = PORTFOLIO_FIELDS.get(field, ["Security"])
+                data["fieldData"][field] = [
+                    dict(
+                        [("Security", m)]
+                        + [(n, 1.0 / len(members) if n == "Weight" else self.value(m, n, None, overrides))
+                           for n in names[1:]]
+                    )
+                    for m in members
+                ]
+            security_data.append(data)
+        return respond(
+            "ReferenceDataResponse",
+            ({"securityData": chunk} for chunk in chunks(security_data, self.partial_size))
+        )
+
+    def intraday_error(self, message_type: str, security: str):
+        error = self.security_error(security)
+        if error is None:
+            return None
+        return iter([(RESPONSE, [(message_type, {"responseError": error})])])
+
+    def intraday_bars(self, fields: dict):
+        security = fields["security"]
+        error = self.intraday_error("IntradayBarResponse", security)
+        if error is not None:
+            return error
+        step = datetime.timedelta(minutes=int(fields.get("interval") or 1))
+
+        def bar(t):
+            low, high = sorted(self.value(security, "PX_LAST", t + d) for d in (step / 3, step * 2 / 3))
+            volume = self.value(security, "VOLUME", t) // 1000
+            return {
+                "time": t,
+                "open": self.value(security, "PX_OPEN", t),
+                "high": high,
+                "low": low,
+                "close": self.value(security, "PX_LAST", t + step),
+                "volume": volume,
+                "numEvents": volume // 100,
+                "value": float(volume) * high,
+            }
+
+        bars = (bar(t) for t in trading_times(fields["startDateTime"], fields["endDateTime"], step))
+        return respond(
+            "IntradayBarResponse",
+            (
+                {"barData": {"eidData": [], "delayedSecurity": False, "barTickData": chunk}}
+                for chunk in chunks(bars, self.rows_per_message)
+            )
+        )
+
+    def intraday_ticks(self, fields: dict):
+        security = fields["security"]
+        error = self.intraday_error("IntradayTickResponse", security)
+        if error is not None:
+            return error
+        event_types = fields.get("eventTypes") or ["TRADE"]
+        step = datetime.timedelta(seconds=self.tick_interval)
+
+        def ticks():
+            for t in trading_times(fields["startDateTime"], fields["endDateTime"], step):
+                for event_type in event_types:
+                    tick = {
+                        "time": t,
+                        "type": event_type,
+                        "value": self.value(security, event_type, t),
+                        "size": self.value(security, "VOLUME", t) // 10000,
+                    }
+                    if fields.get("includeConditionCodes"):
+                        tick["conditionCodes"] = "R6"
+                    if fields.get("includeExchangeCodes"):
+                        tick["exchangeCode"] = "UN"
+                    yield tick
+
+        return respond(
+            "IntradayTickResponse",
+            (
+                {"tickData": {"eidData": [], "tickData": chunk}}
+                for chunk in chunks(ticks(), self.rows_per_message)
+            )
+        )
+
+    def search_results(self, fields: dict) -> list:
+        query = str(fields.get("query") or "").rstrip("*").upper()
+        count = min(int(fields.get("maxResults") or 100), 10)
+        return ["{0}{1}".format(query, i) for i in range(count)]
+
+    def instrument_list(self, fields: dict):
+        results = [
+            {"security": "{0} US<equity>".format(r), "description": "{0} Corp (U.S.)".format(r)}
+            for r in self.search_results(fields)
+        ]
+        return respond("InstrumentListResponse", [{"results": results}])
+
+    def curve_list(self, fields: dict):
+        results = [
+            {
+                "curve": "YCSW{0:04d} Index".format(i),
+                "description": "{0} Curve {1}".format(r, i),
+                "country": fields.get("countryCode") or "US",
+                "currency": "USD",
+                "curveid": "CV{0}".format(i),
+                "type": [fields.get("type") or "IRS"],
+                "subtype": [fields.get("subtype") or "CLSWAP"],
+                "publisher": "Bloomberg",
+                "bbgid": "BBG{0:09d}".format(i),
+            }
+            for (i, r) in enumerate(self.search_results(fields))
+        ]
+        return respond("CurveListResponse", [{"results": results}])
+
+    def govt_list(self, fields: dict):
+        ticker = fields.get("ticker") or "T"
+        results = [
+            {
+                "parseky": "{0} {1}% {2} Govt".format(ticker, i, 2030 + i),
+                "name": "{0} Treasury {1}".format(r, i),
+                "ticker": ticker,
+            }
+            for (i, r) in enumerate(self.search_results(fields))
+        ]
+        return respond("GovtListResponse", [{"results": results}])
+
+    def field_data(self, field: str) -> dict:
+        kind = self.value("", field)
+        if isinstance(kind, float):
+            datatype_name, ftype = "Double", "Price"
+        elif isinstance(kind, int):
+            datatype_name, ftype = "Int64", "Real"
+        elif isinstance(kind, datetime.date):
+            datatype_name, ftype = "Date", "Date"
+        else:
+            datatype_name, ftype = "String", "Character"
+        if field in BULK_FIELDS:
+            datatype_name, ftype = "BLPAPI_SEQUENCE", "BulkFormat"
+        return {
+            "id": field,
+            "fieldInfo": {
+                "mnemonic": field,
+                "description": field.replace("_", " ").title(),
+                "datatype": datatype_name,
+                "categoryName": ["Market Activity" if ftype == "Price" else "Descriptive"],
+                "documentation": "Synthetic field {0}".format(field),
+                "overrides": [],
+                "ftype": ftype,
+            },
+        }
+
+    def field_info(self, fields: dict):
+        field_data = list()
+        for field in fields.get("id") or ():
+            if field in self.bad_fields:
+                field_data.append({
+                    "id": field,
+                    "fieldError": error_info("BAD_FLD", "INVALID_FIELD", "Unknown Field Id/Mnemonic"),
+                })
+            else:
+                field_data.append(self.field_data(field))
+        return respond("fieldResponse", [{"fieldData": field_data}])
+
+    def field_search(self, fields: dict):
+        query = str(fields.get("searchSpec") or "").upper().replace(" ", "_")
+        field_data = [self.field_data("{0}_{1}".format(query, i)) for i in range(5)]
+        return respond("fieldResponse", [{"fieldData": field_data}])
+
+    def study(self, fields: dict):
+        price_source = fields.get("priceSource") or dict()
+        security = price_source.get("securityName")
+        historical = (price_source.get("dataRange") or dict()).get("historical") or dict()
+        study_name = next(iter(fields.get("studyAttributes") or {"study": None}))
+        name = study_name.replace("StudyAttributes", "").upper()
+        days = business_days(historical["startDate"], historical.get("endDate") or datetime.date.today())
+        rows = [{"date": day, name: self.value(security, name, day)} for day in days]
+        return respond(
+            "studyResponse",
+            ({"studyData": chunk} for chunk in chunks(rows, self.rows_per_message))
+        )
+
+
+@contextlib.contextmanager
+def use_fake(backend=None):
+    """
+    Route every request and subscription to a fake backend inside the block.
+
+    Yields the FakeSessionPool. The previous session pools are restored and
+    the fake sessions stopped on exit.
+    """
+    fake_pool = FakeSessionPool(backend)
+    previous = BlpDataRequest.session_pool, Subscription.session_pool
+    BlpDataRequest.session_pool = Subscription.session_pool = fake_pool
+    try:
+        yield fake_pool
+    finally:
+        BlpDataRequest.session_pool, Subscription.session_pool = previous
+        fake_pool.close()
@@ -11,7 +11,7 @@ class FieldRequest(BlpDataRequest):
 class FieldInfo(FieldRequest):
     request_type = "FieldInfoRequest"
 
-    def __init__(self, field_id, docs=False, overrides=False, verbose=False, **kwargs):
+    def __init__(self, field_id, docs=False, overrides=False, verbose=False, batch_size=None, **kwargs):
         """
         Field Information Request: Provides a description of the specified fields
         in the request.
@@ -26,73 +26,81 @@ class FieldInfo(FieldRequest):
             overrides : bool
                 Returns a value for the element that describes the behavior of the
                 field requested.  It will give a list of overrides for that field
+            batch_size : int
+                Split the fields into requests of `batch_size` ids that are sent
+                concurrently. One request if None.
         """
-
-        self.field_id = field_id
+        if type(field_id) == list:
+            self.field_id = field_id
+        else:
+            self.field_id = [
+                field_id,
+            ]
         self.docs = docs
         self.overrides = overrides
         self.verbose = verbose
+        self.batch_size = batch_size
         super(FieldRequest, self).__init__(**kwargs)
 
     def generate_request(self):
-        for fid in self.field_id:
-            self.request.append("id", fid)
-        self.request.set("returnFieldDocumentation", self.docs)
+        batch_size = self.batch_size or max(len(self.field_id), 1)
+        self.requests = list()
+        for i in range(0, len(self.field_id), batch_size):
+            request = self.service.createRequest(self.request_type)
+            self.fill_request(request, self.field_id[i:i + batch_size])
+            self.requests.append(request)
+        self.request = self.requests[0]
+
+    def fill_request(self, request, field_ids):
+        for fid in field_ids:
+            request.append("id", fid)
+        request.set("returnFieldDocumentation", self.docs)
         if self.overrides:
-            self.request.append("properties", "fieldoverridable")
+            request.append("properties", "fieldoverridable")
+
+    def receive(self, responses):
+        # the messages of every batch
+        self.response = [message for messages in responses for message in messages]
 
     def process_response(self):
         field_dict = dict()
+        # ids the service does not know
+        self.field_errors = list()
 
         SECURITY_DATA = blpapi.Name("fieldData")
         FIELD_DATA = blpapi.Name("fieldInfo")
 
-        securityData = (
-            blpapi
-            .event
-            .MessageIterator(self.response)
-            .next()
-            .getElement(SECURITY_DATA)
-        )
-
-        sub_fields = ["mnemonic", "description"]
+        sub_fields = ["mnemonic", "description", "datatype", "ftype"]
         if self.docs:
             sub_fields.append("documentation")
 
-        for i in range(securityData.numValues()):
-            tmp_sec = securityData.getValueAsElement(i)
-            fid = tmp_sec.getElementAsString("id")
-            field_dict[fid] = dict()
-            for f in sub_fields:
-                field_dict[fid][f] = tmp_sec.getElement(FIELD_DATA).getElementAsString(f)
-            if self.overrides:
-                ovrd_list = list()
-                for j in range(
-                    tmp_sec.getElement(FIELD_DATA).getElement("overrides").numValues()
-                ):
-                    ovrd_list.append(
-                        tmp_sec.getElement(FIELD_DATA)
-                        .getElement("overrides")
-                        .getValue(j)
-                    )
-                field_dict[fid]["overrides"] = ovrd_list
+        for message in self.response:
+            securityData = message.getElement(SECURITY_DATA)
+            for i in range(securityData.numValues()):
+                tmp_sec = securityData.getValueAsElement(i)
+                fid = tmp_sec.getElementAsString("id")
+                if tmp_sec.hasElement("fieldError"):
+                    self.field_errors.append(fid)
+                    continue
+                field_dict[fid] = dict()
+                for f in sub_fields:
+                    field_dict[fid][f] = tmp_sec.getElement(FIELD_DATA).getElementAsString(f)
+                if self.overrides:
+                    ovrd_list = list()
+                    for j in range(
+                        tmp_sec.getElement(FIELD_DATA).getElement("overrides").numValues()
+                    ):
+                        ovrd_list.append(
+                            tmp_sec.getElement(FIELD_DATA)
+                            .getElement("overrides")
+                            .getValue(j)
+                        )
+                    field_dict[fid]["overrides"] = ovrd_list
 
         return field_dict
 
-    @property
-    def data(self):
-        if self.use_pandas:
-            return pd.DataFrame.from_dict(self.__data, orient="index")
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, value):
-        self.__data = value
-
-    @data.deleter
-    def data(self):
-        del self.__data
+    def to_frame(self, raw):
+        return pd.DataFrame.from_dict(raw, orient="index")
 
 
 class FieldSearch(FieldRequest):
@@ -200,7 +208,7 @@ class FieldSearch(FieldRequest):
         FIELD_DATA = blpapi.Name("fieldInfo")
 
         securityData = (
-            blpapi.event.MessageIterator(self.response).next().getElement(SECURITY_DATA)
+            self.response[-1].getElement(SECURITY_DATA)
         )
 
         sub_fields = ["mnemonic", "description", "categoryName"]
@@ -228,17 +236,5 @@ class FieldSearch(FieldRequest):
 
         return field_dict
 
-    @property
-    def data(self):
-        if self.use_pandas:
-            return pd.DataFrame.from_dict(self.__data, orient="index")
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, value):
-        self.__data = value
-
-    @data.deleter
-    def data(self):
-        del self.__data
+    def to_frame(self, raw):
+        return pd.DataFrame.from_dict(raw, orient="index")
@@ -0,0 +1,443 @@
+"""
+Intraday data from ``//blp/refdata``.
+
+An IntradayBarRequest only takes one security and the server is slow to serve
+long ranges in one go, so the range is split into windows of `window_days`
+for every security and the windows are sent at the same time on the pooled
+session. Bars are decoded straight into numpy arrays, with times as
+datetime64[ns], prices as float64 and volumes and event counts as int64.
+
+An IntradayTickRequest can return far more ticks than fit in memory, so it
+streams them into fixed-size columnar batches that are flushed to files
+partitioned by security and GMT date as soon as they fill up. Peak memory is
+bounded by `batch_size` rows per partition in flight. Each partition gets a
+checkpoint once its day has been fully served, and partitions with a
+checkpoint are not requested again, so an interrupted download resumes where
+it stopped.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+import blpapi
+from .columns import to_datetime64
+from .errors import to_security_error
+from .reference_data import StaticReferenceData
+
+__all__ = ["IntradayBarRequest", "IntradayTickRequest"]
+
+TIME = blpapi.Name("time")
+BAR_FLOATS = [blpapi.Name(n) for n in ("open", "high", "low", "close", "value")]
+BAR_INTS = [blpapi.Name(n) for n in ("volume", "numEvents")]
+TYPE = blpapi.Name("type")
+VALUE = blpapi.Name("value")
+SIZE = blpapi.Name("size")
+CONDITION_CODES = blpapi.Name("conditionCodes")
+EXCHANGE_CODE = blpapi.Name("exchangeCode")
+CHECKPOINT = "_SUCCESS"
+
+
+def windows(start, end, window_days: float) -> list:
+    """Split [start, end] into consecutive (start, end) windows of at most `window_days`."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    step = pd.Timedelta(days=window_days)
+    edges = list()
+    while start < end:
+        edges.append((start, min(start + step, end)))
+        start = start + step
+    return edges
+
+
+def day_windows(start, end) -> list:
+    """Split [start, end] into windows that don't cross midnight."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    edges = list()
+    while start < end:
+        midnight = start.normalize() + pd.Timedelta(days=1)
+        edges.append((start, min(midnight, end)))
+        start = midnight
+    return edges
+
+
+class IntradayBarRequest(StaticReferenceData):
+    request_type = "IntradayBarRequest"
+    streaming = True
+
+    def __init__(
+            self,
+            securities,
+            start,
+            end=None,
+            interval: int = 1,
+            event_type: str = "TRADE",
+            window_days: float = 5,
+            gap_fill: bool = False,
+            max_in_flight: int = None,
+            ignore_sec_error: bool = False,
+            **kwargs):
+        """
+        Intraday Bar Request
+
+        Parameters
+        ----------
+        securities : str or list
+            security identifiers
+        start : str or datetime
+            start of the range, in GMT e.g. "2020-01-02 14:30"
+        end : str or datetime
+            end of the range, in GMT. Defaults to now.
+        interval : int
+            bar length in minutes, 1 to 1440
+        event_type : str
+            TRADE, BID, ASK, BID_BEST, ASK_BEST, BEST_BID or BEST_ASK
+        window_days : float
+            length of the windows the range is split into per security
+        gap_fill : bool
+            fill the first bar of the range from the last event before it
+        max_in_flight : int
+            maximum number of windows outstanding at once
+        ignore_sec_error : bool
+            skip securities that return an error instead of raising
+        """
+        self.securities = securities if type(securities) == list else [securities, ]
+        self.start = start
+        self.end = end if end is not None else pd.Timestamp.now("UTC").tz_localize(None)
+        self.interval = interval
+        self.event_type = event_type
+        self.window_days = window_days
+        self.gap_fill = gap_fill
+        self.max_in_flight = max_in_flight
+        self.ignore_sec_error = ignore_sec_error
+        super(IntradayBarRequest, self).__init__(**kwargs)
+
+    def generate_request(self):
+        # security -> list of (window index, bar arrays)
+        self.buffer = dict()
+        self.request_blocks = [
+            (sec_id, ) + window
+            for sec_id in self.securities
+            for window in windows(self.start, self.end, self.window_days)
+        ]
+        self.requests = list()
+        for (sec_id, window_start, window_end) in self.request_blocks:
+            request = self.service.createRequest(self.request_type)
+            request.set("security", sec_id)
+            request.set("eventType", self.event_type)
+            request.set("interval", self.interval)
+            request.set("startDateTime", window_start.to_pydatetime())
+            request.set("endDateTime", window_end.to_pydatetime())
+            if self.gap_fill:
+                request.set("gapFillInitialBar", True)
+            self.requests.append(request)
+        if len(self.requests) > 0:
+            self.request = self.requests[0]
+
+    def send_request(self):
+        if len(self.requests) == 0:
+            return
+        self.dispatch(self.requests, self.max_in_flight, on_message=self.process_message)
+
+    def process_message(self, index, message):
+        sec_id = self.request_blocks[index][0]
+        if message.hasElement("responseError"):
+            if not self.ignore_sec_error:
+                raise Exception(to_security_error(sec_id, message.getElement("responseError")))
+            return
+        bars = message.getElement("barData").getElement("barTickData")
+        num_bars = bars.numValues()
+        columns = {TIME: np.empty(num_bars, dtype="datetime64[ns]")}
+        for name in BAR_FLOATS:
+            columns[name] = np.empty(num_bars)
+        for name in BAR_INTS:
+            columns[name] = np.empty(num_bars, dtype="int64")
+        for i in range(num_bars):
+            bar = bars.getValueAsElement(i)
+            columns[TIME][i] = to_datetime64(bar.getElementAsDatetime(TIME))
+            for name in BAR_FLOATS:
+                columns[name][i] = bar.getElementAsFloat(name)
+            for name in BAR_INTS:
+                columns[name][i] = bar.getElementAsInteger(name)
+        self.buffer.setdefault(sec_id, list()).append((index, columns))
+
+    def process_response(self):
+        # the bars are copied into the frame, so don't hold on to them
+        buffer, self.buffer = self.buffer, dict()
+        res_list = list()
+        for sec_id in self.securities:
+            parts = [columns for (_, columns) in sorted(buffer.get(sec_id, list()), key=lambda x: x[0])]
+            if len(parts) == 0:
+                continue
+            times = np.concatenate([part[TIME] for part in parts])
+            res = pd.DataFrame(
+                {str(name): np.concatenate([part[name] for part in parts]) for name in BAR_FLOATS + BAR_INTS},
+                index=pd.MultiIndex.from_arrays(
+                    [pd.Index([sec_id] * len(times)), pd.DatetimeIndex(times)], names=["security", "time"]
+                )
+            )
+            # a bar on the edge of two windows is returned by both
+            res_list.append(res[~res.index.duplicated(keep="last")])
+        if len(res_list) == 0:
+            return pd.DataFrame()
+        return pd.concat(res_list)
+
+    def to_frame(self, raw):
+        # already a long frame of (security, time) by bar fields
+        return raw
+
+
+class TickBatch(object):
+
+    def __init__(self, size: int, names: list):
+        """Fixed-size columnar batch of ticks for one partition"""
+        self.size = size
+        self.num_rows = 0
+        self.parts = 0
+        self.total = 0
+        self.columns = {TIME: np.empty(size, dtype="datetime64[ns]"), VALUE: np.empty(size),
+                        SIZE: np.empty(size, dtype="int64")}
+        # strings are converted to fixed-width arrays when flushed
+        for name in names:
+            self.columns[name] = np.empty(size, dtype=object)
+
+    def is_full(self) -> bool:
+        return self.num_rows == self.size
+
+
+class IntradayTickRequest(StaticReferenceData):
+    request_type = "IntradayTickRequest"
+    streaming = True
+
+    def __init__(
+            self,
+            securities,
+            start,
+            end,
+            path: str,
+            event_types="TRADE",
+            batch_size: int = 100000,
+            condition_codes: bool = False,
+            exchange_codes: bool = False,
+            file_format: str = "npz",
+            max_in_flight: int = 4,
+            ignore_sec_error: bool = False,
+            **kwargs):
+        """
+        Intraday Tick Request
+
+        Ticks are written under ``path/<security>/<YYYYMMDD>/`` and `data` is
+        a summary of the partitions. Use `load` to read a partition back.
+        Requests are not retried, since the ticks of a failed attempt are
+        already on disk: a day that fails has no checkpoint and is requested
+        again from scratch on the next run. Giving `retries` raises a
+        ValueError.
+
+        Parameters
+        ----------
+        securities : str or list
+            security identifiers
+        start : str or datetime
+            start of the range, in GMT
+        end : str or datetime
+            end of the range, in GMT
+        path : str
+            directory the partitions are written to
+        event_types : str or list
+            TRADE, BID, ASK, BID_BEST, ASK_BEST, MID_PRICE, AT_TRADE or
+            BEST_BID and BEST_ASK
+        batch_size : int
+            number of ticks held in memory per partition before they are
+            flushed to a file
+        condition_codes : bool
+            include the condition codes of each tick
+        exchange_codes : bool
+            include the exchange code of each tick
+        file_format : str
+            "npz" for numpy archives or "parquet", which needs pyarrow
+        max_in_flight : int
+            maximum number of days outstanding at once, which bounds the
+            number of partitions in memory
+        ignore_sec_error : bool
+            skip securities that return an error instead of raising
+        """
+        if file_format not in ("npz", "parquet"):
+            raise ValueError("file_format must be npz or parquet")
+        self.securities = securities if type(securities) == list else [securities, ]
+        self.start = start
+        self.end = end
+        self.path = path
+        self.event_types = event_types if type(event_types) == list else [event_types, ]
+        self.batch_size = batch_size
+        self.condition_codes = condition_codes
+        self.exchange_codes = exchange_codes
+        self.file_format = file_format
+        self.max_in_flight = max_in_flight
+        self.ignore_sec_error = ignore_sec_error
+        if kwargs.get("retries", 0) > 0:
+            raise ValueError("IntradayTickRequest is not retried, run it again to resume it")
+        super(IntradayTickRequest, self).__init__(**kwargs)
+
+    def partition(self, sec_id: str, day: str) -> str:
+        return os.path.join(self.path, sec_id.replace("/", "_"), day)
+
+    def checkpoint(self, sec_id: str, day: str):
+        """Checkpoint of a fully served partition, or None."""
+        checkpoint = os.path.join(self.partition(sec_id, day), CHECKPOINT)
+        if not os.path.exists(checkpoint):
+            return None
+        with open(checkpoint) as fh:
+            return json.load(fh)
+
+    def is_complete(self, sec_id: str, window_start, window_end) -> bool:
+        """Whether the partition has been served for at least the window."""
+        info = self.checkpoint(sec_id, window_start.strftime("%Y%m%d"))
+        return (
+            info is not None
+            and pd.Timestamp(info["start"]) <= window_start
+            and pd.Timestamp(info["end"]) >= window_end
+        )
+
+    def generate_request(self):
+        self.string_names = [TYPE]
+        if self.condition_codes:
+            self.string_names.append(CONDITION_CODES)
+        if self.exchange_codes:
+            self.string_names.append(EXCHANGE_CODE)
+        self.batches = dict()
+        self.request_blocks = list()
+        self.requests = list()
+        for sec_id in self.securities:
+            for (window_start, window_end) in day_windows(self.start, self.end):
+                if self.is_complete(sec_id, window_start, window_end):
+                    continue
+                day = window_start.strftime("%Y%m%d")
+                self.request_blocks.append((sec_id, day, window_start, window_end))
+                request = self.service.createRequest(self.request_type)
+                request.set("security", sec_id)
+                for event_type in self.event_types:
+                    request.append("eventTypes", event_type)
+                request.set("startDateTime", window_start.to_pydatetime())
+                request.set("endDateTime", window_end.to_pydatetime())
+                request.set("includeConditionCodes", self.condition_codes)
+                request.set("includeExchangeCodes", self.exchange_codes)
+                self.requests.append(request)
+        if len(self.requests) > 0:
+            self.request = self.requests[0]
+
+    def send_request(self):
+        if len(self.requests) == 0:
+            return
+        # start interrupted partitions again from scratch, only once they are
+        # about to be requested
+        for (sec_id, day, _, _) in self.request_blocks:
+            directory = self.partition(sec_id, day)
+            if os.path.exists(directory):
+                for name in os.listdir(directory):
+                    os.remove(os.path.join(directory, name))
+        self.dispatch(
+            self.requests, self.max_in_flight, on_message=self.process_message, on_response=self.complete
+        )
+
+    def process_message(self, index, message):
+        sec_id = self.request_blocks[index][0]
+        if message.hasElement("responseError"):
+            if not self.ignore_sec_error:
+                raise Exception(to_security_error(sec_id, message.getElement("responseError")))
+            return
+        batch = self.batches.get(index)
+        if batch is None:
+            batch = self.batches[index] = TickBatch(self.batch_size, self.string_names)
+        ticks = message.getElement("tickData").getElement("tickData")
+        columns = batch.columns
+        for i in range(ticks.numValues()):
+            tick = ticks.getValueAsElement(i)
+            row = batch.num_rows
+            columns[TIME][row] = to_datetime64(tick.getElementAsDatetime(TIME))
+            columns[VALUE][row] = tick.getElementAsFloat(VALUE)
+            columns[SIZE][row] = tick.getElementAsInteger(SIZE) if tick.hasElement(SIZE) else 0
+            for name in self.string_names:
+                columns[name][row] = tick.getElementAsString(name) if tick.hasElement(name) else ""
+            batch.num_rows += 1
+            if batch.is_full():
+                self.flush(index)
+
+    def flush(self, index):
+        """Write the ticks held for the partition of the request at `index` to a new part file."""
+        batch = self.batches.get(index)
+        if batch is None or batch.num_rows == 0:
+            return
+        sec_id, day = self.request_blocks[index][:2]
+        directory = self.partition(sec_id, day)
+        os.makedirs(directory, exist_ok=True)
+        n = batch.num_rows
+        columns = {
+            str(name): (column[:n].astype(str) if column.dtype == object else column[:n])
+            for (name, column) in batch.columns.items()
+        }
+        file_name = os.path.join(directory, "part-{0:05d}.{1}".format(batch.parts, self.file_format))
+        if self.file_format == "parquet":
+            import pyarrow
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(pyarrow.table(columns), file_name)
+        else:
+            np.savez(file_name, **columns)
+        batch.parts += 1
+        batch.total += n
+        batch.num_rows = 0
+
+    def complete(self, index):
+        """Flush the rest of a fully served partition and checkpoint it."""
+        self.flush(index)
+        batch = self.batches.pop(index, None)
+        sec_id, day, window_start, window_end = self.request_blocks[index]
+        # no ticks that day, or a security error that was ignored, still
+        # leaves an empty checkpointed partition
+        os.makedirs(self.partition(sec_id, day), exist_ok=True)
+        with open(os.path.join(self.partition(sec_id, day), CHECKPOINT), "w") as fh:
+            json.dump({
+                "start": window_start.isoformat(),
+                "end": window_end.isoformat(),
+                "rows": 0 if batch is None else batch.total,
+                "parts": 0 if batch is None else batch.parts
+            }, fh)
+
+    def process_response(self):
+        """Summary of the partitions of the range, one row per security and day."""
+        records = list()
+        for sec_id in self.securities:
+            for (window_start, _) in day_windows(self.start, self.end):
+                day = window_start.strftime("%Y%m%d")
+                info = self.checkpoint(sec_id, day)
+                if info is None:
+                    continue
+                records.append((sec_id, pd.Timestamp(day), info["rows"], info["parts"], self.partition(sec_id, day)))
+        return pd.DataFrame.from_records(
+            records, columns=["security", "date", "rows", "parts", "path"]
+        ).set_index(["security", "date"])
+
+    def to_frame(self, raw):
+        return raw
+
+    def load(self, security: str, day) -> pd.DataFrame:
+        """
+        Read the ticks of one partition.
+
+        Parameters
+        ----------
+        security : str
+            security identifier
+        day : str or date
+            GMT date of the partition, YYYYMMDD
+        """
+        day = pd.Timestamp(day).strftime("%Y%m%d")
+        directory = self.partition(security, day)
+        parts = sorted(f for f in os.listdir(directory) if f.startswith("part-"))
+        if self.file_format == "parquet":
+            frames = [pd.read_parquet(os.path.join(directory, f)) for f in parts]
+        else:
+            frames = list()
+            for f in parts:
+                with np.load(os.path.join(directory, f)) as archive:
+                    frames.append(pd.DataFrame({k: archive[k] for k in archive.files}))
+        if len(frames) == 0:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True).set_index("time")
@@ -0,0 +1,253 @@
+"""
+Latency and memory metrics of each request.
+
+Every BlpDataRequest records in its `metrics` member the seconds spent in
+each phase, the blpapi requests sent, the response events and messages
+received and, optionally, the elements decoded and the peak memory. The
+phases are
+
+    session   starting the pooled session, once per session
+    service   opening the service, once per service
+    generate  building the blpapi requests
+    send      sending them and waiting for the responses
+    decode    parsing messages as they arrive, streaming classes only,
+              included in send
+    process   process_response
+    frame     building the frame on first access of `data`
+
+Only a few clock reads and counter increments are made per request and
+message, so the metrics are always collected. The sinks registered with
+`add_sink` are called with the metrics when the response has been processed,
+with `stage` "response", and again when the frame is built, with `stage`
+"frame". A sink that raises is logged and otherwise ignored.
+"""
+import logging
+import threading
+import time
+import tracemalloc
+import blpapi
+
+__all__ = ["RequestMetrics", "LoggingSink", "OpenMetricsExporter", "add_sink", "remove_sink"]
+
+logger = logging.getLogger("betterbloomberg")
+
+COMPLEX_TYPES = (blpapi.DataType.SEQUENCE, blpapi.DataType.CHOICE)
+
+# called with the RequestMetrics of every request
+sinks = list()
+
+
+def add_sink(sink) -> None:
+    """Call ``sink(metrics)`` at each stage of every request."""
+    sinks.append(sink)
+
+
+def remove_sink(sink) -> None:
+    sinks.remove(sink)
+
+
+def element_count(element) -> int:
+    """Number of elements in the tree under `element`, itself included."""
+    if element.isArray():
+        if element.datatype() not in COMPLEX_TYPES:
+            return 1 + element.numValues()
+        return 1 + sum(element_count(element.getValueAsElement(i)) for i in range(element.numValues()))
+    if element.isComplexType():
+        return 1 + sum(element_count(e) for e in element.elements())
+    return 1
+
+
+class RequestMetrics(object):
+    # walk every response message to count its elements, which is about as
+    # slow as decoding it
+    count_elements = False
+    # measure the peak memory allocated by python while the request runs.
+    # Starts tracemalloc, which slows allocations down. The peak is process
+    # wide, so it includes whatever runs at the same time.
+    trace_memory = False
+
+    def __init__(self, name: str, service_type: str = None, request_type: str = None):
+        """
+        Metrics of one request
+
+        Parameters
+        ----------
+        name : str
+            request class name
+        service_type : str
+            blpapi service
+        request_type : str
+            blpapi request type
+        """
+        self.name = name
+        self.service_type = service_type
+        self.request_type = request_type
+        self.created = time.time()
+        # phase -> seconds
+        self.phases = dict()
+        self.sent = 0
+        self.events = 0
+        self.messages = 0
+        self.elements = 0
+        self.peak_memory = None
+        self.error = None
+        self.stage = None
+        self.memory_start = None
+
+    def lap(self, phase: str, start: float) -> float:
+        """Add the time since `start` to the phase. Returns the current time."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - start
+        return now
+
+    def message(self, message) -> None:
+        self.messages += 1
+        if self.count_elements:
+            self.elements += element_count(message.asElement())
+
+    def start_memory(self) -> None:
+        if not self.trace_memory:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.memory_start = tracemalloc.get_traced_memory()[0]
+
+    def stop_memory(self) -> None:
+        if self.memory_start is not None and tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1] - self.memory_start
+            self.memory_start = None
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in every phase, decoding being part of sending."""
+        return sum(v for (k, v) in self.phases.items() if k != "decode")
+
+    def finish(self, stage: str, targets=None) -> None:
+        """Record the end of a stage and call the sinks."""
+        self.stage = stage
+        if stage == "response":
+            self.stop_memory()
+        for sink in (sinks if targets is None else targets):
+            try:
+                sink(self)
+            except Exception:
+                logger.exception("Metrics sink %r failed", sink)
+
+    def to_dict(self) -> dict:
+        record = {
+            "name": self.name,
+            "service_type": self.service_type,
+            "request_type": self.request_type,
+            "created": self.created,
+            "stage": self.stage,
+            "sent": self.sent,
+            "events": self.events,
+            "messages": self.messages,
+            "elements": self.elements,
+            "peak_memory": self.peak_memory,
+            "error": self.error,
+        }
+        record.update(self.phases)
+        return record
+
+    def __repr__(self):
+        phases = " ".join("{0}={1:.6f}".format(k, v) for (k, v) in self.phases.items())
+        return "<RequestMetrics {0} {1} sent={2} events={3} messages={4}>".format(
+            self.name, phases, self.sent, self.events, self.messages
+        )
+
+
+class LoggingSink(object):
+
+    def __init__(self, logger=None, level: int = logging.INFO):
+        """Log one line per request stage, to the betterbloomberg logger by default."""
+        self.logger = logger if logger is not None else logging.getLogger("betterbloomberg")
+        self.level = level
+
+    def __call__(self, metrics) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        if metrics.stage == "frame":
+            self.logger.log(self.level, "%s frame built in %.6fs", metrics.name, metrics.phases["frame"])
+            return
+        phases = " ".join("{0}={1:.6f}".format(k, v) for (k, v) in metrics.phases.items())
+        self.logger.log(
+            self.level,
+            "%s %s in %.6fs: %s sent=%d events=%d messages=%d elements=%d peak_memory=%s",
+            metrics.name,
+            "failed with " + metrics.error if metrics.error else "served",
+            metrics.total,
+            phases,
+            metrics.sent,
+            metrics.events,
+            metrics.messages,
+            metrics.elements,
+            metrics.peak_memory,
+        )
+
+
+class OpenMetricsExporter(object):
+    prefix = "betterbloomberg"
+
+    def __init__(self):
+        """
+        Aggregate the metrics of every request for scraping, in the
+        OpenMetrics text format returned by `exposition`.
+        """
+        self.lock = threading.Lock()
+        # (name, phase) -> [sum, count]
+        self.seconds = dict()
+        # (name, outcome) -> count
+        self.requests = dict()
+        # name -> [sent, events, messages, elements]
+        self.counts = dict()
+        # name -> largest peak memory
+        self.peak_memory = dict()
+
+    def __call__(self, metrics) -> None:
+        with self.lock:
+            if metrics.stage == "frame":
+                phases = {"frame": metrics.phases["frame"]}
+            else:
+                phases = {k: v for (k, v) in metrics.phases.items() if k != "frame"}
+                outcome = (metrics.name, "error" if metrics.error else "ok")
+                self.requests[outcome] = self.requests.get(outcome, 0) + 1
+                counts = self.counts.setdefault(metrics.name, [0, 0, 0, 0])
+                for (i, value) in enumerate((metrics.sent, metrics.events, metrics.messages, metrics.elements)):
+                    counts[i] += value
+                if metrics.peak_memory is not None:
+                    self.peak_memory[metrics.name] = max(
+                        self.peak_memory.get(metrics.name, 0), metrics.peak_memory
+                    )
+            for (phase, seconds) in phases.items():
+                total = self.seconds.setdefault((metrics.name, phase), [0.0, 0])
+                total[0] += seconds
+                total[1] += 1
+
+    def exposition(self) -> str:
+        """Current values in the OpenMetrics text format."""
+        p = self.prefix
+        lines = list()
+        with self.lock:
+            lines.append("# TYPE {0}_request_phase_seconds summary".format(p))
+            lines.append("# UNIT {0}_request_phase_seconds seconds".format(p))
+            lines.append("# HELP {0}_request_phase_seconds Time spent in each phase of a request.".format(p))
+            for ((name, phase), (total, count)) in sorted(self.seconds.items()):
+                labels = '{{request="{0}",phase="{1}"}}'.format(name, phase)
+                lines.append("{0}_request_phase_seconds_sum{1} {2!r}".format(p, labels, total))
+                lines.append("{0}_request_phase_seconds_count{1} {2}".format(p, labels, count))
+            lines.append("# TYPE {0}_requests counter".format(p))
+            lines.append("# HELP {0}_requests Requests processed.".format(p))
+            for ((name, outcome), count) in sorted(self.requests.items()):
+                lines.append('{0}_requests_total{{request="{1}",outcome="{2}"}} {3}'.format(p, name, outcome, count))
+            for (i, metric) in enumerate(("blpapi_requests", "events", "messages", "elements")):
+                lines.append("# TYPE {0}_{1} counter".format(p, metric))
+                for (name, counts) in sorted(self.counts.items()):
+                    lines.append('{0}_{1}_total{{request="{2}"}} {3}'.format(p, metric, name, counts[i]))
+            lines.append("# TYPE {0}_peak_memory_bytes gauge".format(p))
+            lines.append("# UNIT {0}_peak_memory_bytes bytes".format(p))
+            for (name, peak) in sorted(self.peak_memory.items()):
+                lines.append('{0}_peak_memory_bytes{{request="{1}"}} {2}'.format(p, name, peak))
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -1,11 +1,27 @@
 import blpapi
 import pandas as pd
+from .columns import TypedColumns
+from .errors import to_security_error
 from .reference_data import StaticReferenceData
 
-__all__ = ["PortfolioDataRequest", ]
+__all__ = ["PortfolioDataRequest", "PortfolioBatchRequest"]
+
+SECURITY = blpapi.Name("Security")
+
+# sub-element holding the value of each position field. PORTFOLIO_MEMBERS
+# positions only name the security and become a boolean membership column,
+# the sub-elements of other fields e.g. PORTFOLIO_DATA are each kept as a
+# "<field>.<sub-element>" column
+VALUE_ELEMENTS = {
+    "PORTFOLIO_MWEIGHT": "Weight",
+    "PORTFOLIO_MPOSITION": "Position",
+    "PORTFOLIO_MPRICE": "Price",
+}
+MEMBERS = "PORTFOLIO_MEMBERS"
 
 class PortfolioDataRequest(StaticReferenceData):
     request_type = "PortfolioDataRequest"
+    streaming = True
 
     def __init__(self, port_id: str, field: str="PORTFOLIO_MWEIGHT", ref_date: str=None, **kwargs):
         """
@@ -28,6 +44,7 @@ class PortfolioDataRequest(StaticReferenceData):
         super(PortfolioDataRequest, self).__init__(**kwargs)
 
     def generate_request(self):
+        self.buffer = dict()
         securities = self.request.getElement("securities")
         securities.appendValue(self.port_id)
 
@@ -40,38 +57,135 @@ class PortfolioDataRequest(StaticReferenceData):
             overrider.setElement("fieldId", "REFERENCE_DATE")
             overrider.setElement("value", self.ref_date)
 
-    def process_response(self):
+    def process_message(self, index, message):
         RESULTS_DATA = blpapi.Name("securityData")
 
-        securityData = (
-            blpapi.event.MessageIterator(self.response).next().getElement(RESULTS_DATA)
-        )
-        secdata2 = securityData.getValue(0)
-        fld_data = secdata2.getElement("fieldData")
-        positions = fld_data.getElement(self.field)
-        port_dict = {}
-
-        for i in range(positions.numValues()):
-            pos = positions.getValue(i)
-            sec_name = pos.getElementAsString("Security")
-            sec_weight = pos.getElementAsString("Weight")
-            port_dict[sec_name] = sec_weight
-
-        return port_dict
-
-    @property
-    def data(self):
-        if self.use_pandas:
-            frame = pd.DataFrame.from_dict(self.__data, orient="index")
-            frame = frame[0].rename("weight").astype(float)
-            return frame
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, value):
-        self.__data = value
-
-    @data.deleter
-    def data(self):
-        del self.__data
+        securityData = message.getElement(RESULTS_DATA)
+        for j in range(securityData.numValues()):
+            secdata2 = securityData.getValue(j)
+            fld_data = secdata2.getElement("fieldData")
+            if not fld_data.hasElement(self.field):
+                continue
+            positions = fld_data.getElement(self.field)
+
+            for i in range(positions.numValues()):
+                pos = positions.getValue(i)
+                sec_name = pos.getElementAsString("Security")
+                sec_weight = pos.getElementAsFloat("Weight")
+                self.buffer[sec_name] = sec_weight
+
+    def process_response(self):
+        return self.buffer
+
+    def to_frame(self, raw):
+        frame = pd.DataFrame.from_dict(raw, orient="index")
+        frame = frame[0].rename("weight").astype(float)
+        return frame
+
+
+class PortfolioBatchRequest(StaticReferenceData):
+    request_type = "PortfolioDataRequest"
+    streaming = True
+
+    def __init__(
+            self,
+            port_ids,
+            fields="PORTFOLIO_MWEIGHT",
+            ref_dates=None,
+            max_in_flight: int = None,
+            ignore_sec_error: bool = False,
+            **kwargs):
+        """
+        Batched Portfolio Data Request
+
+        One request is sent per reference date, for every portfolio and
+        field, and the requests are sent at the same time.
+
+        Parameters
+        ----------
+        port_ids : str or list
+            Portfolio IDs found through the PRTU function in the Terminal
+        fields : str or list
+            position fields e.g. PORTFOLIO_MWEIGHT, PORTFOLIO_MPOSITION or
+            PORTFOLIO_MPRICE. PORTFOLIO_MEMBERS is a boolean membership
+            column and each sub-element of PORTFOLIO_DATA is a column named
+            e.g. "PORTFOLIO_DATA.Market Value".
+        ref_dates : str or list
+            reference dates of the holdings, YYYYMMDD. The current holdings
+            if None.
+        max_in_flight : int
+            maximum number of dates outstanding at once
+        ignore_sec_error : bool
+            skip portfolios that can't be found instead of raising
+        """
+        self.port_ids = port_ids if type(port_ids) == list else [port_ids, ]
+        self.fields = fields if type(fields) == list else [fields, ]
+        self.ref_dates = ref_dates if type(ref_dates) == list else [ref_dates, ]
+        self.max_in_flight = max_in_flight
+        self.ignore_sec_error = ignore_sec_error
+        super(PortfolioBatchRequest, self).__init__(**kwargs)
+
+    def generate_request(self):
+        self.columns = TypedColumns()
+        # (portfolio, date, security) -> row
+        self.rows = dict()
+        self.requests = list()
+        for ref_date in self.ref_dates:
+            request = self.service.createRequest(self.request_type)
+            for port_id in self.port_ids:
+                request.getElement("securities").appendValue(port_id)
+            for field in self.fields:
+                request.getElement("fields").appendValue(field)
+            if ref_date is not None:
+                overrider = request.getElement("overrides").appendElement()
+                overrider.setElement("fieldId", "REFERENCE_DATE")
+                overrider.setElement("value", ref_date)
+            self.requests.append(request)
+        self.request = self.requests[0]
+
+    def send_request(self):
+        self.dispatch(self.requests, self.max_in_flight, on_message=self.process_message)
+
+    def process_message(self, index, message):
+        ref_date = pd.Timestamp(self.ref_dates[index]) if self.ref_dates[index] is not None else pd.NaT
+        securityData = message.getElement("securityData")
+        for j in range(securityData.numValues()):
+            port_data = securityData.getValue(j)
+            port_id = port_data.getElement("security").getValue()
+            if port_data.hasElement("securityError"):
+                if not self.ignore_sec_error:
+                    raise Exception(to_security_error(port_id, port_data.getElement("securityError")))
+                continue
+            fld_data = port_data.getElement("fieldData")
+            for field in self.fields:
+                if not fld_data.hasElement(field):
+                    continue
+                positions = fld_data.getElement(field)
+                value_name = VALUE_ELEMENTS.get(field)
+                for i in range(positions.numValues()):
+                    pos = positions.getValue(i)
+                    key = (port_id, ref_date, pos.getElementAsString(SECURITY))
+                    row = self.rows.setdefault(key, len(self.rows))
+                    if field == MEMBERS:
+                        self.columns.set_value(row, field, True)
+                        continue
+                    for elem in pos.elements():
+                        if elem.name() == SECURITY:
+                            continue
+                        if value_name is None:
+                            self.columns.set(row, "{0}.{1}".format(field, elem.name()), elem)
+                        elif str(elem.name()) == value_name:
+                            self.columns.set(row, field, elem)
+                            break
+
+    def process_response(self):
+        index = pd.MultiIndex.from_tuples(list(self.rows), names=["portfolio", "date", "security"])
+        frame = self.columns.frame(index, self.fields)
+        if MEMBERS in frame:
+            # rows of the other fields that are not members
+            frame[MEMBERS] = frame[MEMBERS].fillna(False).astype(bool)
+        return frame
+
+    def to_frame(self, raw):
+        # already a long frame of (portfolio, date, security) by fields
+        return raw
@@ -8,15 +8,51 @@ API will split the securities in the request into groups of
 10 securities and fields into groups of 128 fields. Therefore, depending of the
 number of securities and fields provided, the number of requests many exceed the
 default 1,024 MaxPendingRequests limit.
+
+Responses are parsed message by message as the PARTIAL_RESPONSE and RESPONSE
+events arrive, so large universes are not held as raw blpapi events until the
+request completes.
+
+Setting `chunk` on a request splits the securities into blocks of `chunk_size`
+and the fields into blocks of at most the field limit. The blocks are sent at
+the same time on one session, with no more in flight than keeps the
+server-side split under MaxPendingRequests, and the responses are merged back
+into a single result.
+
+Passing a ReferenceCache as `cache` serves fresh cells from the cache and only
+sends the missing (security, field) cells, grouped by the fields each security
+is missing.
+
+Setting `typed` decodes each field straight into a typed column chosen from
+the element datatype, or from the catalogue datatype when a FieldCatalogue is
+given, and returns a frame of securities by fields.
+
+Setting `partial` returns the data received for every good security and
+collects security and field errors in `errors`, one row per failed cell.
+`retry` then requests only the failed cells again and merges them in.
+
+Setting `long_bulk` decodes every value of a bulk field, for all securities,
+into one long frame per field in `bulk`, indexed by security with a typed
+column per sub-field, instead of a nested frame per security.
 """
+import math
 import blpapi
+import numpy as np
 from .core import BlpDataRequest
 import pandas as pd
 from datetime import date, datetime
-from .errors import to_security_error, as_field_error
+from .catalogue import CATALOGUE_SOURCE
+from .columns import TypedColumns, CATALOGUE_KINDS
+from .errors import to_security_error, as_field_error, security_error_cells, FieldErrorAttrs
+from .store import HistoryStore
 
 __all__ = ["ReferenceDataRequest", "HistoricalDataRequest"]
 
+# block of the long bulk rows received from a failed attempt
+DISCARDED = -1
+
+DATE = blpapi.Name("date")
+
 class StaticReferenceData(BlpDataRequest):
     # this class is meant only to handle the service type argument
     service_type = "//blp/refdata"
@@ -28,8 +64,28 @@ class StaticReferenceData(BlpDataRequest):
 
 class ReferenceDataRequest(StaticReferenceData):
     request_type = "ReferenceDataRequest"
+    streaming = True
+    max_fields = 400
+    # blpapi.SessionOptions default
+    max_pending_requests = 1024
 
-    def __init__(self, securities, fields, overrides=None, ignore_sec_error=False, ignore_field_error=False, **kwargs):
+    def __init__(
+            self,
+            securities,
+            fields,
+            overrides=None,
+            ignore_sec_error=False,
+            ignore_field_error=False,
+            chunk=False,
+            chunk_size=100,
+            max_in_flight=None,
+            cache=None,
+            as_of=None,
+            catalogue=None,
+            typed=False,
+            partial=False,
+            long_bulk=False,
+            **kwargs):
         """Reference Data Request
 
         Parameters
@@ -42,6 +98,33 @@ class ReferenceDataRequest(StaticReferenceData):
             override fields and values
         ignore_sec_error : bool
             ignore security errors raised
+        ignore_field_error : bool
+            ignore field errors raised
+        chunk : bool
+            split the securities into blocks of `chunk_size` and send the
+            blocks concurrently. Fields are always split at `max_fields`.
+        chunk_size : int
+            number of securities per block when chunking
+        max_in_flight : int
+            maximum number of blocks outstanding at once. Defaults to as many
+            as the session's MaxPendingRequests allows.
+        cache : ReferenceCache
+            cell cache to serve from and store into
+        as_of : str or date
+            as-of date of the cells in the cache. Defaults to today.
+        catalogue : FieldCatalogue
+            validate the fields before anything is sent. Invalid fields
+            raise, or are dropped from the request if `ignore_field_error`.
+        typed : bool
+            return one row per security with a float64, int64, datetime64,
+            bool or categorical column per field instead of an object frame
+            of fields by securities
+        partial : bool
+            don't raise on security or field errors. The errors are collected
+            in `errors` and can be re-requested with `retry`.
+        long_bulk : bool
+            decode bulk fields into one long frame per field in `bulk`
+            instead of a frame per security in `data`
         """
         if type(securities) == list:
             self.securities = securities
@@ -59,24 +142,196 @@ class ReferenceDataRequest(StaticReferenceData):
             self.overrides = overrides
         else:
             self.overrides = dict()
-        self.ignore_sec_error = ignore_sec_error
-        self.ignore_field_error = ignore_field_error
+        self.ignore_sec_error = ignore_sec_error or partial
+        self.ignore_field_error = ignore_field_error or partial
+        self.chunk = chunk
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.cache = cache
+        self.as_of = as_of
+        self.catalogue = catalogue
+        self.typed = typed
+        self.long_bulk = long_bulk
         super(ReferenceDataRequest, self).__init__(**kwargs)
 
+    def groups(self):
+        """
+        The (securities, fields) that need to be requested. Without a cache
+        that is everything, otherwise securities are grouped by the fields
+        they are missing.
+        """
+        if self.cache is None:
+            return [(self.securities, self.fields)]
+        missing = dict()
+        for sec_id in self.securities:
+            cached = self.cached.get(sec_id, dict())
+            fields = tuple(f for f in self.fields if f not in cached)
+            if len(fields) > 0:
+                missing.setdefault(fields, list()).append(sec_id)
+        return [(securities, list(fields)) for (fields, securities) in missing.items()]
+
+    def error_groups(self):
+        """The failed cells in `errors`, with securities grouped by the fields they failed."""
+        failed = dict()
+        for error in self.error_list:
+            if error.source == CATALOGUE_SOURCE:
+                # rejected by the catalogue, requesting it again would not help
+                continue
+            fields = failed.setdefault(error.security, list())
+            if error.field not in fields:
+                fields.append(error.field)
+        missing = dict()
+        for (sec_id, fields) in failed.items():
+            missing.setdefault(tuple(fields), list()).append(sec_id)
+        return [(securities, list(fields)) for (fields, securities) in missing.items()]
+
+    def blocks(self, groups=None):
+        """
+        Split the securities and fields into limit-safe blocks. Anything after
+        the securities and fields in a group is passed on to `fill_request`.
+        """
+        blocks = list()
+        for group in (self.groups() if groups is None else groups):
+            group_securities, group_fields, extra = group[0], group[1], tuple(group[2:])
+            sec_size = self.chunk_size if self.chunk else len(group_securities)
+            blocks.extend(
+                (group_securities[i:i + sec_size], group_fields[j:j + self.max_fields]) + extra
+                for i in range(0, len(group_securities), sec_size)
+                for j in range(0, len(group_fields), self.max_fields)
+            )
+        return blocks
+
+    def in_flight_limit(self, blocks):
+        """Number of blocks that can be outstanding without exceeding MaxPendingRequests"""
+        if self.max_in_flight is not None:
+            return self.max_in_flight
+        max_pending = (self.session_options or dict()).get(
+            "MaxPendingRequests", self.max_pending_requests
+        )
+        # the server splits each request into groups of 10 securities and 128 fields
+        cost = max(math.ceil(len(b[0]) / 10) * math.ceil(len(b[1]) / 128) for b in blocks)
+        return max(1, max_pending // cost)
+
     def generate_request(self):
+        self.buffer = dict()
+        self.released = False
+        self.error_list = list()
+        if self.catalogue is not None:
+            field_errors = self.catalogue.validate(self.fields)
+            if len(field_errors) > 0:
+                if not self.ignore_field_error:
+                    raise Exception(field_errors)
+                invalid = {e.field for e in field_errors}
+                self.fields = [f for f in self.fields if f not in invalid]
+                # one failed cell per security, as if Bloomberg had rejected the field
+                self.error_list.extend(e._replace(security=s) for e in field_errors for s in self.securities)
+        # field -> (sub-field columns, security of each row, block of each row)
+        self.bulk_columns = dict()
+        self.bulk = dict()
+        if self.typed:
+            hints = dict()
+            if self.catalogue is not None:
+                hints = {f: CATALOGUE_KINDS.get(self.catalogue.datatype(f)) for f in self.fields}
+            self.rows = dict()
+            for s in self.securities:
+                self.rows.setdefault(s, len(self.rows))
+            self.columns = TypedColumns(len(self.rows), hints)
+        self.cached = dict()
+        if self.cache is not None:
+            self.cached = self.cache.get(self.securities, self.fields, self.overrides, self.as_of)
+        self.request_blocks = self.blocks()
+        self.requests = self.create_requests(self.request_blocks)
+        if len(self.requests) > 0:
+            self.request = self.requests[0]
+
+    def create_requests(self, blocks):
+        requests = list()
+        for block in blocks:
+            request = self.service.createRequest(self.request_type)
+            self.fill_request(request, *block)
+            requests.append(request)
+        return requests
+
+    def fill_request(self, request, securities, fields):
         # constructing the request
-        for s in self.securities:
-            self.request.append("securities", s)
-        for f in self.fields:
-            self.request.append("fields", f)
+        for s in securities:
+            request.append("securities", s)
+        for f in fields:
+            request.append("fields", f)
         # setting the overrides is a bitch.
         # might be a better way to do this
-        ovrds = self.request.getElement("overrides")
+        ovrds = request.getElement("overrides")
         for (k, v) in self.overrides.items():
             ovr = ovrds.appendElement()
             ovr.setElement("fieldId", k)
             ovr.setElement("value", v)
 
+    def send_request(self):
+        if len(self.requests) == 0:
+            # everything was served from the cache
+            return
+        self.dispatch(
+            self.requests,
+            self.in_flight_limit(self.request_blocks),
+            on_message=self.process_message,
+            on_retry=self.discard
+        )
+
+    def discard(self, index):
+        """Drop the errors of a failed attempt at the block at `index` before it is sent again."""
+        securities, fields = set(self.request_blocks[index][0]), set(self.request_blocks[index][1])
+        self.error_list = [
+            e for e in self.error_list if not (e.security in securities and e.field in fields)
+        ]
+        # long bulk rows of the failed attempt are received again
+        for (_, _, blocks) in self.bulk_columns.values():
+            for (row, block) in enumerate(blocks):
+                if block == index:
+                    blocks[row] = DISCARDED
+
+    @property
+    def errors(self):
+        """Security and field errors collected, one row per failed cell"""
+        return pd.DataFrame(self.error_list, columns=FieldErrorAttrs)
+
+    def retry(self):
+        """
+        Request the failed cells in `errors` again and merge what is received
+        into the data.
+
+        Returns
+        -------
+        pd.DataFrame
+            the errors of the cells that failed again
+        """
+        if self.released:
+            raise Exception("Buffers released with the raw response, retry before release_raw or with keep_raw")
+        blocks = self.blocks(self.error_groups())
+        if len(blocks) == 0:
+            return self.errors
+        self.error_list = [e for e in self.error_list if e.source == CATALOGUE_SOURCE]
+        # block indexes carry on from the original blocks
+        offset = len(self.request_blocks)
+        requests = self.create_requests(blocks)
+        self.request_blocks.extend(blocks)
+        self.requests.extend(requests)
+        self.dispatch(
+            requests,
+            self.in_flight_limit(blocks),
+            on_message=lambda index, message: self.process_message(offset + index, message),
+            on_retry=lambda index: self.discard(offset + index)
+        )
+        self.data = self.process_response()
+        return self.errors
+
+    def release_buffers(self):
+        # retry merges into these, so it is refused once they are released
+        self.buffer = dict()
+        self.bulk_columns = dict()
+        if self.typed:
+            self.columns = None
+        self.released = True
+
     @staticmethod
     def process_bulk_field(refBulkfield):
         response_list = []
@@ -92,43 +347,112 @@ class ReferenceDataRequest(StaticReferenceData):
             response_list.append(bulk_dict)
         return response_list
 
+    def process_long_bulk_field(self, sec_id, refBulkfield, index=None):
+        """
+        Append the values of a bulk field as rows of the field's long columns,
+        recording the block at `index` they came from.
+        """
+        columns, rows, blocks = self.bulk_columns.setdefault(
+            str(refBulkfield.name()), (TypedColumns(), list(), list())
+        )
+        for i in range(refBulkfield.numValues()):
+            bulkElement = refBulkfield.getValueAsElement(i)
+            row = len(rows)
+            rows.append(sec_id)
+            blocks.append(index)
+            for elem in bulkElement.elements():
+                columns.set(row, str(elem.name()), elem)
+
+    def process_message(self, index, message):
+        self.process_security_data(
+            message.getElement("securityData"), self.buffer, self.request_blocks[index][1], index
+        )
+
     def process_response(self):
+        self.bulk = dict()
+        for (field, (columns, rows, blocks)) in self.bulk_columns.items():
+            frame = columns.frame(pd.Index(rows, name="security"))
+            # without the rows of failed attempts
+            self.bulk[field] = frame[[block != DISCARDED for block in blocks]] if DISCARDED in blocks else frame
+        if self.typed:
+            return self.process_typed_response()
+        if self.cache is not None:
+            self.cache.put(self.buffer, self.overrides, self.as_of)
+            for (sec_id, fields) in self.cached.items():
+                self.buffer.setdefault(sec_id, dict()).update(fields)
+        # blocks can be served in any order, so restore the requested order
+        sec_order = {s: i for (i, s) in enumerate(self.securities)}
+        fld_order = {f: i for (i, f) in enumerate(self.fields)}
         response_dict = dict()
-        securities = (
-            blpapi.event.MessageIterator(self.response)
-            .next()
-            .getElement("securityData")
-        )
+        for (sec_id, fields) in sorted(self.buffer.items(), key=lambda x: sec_order.get(x[0], len(sec_order))):
+            response_dict[sec_id] = dict(
+                sorted(fields.items(), key=lambda x: fld_order.get(x[0], len(fld_order)))
+            )
+        return response_dict
+
+    def process_typed_response(self):
+        index = list(self.rows)
+        if self.cache is not None:
+            self.cache.put(self.columns.to_dict(index), self.overrides, self.as_of)
+            for (sec_id, fields) in self.cached.items():
+                for (f, value) in fields.items():
+                    self.columns.set_value(self.rows[sec_id], f, value)
+        return self.columns.frame(index, self.fields)
+
+    def to_frame(self, raw):
+        if self.typed:
+            # already securities by typed field columns
+            return raw
+        return super(ReferenceDataRequest, self).to_frame(raw)
+
+    def process_security_data(self, securities, response_dict, fields=None, index=None):
         # iterate through the securities
         for i in range(securities.numValues()):
             temp_sec = securities.getValueAsElement(i)
             sec_id = temp_sec.getElement("security").getValue()
-            response_dict[sec_id] = dict()
+            if self.typed:
+                row = self.rows.setdefault(sec_id, len(self.rows))
+            else:
+                # a security split across field blocks is merged into one entry
+                response_dict.setdefault(sec_id, dict())
 
-            if temp_sec.hasElement("securityError") and not self.ignore_sec_error:
-                raise Exception(to_security_error(sec_id, temp_sec.getElement("securityError")))
+            if temp_sec.hasElement("securityError"):
+                error = to_security_error(sec_id, temp_sec.getElement("securityError"))
+                if not self.ignore_sec_error:
+                    raise Exception(error)
+                self.error_list.extend(security_error_cells(error, fields or self.fields))
 
-            if (temp_sec.getElement("fieldExceptions").numValues() > 0) and not self.ignore_field_error:
-                field_exceptions = temp_sec.getElement("fieldExceptions")
-                raise Exception(as_field_error(sec_id, field_exceptions))
+            if temp_sec.getElement("fieldExceptions").numValues() > 0:
+                field_errors = as_field_error(sec_id, temp_sec.getElement("fieldExceptions"))
+                if not self.ignore_field_error:
+                    raise Exception(field_errors)
+                self.error_list.extend(field_errors)
 
             sec_flds = temp_sec.getElement("fieldData")
             # iterate through fields
             for field in sec_flds.elements():
                 # bulk data processing
-                if field.isArray():
+                if field.isArray() and self.long_bulk:
+                    self.process_long_bulk_field(sec_id, field, index)
+
+                elif field.isArray():
                     bulk_data = pd.DataFrame(
                         ReferenceDataRequest.process_bulk_field(field)
                     )
-                    response_dict[sec_id][str(field.name())] = bulk_data
+                    if self.typed:
+                        self.columns.set_value(row, str(field.name()), bulk_data)
+                    else:
+                        response_dict[sec_id][str(field.name())] = bulk_data
 
+                elif self.typed:
+                    self.columns.set(row, str(field.name()), field)
                 else:
                     response_dict[sec_id][str(field.name())] = field.getValue()
-        return response_dict
 
 
 class HistoricalDataRequest(ReferenceDataRequest):
     request_type = "HistoricalDataRequest"
+    max_fields = 25
 
     def __init__(
         self,
@@ -140,6 +464,7 @@ class HistoricalDataRequest(ReferenceDataRequest):
         period_adjust: str = "ACTUAL",
         maxlimit: int = 100,
         overrides=None,
+        store=None,
         **kwargs
     ):
         """Historical Data Request
@@ -158,7 +483,17 @@ class HistoricalDataRequest(ReferenceDataRequest):
             YYYYMMDD format
         end : str
             YYYYMMDD format
+        store : HistoryStore
+            local store to serve from. Only the windows of [start, end] the
+            store does not hold are requested, and `maxlimit` is not applied.
+        **kwargs :
+            `chunk`, `chunk_size` and `max_in_flight` split the securities
+            into concurrent blocks as for ReferenceDataRequest. Fields are
+            always split into blocks of 25. `typed` raises a ValueError,
+            since the typed columns hold one row per security.
         """
+        if kwargs.get("typed", False):
+            raise ValueError("typed is not supported for HistoricalDataRequest")
         self.start = start
         if end is None:
             end = date.today().strftime("%Y%m%d")
@@ -166,76 +501,158 @@ class HistoricalDataRequest(ReferenceDataRequest):
         self.period = period
         self.period_adjust = period_adjust
         self.maxlimit = maxlimit
+        self.store = store
         super(HistoricalDataRequest, self).__init__(
             securities, fields, overrides, **kwargs
         )
 
-    def generate_request(self):
-        # call the parent generate request
-        super(HistoricalDataRequest, self).generate_request()
-        self.request.set("periodicitySelection", self.period)
-        self.request.set("periodicityAdjustment", self.period_adjust)
-        self.request.set("startDate", self.start)
-        self.request.set("endDate", self.end)
-        self.request.set("maxDataPoints", self.maxlimit)
-
-    def send_request(self, correlation_id=None):
-        eQ = blpapi.event.EventQueue()
-        if correlation_id is not None:
-            cid = blpapi.CorrelationId(correlation_id)
-        self.session.sendRequest(self.request, eventQueue=eQ)
-        event_list = []
-        while True:
-            eventObj = eQ.nextEvent(timeout=500)
-            event_list.append(eventObj)
-            if eventObj.eventType() == blpapi.event.Event.RESPONSE:
-                # A RESPONSE Message indicates the request has been fully served
-                break
-        self.response = event_list
+    def series_key(self, security, field):
+        return HistoryStore.key(security, field, self.period, self.period_adjust, self.overrides)
+
+    def groups(self):
+        """
+        Without a store everything is requested for [start, end]. Otherwise
+        the missing windows of each series are grouped by window, then by
+        the fields each security is missing in it.
+        """
+        if self.store is None:
+            return [(self.securities, self.fields)]
+        windows = dict()
+        for sec_id in self.securities:
+            for f in self.fields:
+                for window in self.store.missing(self.series_key(sec_id, f), self.start, self.end):
+                    windows.setdefault(window, dict()).setdefault(sec_id, list()).append(f)
+        groups = list()
+        for (window, sec_fields) in windows.items():
+            missing = dict()
+            for (sec_id, fields) in sec_fields.items():
+                missing.setdefault(tuple(fields), list()).append(sec_id)
+            groups.extend((securities, list(fields)) + window for (fields, securities) in missing.items())
+        return groups
+
+    def error_groups(self):
+        groups = super(HistoricalDataRequest, self).error_groups()
+        if self.store is None:
+            return groups
+        return [group + (self.start, self.end) for group in groups]
+
+    def fill_request(self, request, securities, fields, start=None, end=None):
+        # call the parent fill request
+        super(HistoricalDataRequest, self).fill_request(request, securities, fields)
+        request.set("periodicitySelection", self.period)
+        request.set("periodicityAdjustment", self.period_adjust)
+        request.set("startDate", start if start is not None else self.start)
+        request.set("endDate", end if end is not None else self.end)
+        if self.store is None:
+            request.set("maxDataPoints", self.maxlimit)
+
+    def process_message(self, index, message):
+        security_data = message.getElement("securityData")
+        sec_id = security_data.getElement("security").getValue()
+
+        if security_data.hasElement("securityError"):
+            error = to_security_error(sec_id, security_data.getElement("securityError"))
+            if not self.ignore_sec_error:
+                raise Exception(error)
+            self.error_list.extend(security_error_cells(error, self.request_blocks[index][1]))
+            return
+
+        if security_data.getElement("fieldExceptions").numValues() > 0:
+            field_errors = as_field_error(sec_id, security_data.getElement("fieldExceptions"))
+            if not self.ignore_field_error:
+                raise Exception(field_errors)
+            self.error_list.extend(field_errors)
+
+        # decode straight into one array per field
+        field_data = security_data.getElement("fieldData")
+        num_points = field_data.numValues()
+        dates = np.empty(num_points, dtype="datetime64[ns]")
+        columns = dict()
+        for i in range(num_points):
+            pt = field_data.getValueAsElement(i)
+            for element in pt.elements():
+                name = element.name()
+                if name == DATE:
+                    dates[i] = element.getValue()
+                    continue
+                column = columns.get(name)
+                if column is None:
+                    # points without a value for the field stay NaN
+                    column = columns[name] = np.full(num_points, np.nan)
+                value = element.getValue()
+                if column.dtype != object and not isinstance(value, (float, int)):
+                    column = columns[name] = column.astype(object)
+                column[i] = value
+        # one set of columns per field block of the security
+        self.buffer.setdefault(sec_id, dict())[index] = (dates, columns)
 
     def process_response(self):
-        data_dict = dict()
-        for event in self.response:
-            for message in event:
-                security_data = message.getElement("securityData")
-                sec_id = security_data.getElement("security").getValue()
-
-                if security_data.hasElement("securityError") and not self.ignore_sec_error:
-                    raise Exception(to_security_error(sec_id, security_data.getElement("securityError")))
-
-                if (security_data.getElement("fieldExceptions").numValues() > 0) and not self.ignore_field_error:
-                    field_exceptions = security_data.getElement("fieldExceptions")
-                    raise Exception(as_field_error(sec_id, field_exceptions))
-
-                record_list = list()
-                field_data = security_data.getElement("fieldData")
-                for i in range(field_data.numValues()):
-                    pt = field_data.getValue(i)
-                    record = dict()
-                    for element in pt.elements():
-                        record[str(element.name())] = element.getValue()
-                    record_list.append(record)
-                data_dict[sec_id] = record_list
-            res_list = []
-            for security, records in data_dict.items():
-                if len(records) == 0:
+        if self.store is not None:
+            self.update_store()
+            return self.read_store()
+        sec_order = {s: i for (i, s) in enumerate(self.securities)}
+        res_list = []
+        for security, blocks in sorted(self.buffer.items(), key=lambda x: sec_order.get(x[0], len(sec_order))):
+            for (_, (dates, columns)) in sorted(blocks.items()):
+                if len(dates) == 0:
                     continue
-                res = pd.DataFrame(records).set_index("date")
-                res.columns = pd.MultiIndex.from_tuples(
-                    [(security, x) for x in res.columns]
+                fields = [str(name) for name in columns]
+                res = pd.DataFrame(
+                    dict(zip(fields, columns.values())),
+                    index=pd.DatetimeIndex(dates, name="date")
                 )
+                res.columns = pd.MultiIndex.from_product([[security], fields])
                 res_list.append(res)
+        if len(res_list) == 0:
+            # every security failed
+            return pd.DataFrame()
+        # field blocks and securities are aligned on date in a single concat
         return pd.concat(res_list, axis=1)
 
-    @property
-    def data(self):
-        if self.use_pandas:
-            frame = pd.DataFrame(self.__data)
-            frame.index = pd.to_datetime(frame.index)
-            return frame
-        else:
-            return self.__data
+    def update_store(self):
+        """Merge the windows received into the store."""
+        # failed cells are neither written nor marked as covered, so they are
+        # requested again next time
+        failed = {(e.security, e.field) for e in self.error_list}
+        for (index, (securities, fields, start, end)) in enumerate(self.request_blocks):
+            for sec_id in securities:
+                if index not in self.buffer.get(sec_id, dict()):
+                    # security error
+                    continue
+                dates, columns = self.buffer[sec_id][index]
+                columns = {str(name): column for (name, column) in columns.items()}
+                for f in fields:
+                    if (sec_id, f) in failed:
+                        continue
+                    column = columns.get(f, np.empty(0))
+                    held = ~pd.isna(column)
+                    self.store.write(
+                        self.series_key(sec_id, f),
+                        dates[held] if len(column) > 0 else dates[:0],
+                        column[held],
+                        start,
+                        end
+                    )
+
+    def read_store(self):
+        """Read [start, end] of every series from the store."""
+        res_list = []
+        for sec_id in self.securities:
+            columns = dict()
+            for f in self.fields:
+                dates, values = self.store.read(self.series_key(sec_id, f), self.start, self.end)
+                if len(dates) > 0:
+                    columns[f] = pd.Series(values, index=pd.DatetimeIndex(dates))
+            if len(columns) == 0:
+                continue
+            res = pd.DataFrame(columns)
+            res.index.name = "date"
+            res.columns = pd.MultiIndex.from_product([[sec_id], list(columns)])
+            res_list.append(res)
+        if len(res_list) == 0:
+            return pd.DataFrame()
+        return pd.concat(res_list, axis=1)
 
-    @data.setter
-    def data(self, value):
-        self.__data = value
\ No newline at end of file
+    def to_frame(self, raw):
+        # already a frame with a DatetimeIndex
+        return raw
@@ -1,11 +1,26 @@
-import blpapi
+"""
+Equity screening (BEQS).
+
+EQS runs a screen for one point-in-time date. EQSHistory runs the same screen
+for every date of a range at the same time on the shared session and returns
+a date by security membership panel along with the screen's field values.
+Given a ScreenStore, each (screen, group, date) result is stored, so reruns
+only send the dates not already held.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import date
 import pandas as pd
+from .columns import TypedColumns
 from .reference_data import StaticReferenceData
 
-__all__ = ["EQS", ]
+__all__ = ["EQS", "EQSHistory", "ScreenStore"]
 
 class EQS(StaticReferenceData):
     request_type = "BeqsRequest"
+    streaming = True
 
     def __init__(
             self,
@@ -14,6 +29,7 @@ class EQS(StaticReferenceData):
             group: str,
             date=None,
             lang="ENGLISH",
+            typed=False,
             **kwargs):
         """
 
@@ -29,15 +45,22 @@ class EQS(StaticReferenceData):
             Format is YYYYMMDD
         lang : str
             Valid Language Code
+        typed : bool
+            decode each field into a typed column instead of an object frame
         """
         self.name = name
         self.screen_type = screen_type
         self.group = group
         self.date = date
         self.lang = lang
+        self.typed = typed
         super(EQS, self).__init__(**kwargs)
 
     def generate_request(self):
+        self.buffer = dict()
+        if self.typed:
+            self.rows = dict()
+            self.columns = TypedColumns()
         self.request.set("screenName", self.name)
         self.request.set("screenType", self.screen_type)
         self.request.set("Group", self.group)
@@ -48,36 +71,225 @@ class EQS(StaticReferenceData):
             overrider.setElement("fieldId", "PiTDate")
             overrider.setElement("value", self.date)
 
-    def process_response(self):
-        response_dict = dict()
-
+    def process_message(self, index, message):
         securities = (
-            blpapi.event.MessageIterator(self.response)
-            .next()
+            message
             .getElement("data")
             .getElement("securityData")
         )
         for i in range(securities.numValues()):
             temp_sec = securities.getValueAsElement(i)
             sec_id = temp_sec.getElement("security").getValue()
-            response_dict[sec_id] = dict()
             sec_flds = temp_sec.getElement("fieldData")
+            if self.typed:
+                row = self.rows.setdefault(sec_id, len(self.rows))
+                for field in sec_flds.elements():
+                    self.columns.set(row, str(field.name()), field)
+                continue
+            self.buffer[sec_id] = dict()
             for field in sec_flds.elements():
-                response_dict[sec_id][str(field.name())] = field.getValue()
-        return response_dict
+                self.buffer[sec_id][str(field.name())] = field.getValue()
+
+    def process_response(self):
+        if self.typed:
+            return self.columns.frame(list(self.rows))
+        return self.buffer
+
+    def to_frame(self, raw):
+        if self.typed:
+            return raw
+        frame = pd.DataFrame(raw).T
+        return frame
+
+
+class EQSHistory(object):
+
+    def __init__(
+            self,
+            name: str,
+            screen_type: str,
+            group: str,
+            start,
+            end=None,
+            freq: str = "B",
+            lang="ENGLISH",
+            max_in_flight: int = 8,
+            cache=None,
+            sparse: bool = False,
+            send: bool = True,
+            **kwargs):
+        """
+        Point-in-time Equity Screen History
+
+        Parameters
+        ----------
+        name : str
+            Equity Screen name
+        screen_type : str
+            Screen type
+        group : str
+            Group name
+        start : str
+            YYYYMMDD
+        end : str
+            YYYYMMDD. Defaults to today.
+        freq : str
+            pandas frequency of the screen dates e.g. "B", "W-FRI" or "BME"
+        lang : str
+            Valid Language Code
+        max_in_flight : int
+            maximum number of screens outstanding at once
+        cache : ScreenStore
+            store of the screen results per (screen, group, date)
+        sparse : bool
+            return the membership panel as a sparse boolean frame
+        send : bool
+            run the screens straight away
+        **kwargs :
+            passed to each EQS e.g. host, port or typed
+        """
+        self.name = name
+        self.screen_type = screen_type
+        self.group = group
+        if end is None:
+            end = date.today()
+        self.dates = [d.strftime("%Y%m%d") for d in pd.date_range(start, end, freq=freq)]
+        self.lang = lang
+        self.max_in_flight = max_in_flight
+        self.cache = cache
+        self.sparse = sparse
+        self.kwargs = kwargs
+        if send:
+            self.send_request()
 
     @property
-    def data(self):
-        if self.use_pandas:
-            frame = pd.DataFrame(self.__data).T
-            return frame
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, value):
-        self.__data = value
-
-    @data.deleter
-    def data(self):
-        del self.__data
+    def cache_key(self) -> str:
+        return "|".join([self.name, self.screen_type, self.lang])
+
+    def send_request(self):
+        frames = dict()
+        if self.cache is not None:
+            for d in self.dates:
+                cached = self.cache.get(self.cache_key, self.group, d)
+                if cached is not None:
+                    frames[d] = cached
+        screens = {
+            d: EQS(self.name, self.screen_type, self.group, date=d, lang=self.lang, send=False, **self.kwargs)
+            for d in self.dates if d not in frames
+        }
+        if len(screens) > 0:
+            routes = list(screens.values())
+            routes[0].dispatch(
+                [screen.request for screen in routes],
+                self.max_in_flight,
+                on_message=lambda index, message: routes[index].process_message(0, message)
+            )
+            for (d, screen) in screens.items():
+                screen.data = screen.process_response()
+                frames[d] = screen.data
+                if self.cache is not None:
+                    self.cache.put(self.cache_key, self.group, d, frames[d])
+        self.frames = frames
+        self.data = self.stack()
+        self.membership = self.panel()
+
+    def stack(self) -> pd.DataFrame:
+        """Field values of every date, indexed by date and security."""
+        stacked = list()
+        for d in self.dates:
+            frame = self.frames[d]
+            index = pd.MultiIndex.from_arrays(
+                [pd.DatetimeIndex([pd.Timestamp(d)] * len(frame)), frame.index], names=["date", "security"]
+            )
+            stacked.append(frame.set_axis(index, axis=0))
+        if len(stacked) == 0:
+            # no screen date in the range
+            return pd.DataFrame(
+                index=pd.MultiIndex.from_arrays(
+                    [pd.DatetimeIndex([]), pd.Index([], dtype=object)], names=["date", "security"]
+                )
+            )
+        return pd.concat(stacked)
+
+    def panel(self) -> pd.DataFrame:
+        """Date by security panel, True where the security passed the screen."""
+        members = pd.Series(True, index=self.data.index)
+        members = members[~members.index.duplicated()]
+        panel = members.unstack(fill_value=False).reindex(
+            pd.DatetimeIndex([pd.Timestamp(d) for d in self.dates], name="date"), fill_value=False
+        ).astype(bool)
+        if self.sparse:
+            return panel.astype(pd.SparseDtype(bool, False))
+        return panel
+
+
+class ScreenStore(object):
+
+    def __init__(self, path: str = ":memory:", ttl: float = None):
+        """
+        Store of screen results per (screen, group, date)
+
+        A point-in-time screen for a past date does not change, so it never
+        expires. Today's screen can still change and is kept for `ttl`.
+
+        Parameters
+        ----------
+        path : str
+            SQLite database file. Defaults to an in-memory database.
+        ttl : float
+            time to live in seconds of screens run for today. Never expire
+            if None.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS screens ("
+            "screen TEXT, grp TEXT, as_of TEXT, frame BLOB, stored REAL, "
+            "PRIMARY KEY (screen, grp, as_of))"
+        )
+        self.conn.commit()
+
+    def is_fresh(self, as_of: str, stored: float) -> bool:
+        if as_of < date.today().strftime("%Y%m%d"):
+            return True
+        return self.ttl is None or time.time() - stored < self.ttl
+
+    def get(self, screen: str, group: str, as_of: str):
+        """The stored result of the screen for the date, None if missing or expired."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT frame, stored FROM screens WHERE screen = ? AND grp = ? AND as_of = ?",
+                (screen, group, as_of)
+            ).fetchone()
+            if row is None or not self.is_fresh(as_of, row[1]):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, screen: str, group: str, as_of: str, frame) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO screens VALUES (?, ?, ?, ?, ?)",
+                (screen, group, as_of, pickle.dumps(frame), time.time())
+            )
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        """Hit and miss counters, in screens."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM screens")
+            self.conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
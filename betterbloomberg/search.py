@@ -57,7 +57,7 @@ class GovernmentSearch(Instrument):
         RESULTS_DATA = blpapi.Name("results")
 
         govtData = (
-            blpapi.event.MessageIterator(self.response).next().getElement(RESULTS_DATA)
+            self.response[-1].getElement(RESULTS_DATA)
         )
 
         sec_dict = dict()
@@ -69,22 +69,10 @@ class GovernmentSearch(Instrument):
                 sec_dict[p_key][j] = tmp_sec.getElementAsString(j)
         return sec_dict  # might need to be orient = "index"
 
-    @property
-    def data(self):
-        if self.use_pandas:
-            frame = pd.DataFrame.from_dict(self.__data, orient="index")
-            frame.index.rename("sec_id", inplace=True)
-            return frame
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, value):
-        self.__data = value
-
-    @data.deleter
-    def data(self):
-        del self.__data
+    def to_frame(self, raw):
+        frame = pd.DataFrame.from_dict(raw, orient="index")
+        frame.index.rename("sec_id", inplace=True)
+        return frame
 
 
 class SecuritySearch(Instrument):
@@ -158,7 +146,7 @@ class SecuritySearch(Instrument):
     def process_response(self):
         RESULTS_DATA = blpapi.Name("results")
         securityData = (
-            blpapi.event.MessageIterator(self.response).next().getElement(RESULTS_DATA)
+            self.response[-1].getElement(RESULTS_DATA)
         )
         sec_dict = dict()
         for i in range(securityData.numValues()):
@@ -167,25 +155,11 @@ class SecuritySearch(Instrument):
             sec_dict[security] = tmp_sec.getElementAsString("description")
         return sec_dict
 
-    @property
-    def data(self):
-        if self.use_pandas:
-            frame = pd.DataFrame.from_dict(
-                self.__data, orient="index", columns=["desc"]
-            )
-            # parse the security identifier
-            frame.index = frame.index.str.replace("[<>]", " ").str.strip().str.upper()
-            return frame
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, value):
-        self.__data = value
-
-    @data.deleter
-    def data(self):
-        del self.__data
+    def to_frame(self, raw):
+        frame = pd.DataFrame.from_dict(raw, orient="index", columns=["desc"])
+        # parse the security identifier
+        frame.index = frame.index.str.replace("[<>]", " ").str.strip().str.upper()
+        return frame
 
 
 class CurveSearch(Instrument):
@@ -256,7 +230,7 @@ class CurveSearch(Instrument):
         RESULTS_DATA = blpapi.Name("results")
 
         securityData = (
-            blpapi.event.MessageIterator(self.response).next().getElement(RESULTS_DATA)
+            self.response[-1].getElement(RESULTS_DATA)
         )
         sec_dict = dict()
         for i in range(securityData.numValues()):
@@ -279,17 +253,5 @@ class CurveSearch(Instrument):
                 sec_dict[curve_id][k] = data_list
         return sec_dict
 
-    @property
-    def data(self):
-        if self.use_pandas:
-            return pd.DataFrame.from_dict(self.__data, orient="index")
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, value):
-        self.__data = value
-
-    @data.deleter
-    def data(self):
-        del self.__data
+    def to_frame(self, raw):
+        return pd.DataFrame.from_dict(raw, orient="index")
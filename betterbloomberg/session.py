@@ -0,0 +1,215 @@
+"""
+Process-wide pool of Bloomberg sessions.
+
+Starting a ``blpapi.Session`` and opening a service is a round-trip to the
+terminal that often takes longer than the request itself. The pool keeps one
+started session per host, port and session options, opens each service on it
+the first time it is asked for, and restarts the session if Bloomberg
+terminates it. All pooled sessions are stopped when the interpreter exits.
+
+Requests sent with an EventQueue get their responses on that queue. Requests
+sent without one are answered through the session event handler, which passes
+each response message to the callback registered for its CorrelationId.
+Subscription data and status messages are routed the same way, for as long as
+the callback stays registered.
+"""
+import atexit
+import threading
+import blpapi
+
+__all__ = ["SessionPool", ]
+
+SESSION_TERMINATED = blpapi.Name("SessionTerminated")
+SESSION_STARTUP_FAILURE = blpapi.Name("SessionStartupFailure")
+
+
+class PooledSession(object):
+
+    def __init__(self, host: str, port: int, options: dict = None):
+        """
+        A started session shared by every request to the same terminal.
+
+        Parameters
+        ----------
+        host : str
+            server host
+        port : int
+            server port
+        options : dict
+            extra ``blpapi.SessionOptions`` settings keyed by setter name
+            without the ``set`` prefix e.g. {"MaxPendingRequests": 2048}
+        """
+        self.host = host
+        self.port = port
+        self.options = options if options is not None else dict()
+        self.lock = threading.RLock()
+        self.session = None
+        self.services = set()
+        self.alive = False
+        self.callbacks = dict()
+        # called after the session has been restarted
+        self.restart_hooks = list()
+
+    def session_options(self):
+        session_options = blpapi.SessionOptions()
+        session_options.setServerHost(self.host)
+        session_options.setServerPort(self.port)
+        for (k, v) in self.options.items():
+            getattr(session_options, "set" + k)(v)
+        return session_options
+
+    def create_session(self):
+        """Create a new unstarted session feeding `process_event`."""
+        return blpapi.Session(self.session_options(), self.process_event)
+
+    def event_queue(self):
+        """Create an EventQueue to send requests to."""
+        return blpapi.event.EventQueue()
+
+    def register(self, correlation_id, callback):
+        """
+        Call ``callback(event_type, messages)`` with the messages of each
+        response event for the request sent with `correlation_id`, until its
+        final response. Subscription callbacks are called until unregistered.
+        If the session is terminated every callback is called once with the
+        SESSION_STATUS event type and the SessionTerminated message, then
+        dropped.
+        """
+        self.callbacks[correlation_id.value()] = callback
+
+    def unregister(self, correlation_id):
+        self.callbacks.pop(correlation_id.value(), None)
+
+    def add_restart_hook(self, hook) -> None:
+        """
+        Call ``hook()`` each time the session is restarted after it was
+        terminated, once its services have been reopened.
+        """
+        if hook not in self.restart_hooks:
+            self.restart_hooks.append(hook)
+
+    def remove_restart_hook(self, hook) -> None:
+        if hook in self.restart_hooks:
+            self.restart_hooks.remove(hook)
+
+    def process_event(self, event, session):
+        """
+        Session event handler. Tracks the health of the session and routes
+        responses to the registered callbacks.
+        """
+        event_type = event.eventType()
+        if event_type in (blpapi.Event.SUBSCRIPTION_DATA, blpapi.Event.SUBSCRIPTION_STATUS):
+            for message in event:
+                for cid in message.correlationIds():
+                    callback = self.callbacks.get(cid.value())
+                    if callback is not None:
+                        callback(event_type, [message, ])
+            return
+        if event_type in (
+                blpapi.Event.PARTIAL_RESPONSE,
+                blpapi.Event.RESPONSE,
+                blpapi.Event.REQUEST_STATUS):
+            routed = dict()
+            for message in event:
+                cid = message.correlationIds()[0].value()
+                if cid in self.callbacks:
+                    routed.setdefault(cid, list()).append(message)
+            for (cid, messages) in routed.items():
+                self.callbacks[cid](event_type, messages)
+                if event_type != blpapi.Event.PARTIAL_RESPONSE:
+                    self.callbacks.pop(cid, None)
+        # events from a session that has since been replaced are ignored
+        if event_type != blpapi.Event.SESSION_STATUS or session is not self.session:
+            return
+        for message in event:
+            if message.messageType() in (SESSION_TERMINATED, SESSION_STARTUP_FAILURE):
+                self.alive = False
+                # nothing registered on the dead session will be answered
+                callbacks, self.callbacks = self.callbacks, dict()
+                for callback in callbacks.values():
+                    callback(event_type, [message, ])
+
+    def start(self):
+        """Start the session, restarting it if it has been terminated."""
+        with self.lock:
+            if self.session is not None and self.alive:
+                return self.session
+            restarting = self.session is not None
+            self.stop()
+            self.session = self.create_session()
+            if not self.session.start():
+                self.session = None
+                raise ConnectionError(
+                    "Failed to start session on {0}:{1}".format(self.host, self.port)
+                )
+            self.alive = True
+            # reopen whatever the previous session had open
+            services = self.services
+            self.services = set()
+            for service_type in services:
+                self.service(service_type)
+            if restarting:
+                for hook in list(self.restart_hooks):
+                    hook()
+            return self.session
+
+    def service(self, service_type: str):
+        """Open the service the first time it is requested."""
+        with self.lock:
+            self.start()
+            if service_type not in self.services:
+                if not self.session.openService(service_type):
+                    raise ConnectionError("Failed to open {0} service".format(service_type))
+                self.services.add(service_type)
+            return self.session.getService(service_type)
+
+    def is_alive(self) -> bool:
+        return self.session is not None and self.alive
+
+    def stop(self):
+        with self.lock:
+            session, self.session = self.session, None
+            self.alive = False
+            if session is not None:
+                try:
+                    session.stop()
+                except Exception:
+                    pass
+
+
+class SessionPool(object):
+
+    def __init__(self):
+        """
+        Pool of started sessions keyed by host, port and session options.
+        """
+        self.lock = threading.Lock()
+        self.sessions = dict()
+
+    @staticmethod
+    def key(host: str, port: int, options: dict = None):
+        if options is None:
+            options = dict()
+        return host, port, tuple(sorted(options.items()))
+
+    def get(self, host: str = "localhost", port: int = 8194, options: dict = None) -> PooledSession:
+        """Return the pooled session for the host, port and options."""
+        key = SessionPool.key(host, port, options)
+        with self.lock:
+            if key not in self.sessions:
+                self.sessions[key] = self.create(host, port, options)
+            return self.sessions[key]
+
+    def create(self, host: str, port: int, options: dict = None) -> PooledSession:
+        return PooledSession(host, port, options)
+
+    def close(self):
+        """Stop every pooled session."""
+        with self.lock:
+            for pooled in self.sessions.values():
+                pooled.stop()
+            self.sessions.clear()
+
+
+pool = SessionPool()
+atexit.register(pool.close)
@@ -0,0 +1,139 @@
+"""
+Incremental local store for historical data.
+
+Every series, keyed by security, field, periodicity, adjustment and
+overrides, is kept as a pair of ``.npy`` arrays (dates and values) that are
+memory-mapped on read. A SQLite index records the date range each series has
+already been requested for, so a HistoricalDataRequest given a store only asks
+Bloomberg for the head and tail windows it does not hold yet. Today is never
+marked as covered, so the latest point is refreshed on every request.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from .cache import ReferenceCache
+
+__all__ = ["HistoryStore", ]
+
+SeriesKey = namedtuple("SeriesKey", ["security", "field", "periodicity", "adjustment", "overrides"])
+
+
+def shift_date(day: str, days: int) -> str:
+    """Shift a YYYYMMDD date by a number of days."""
+    return (datetime.strptime(day, "%Y%m%d") + timedelta(days=days)).strftime("%Y%m%d")
+
+
+class HistoryStore(object):
+
+    def __init__(self, path: str):
+        """
+        Historical Data Store
+
+        Parameters
+        ----------
+        path : str
+            directory holding the arrays and the index
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        # reentrant, write holds it while reading the coverage
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(os.path.join(path, "index.db"), check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS series ("
+            "id TEXT PRIMARY KEY, security TEXT, field TEXT, periodicity TEXT, adjustment TEXT, "
+            "overrides TEXT, start TEXT, end TEXT)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def key(security, field, periodicity="DAILY", adjustment="ACTUAL", overrides=None) -> SeriesKey:
+        return SeriesKey(security, field, periodicity, adjustment, ReferenceCache.canonical(overrides))
+
+    @staticmethod
+    def series_id(key: SeriesKey) -> str:
+        return hashlib.sha1("|".join(key).encode("utf-8")).hexdigest()
+
+    def files(self, key: SeriesKey):
+        sid = HistoryStore.series_id(key)
+        directory = os.path.join(self.path, sid[:2])
+        return os.path.join(directory, sid + ".dates.npy"), os.path.join(directory, sid + ".values.npy")
+
+    def coverage(self, key: SeriesKey):
+        """(start, end) YYYYMMDD range the series has been requested for, or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT start, end FROM series WHERE id = ?", (HistoryStore.series_id(key), )
+            ).fetchone()
+        return row
+
+    def missing(self, key: SeriesKey, start: str, end: str) -> list:
+        """Windows of [start, end] that have to be requested, as (start, end) pairs."""
+        coverage = self.coverage(key)
+        if coverage is None:
+            return [(start, end)]
+        cov_start, cov_end = coverage
+        windows = list()
+        # extending the covered range keeps it contiguous
+        if start < cov_start:
+            windows.append((start, shift_date(cov_start, -1)))
+        if end > cov_end:
+            windows.append((shift_date(cov_end, 1), end))
+        return windows
+
+    def read(self, key: SeriesKey, start: str = None, end: str = None):
+        """Dates and values of the series between start and end, both inclusive."""
+        dates_file, values_file = self.files(key)
+        if not os.path.exists(dates_file):
+            return np.empty(0, dtype="datetime64[ns]"), np.empty(0)
+        dates = np.load(dates_file, mmap_mode="r")
+        try:
+            values = np.load(values_file, mmap_mode="r")
+        except ValueError:
+            # object arrays can't be memory-mapped
+            values = np.load(values_file, allow_pickle=True)
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), "left")
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), "right")
+        return dates[lo:hi], values[lo:hi]
+
+    def write(self, key: SeriesKey, dates, values, start: str, end: str) -> None:
+        """
+        Merge newly requested points for [start, end] into the series and
+        extend its coverage. Points already held for the same dates are
+        replaced.
+        """
+        # the read-modify-write of the files and the coverage is one step, so
+        # concurrent writes to the same series don't lose each other's points
+        with self.lock:
+            new = pd.Series(values, index=pd.DatetimeIndex(dates))
+            old_dates, old_values = self.read(key)
+            if len(old_dates) > 0:
+                new = new.combine_first(pd.Series(np.asarray(old_values), index=pd.DatetimeIndex(old_dates)))
+            dates_file, values_file = self.files(key)
+            os.makedirs(os.path.dirname(dates_file), exist_ok=True)
+            for (path, array) in ((dates_file, new.index.values), (values_file, new.values)):
+                with open(path + ".tmp", "wb") as fh:
+                    np.save(fh, array, allow_pickle=array.dtype == object)
+                os.replace(path + ".tmp", path)
+
+            # today's point can still change, so it is never marked as covered
+            end = min(end, shift_date(date.today().strftime("%Y%m%d"), -1))
+            coverage = self.coverage(key)
+            if coverage is not None:
+                start, end = min(start, coverage[0]), max(end, coverage[1])
+            if start > end:
+                return
+            self.conn.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (HistoryStore.series_id(key), ) + tuple(key) + (start, end)
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -1,4 +1,4 @@
-import blpapi
+from .columns import TypedColumns
 from .core import BlpDataRequest
 import pandas as pd
 
@@ -16,6 +16,7 @@ class Study(BlpDataRequest):
             end,
             data_range="historical",
             interval=15,
+            typed=False,
             **kwargs):
         """
         Technical Analysis Study
@@ -38,6 +39,13 @@ class Study(BlpDataRequest):
             Valid date range. Just always use historical. Also allows
         interval : int
             seemingly doesn't matter for historical
+        typed : bool
+            decode each study value into a typed column instead of an object
+            frame
+        **kwargs :
+            study attributes e.g. priceSourceClose="PX_LAST". The request
+            arguments host, port, session_options, send, keep_raw, timeout,
+            retries and backoff are passed on to BlpDataRequest.
         """
         self.security = security
         self.study = study
@@ -45,8 +53,14 @@ class Study(BlpDataRequest):
         self.end = end
         self.data_range = data_range
         self.interval = interval
+        self.typed = typed
+        request_kwargs = {
+            k: kwargs.pop(k)
+            for k in ("host", "port", "session_options", "send", "keep_raw", "timeout", "retries", "backoff")
+            if k in kwargs
+        }
         self.kwargs = kwargs
-        super(Study, self).__init__()
+        super(Study, self).__init__(**request_kwargs)
 
     def generate_request(self):
         # set security name
@@ -89,6 +103,16 @@ class Study(BlpDataRequest):
             study_attributes.getElement(k).setValue(v)
 
     def process_response(self):
+        if self.typed:
+            columns = TypedColumns()
+            row = 0
+            for msg in self.response:
+                study_data = msg.getElement("studyData")
+                for record in range(study_data.numValues()):
+                    for elem in study_data.getValue(record).elements():
+                        columns.set(row, str(elem.name()), elem)
+                    row += 1
+            return columns.frame(pd.RangeIndex(row))
         record_list = []
         for msg in self.response:
             study_data = msg.getElement("studyData")
@@ -100,19 +124,9 @@ class Study(BlpDataRequest):
                 record_list.append(record_dict)
         return record_list
 
-    @property
-    def data(self):
-        if self.use_pandas:
-            frame = pd.DataFrame(self.__data)
-            frame.set_index("date")
-            return frame
-        else:
-            return self.__data
-
-    @data.setter
-    def data(self, value):
-        self.__data = value
-
-    @data.deleter
-    def data(self):
-        del self.__data
+    def to_frame(self, raw):
+        if self.typed:
+            return raw
+        frame = pd.DataFrame(raw)
+        frame.set_index("date")
+        return frame
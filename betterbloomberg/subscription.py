@@ -0,0 +1,182 @@
+"""
+Real-time subscriptions to ``//blp/mktdata``.
+
+A Subscription subscribes to every security on the pooled session for its
+host and port, so it shares the session with the request classes. Ticks are
+written in place into a preallocated security by field numpy array on the
+session's event handler thread, which keeps up with thousands of securities.
+`snapshot` wraps the array in a frame without copying it and without taking
+a lock, so reads never hold up the updates.
+
+If the session is terminated the last values are stale, so `snapshot` and
+`last` raise until the session is restarted, by any request on it or by
+calling `start` again, which subscribes to every security again.
+"""
+import time
+import blpapi
+import numpy as np
+import pandas as pd
+from .columns import DATATYPE_KINDS, FLOAT, INT
+from .core import correlation_ids
+from .session import pool
+
+__all__ = ["Subscription", ]
+
+SUBSCRIPTION_FAILURE = blpapi.Name("SubscriptionFailure")
+SUBSCRIPTION_TERMINATED = blpapi.Name("SubscriptionTerminated")
+
+
+class Subscription(object):
+    service_type = "//blp/mktdata"
+    session_pool = pool
+
+    def __init__(
+            self,
+            securities,
+            fields,
+            interval: float = None,
+            host="localhost",
+            port=8194,
+            session_options=None,
+            start: bool = True):
+        """
+        Market Data Subscription
+
+        Parameters
+        ----------
+        securities : str or list
+            security identifiers
+        fields : str or list
+            real-time fields e.g. LAST_PRICE, BID, ASK
+        interval : float
+            conflation interval in seconds. Updates are sent by the server at
+            most once per interval if given, otherwise tick by tick.
+        host : str
+            server host
+        port : int
+            server port
+        session_options : dict
+            extra ``blpapi.SessionOptions`` settings keyed by setter name
+        start : bool
+            subscribe straight away
+        """
+        self.securities = securities if type(securities) == list else [securities, ]
+        self.fields = fields if type(fields) == list else [fields, ]
+        self.field_names = [blpapi.Name(f) for f in self.fields]
+        self.interval = interval
+        self.pooled_session = self.session_pool.get(host, port, session_options)
+        # last value of each security and field, updated in place
+        self.values = np.full((len(self.securities), len(self.fields)), np.nan)
+        # last value of the fields that aren't numbers
+        self.other = np.full((len(self.securities), len(self.fields)), None, dtype=object)
+        self.updated = np.full(len(self.securities), np.datetime64("NaT"), dtype="datetime64[ns]")
+        self.num_updates = 0
+        self.failures = dict()
+        self.rows = dict()
+        self.subscriptions = None
+        # session the subscriptions were made on
+        self.session = None
+        self.lost = False
+        if start:
+            self.start()
+
+    def start(self) -> None:
+        """Subscribe to every security, again if the session was lost."""
+        self.pooled_session.add_restart_hook(self.resubscribe)
+        # restarting a lost session resubscribes through the hook
+        self.pooled_session.service(self.service_type)
+        if self.subscriptions is None or self.session is not self.pooled_session.session:
+            self.subscribe()
+
+    def resubscribe(self) -> None:
+        """Subscribe again on the restarted session. Restart hook of the pooled session."""
+        if self.subscriptions is not None:
+            self.subscribe()
+
+    def subscribe(self) -> None:
+        for cid in self.rows:
+            self.pooled_session.unregister(blpapi.CorrelationId(cid))
+        options = list()
+        if self.interval is not None:
+            options.append("interval={0}".format(self.interval))
+        self.subscriptions = blpapi.SubscriptionList()
+        self.rows = dict()
+        for (row, sec_id) in enumerate(self.securities):
+            cid = blpapi.CorrelationId(next(correlation_ids))
+            self.rows[cid.value()] = row
+            self.pooled_session.register(cid, self.process_event)
+            self.subscriptions.add(sec_id, self.fields, options, cid)
+        self.session = self.pooled_session.session
+        self.session.subscribe(self.subscriptions)
+        self.lost = False
+
+    def stop(self) -> None:
+        """Unsubscribe from every security."""
+        self.pooled_session.remove_restart_hook(self.resubscribe)
+        if self.subscriptions is None:
+            return
+        try:
+            if not self.lost:
+                self.session.unsubscribe(self.subscriptions)
+        finally:
+            for cid in self.rows:
+                self.pooled_session.unregister(blpapi.CorrelationId(cid))
+            self.subscriptions = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def process_event(self, event_type, messages) -> None:
+        """Write the fields of each update into the last value cache."""
+        if event_type == blpapi.Event.SESSION_STATUS:
+            # the session was terminated, nothing arrives until it restarts
+            self.lost = True
+            return
+        for message in messages:
+            for cid in message.correlationIds():
+                row = self.rows.get(cid.value())
+                if row is None:
+                    continue
+                if event_type == blpapi.Event.SUBSCRIPTION_STATUS:
+                    if message.messageType() in (SUBSCRIPTION_FAILURE, SUBSCRIPTION_TERMINATED):
+                        self.failures[self.securities[row]] = str(message)
+                    continue
+                for (col, name) in enumerate(self.field_names):
+                    if not message.hasElement(name, True):
+                        continue
+                    element = message.getElement(name)
+                    if DATATYPE_KINDS.get(element.datatype()) in (FLOAT, INT):
+                        self.values[row, col] = element.getValueAsFloat()
+                    else:
+                        self.other[row, col] = element.getValue()
+                self.updated[row] = np.datetime64(time.time_ns(), "ns")
+                self.num_updates += 1
+
+    def snapshot(self, copy: bool = False) -> pd.DataFrame:
+        """
+        Last values of the numeric fields as a security by field frame.
+
+        Parameters
+        ----------
+        copy : bool
+            copy the values. By default the frame is a view of the live
+            array, so it keeps changing as updates arrive.
+        """
+        self.check()
+        return pd.DataFrame(self.values, index=self.securities, columns=self.fields, copy=copy)
+
+    def last(self, security: str, field: str):
+        """Last value of one field of one security, numeric or not."""
+        self.check()
+        row, col = self.securities.index(security), self.fields.index(field)
+        value = self.other[row, col]
+        return self.values[row, col] if value is None else value
+
+    def check(self) -> None:
+        if self.lost:
+            raise ConnectionError(
+                "Session lost, the last values are stale until it is restarted e.g. by calling start"
+            )
@@ -0,0 +1,107 @@
+"""
+Reference data swept across many override sets.
+
+An OverrideSweep builds one ReferenceDataRequest per override set and sends
+the blocks of every variant at the same time on the shared session, so the
+variants are chunked, cached and error-checked exactly like single requests.
+The results are stacked into one frame with the overrides as index levels.
+"""
+import itertools
+import pandas as pd
+from .reference_data import ReferenceDataRequest
+
+__all__ = ["OverrideSweep", ]
+
+
+class OverrideSweep(object):
+
+    def __init__(self, securities, fields, sweep, overrides=None, max_in_flight=None, send=True, **kwargs):
+        """
+        Override Sweep
+
+        Parameters
+        ----------
+        securities : array-like, str
+            security identifiers
+        fields : array-like, str
+            reference fields
+        sweep : list or dict
+            list of override dicts, one per variant, or a grid of values per
+            override field e.g. {"BEST_FPERIOD_OVERRIDE": ["1FY", "2FY"]}
+            which is expanded to every combination
+        overrides : dict
+            overrides applied to every variant
+        max_in_flight : int
+            maximum number of blocks outstanding at once across all variants.
+            Defaults to as many as the session's MaxPendingRequests allows.
+        send : bool
+            send the requests straight away
+        **kwargs :
+            passed to each ReferenceDataRequest e.g. chunk, cache or partial
+        """
+        if isinstance(sweep, dict):
+            self.variants = [dict(zip(sweep, values)) for values in itertools.product(*sweep.values())]
+        else:
+            self.variants = list(sweep)
+        self.names = list()
+        for variant in self.variants:
+            self.names.extend(k for k in variant if k not in self.names)
+        self.max_in_flight = max_in_flight
+        base = overrides if overrides is not None else dict()
+        self.requests = list()
+        for variant in self.variants:
+            variant_overrides = dict(base)
+            variant_overrides.update(variant)
+            self.requests.append(
+                ReferenceDataRequest(securities, fields, variant_overrides, send=False, **kwargs)
+            )
+        if send:
+            self.send_request()
+
+    def keys(self):
+        return [tuple(variant.get(name) for name in self.names) for variant in self.variants]
+
+    def send_request(self):
+        # (variant request, index of the block in it) for every block
+        routes = [(req, i) for req in self.requests for i in range(len(req.requests))]
+        if len(routes) > 0:
+            first = self.requests[0]
+            max_in_flight = self.max_in_flight
+            if max_in_flight is None:
+                max_in_flight = first.in_flight_limit(
+                    [block for req in self.requests for block in req.request_blocks]
+                )
+            first.dispatch(
+                [req.requests[i] for (req, i) in routes],
+                max_in_flight,
+                on_message=lambda index, message: routes[index][0].process_message(routes[index][1], message),
+                on_retry=lambda index: routes[index][0].discard(routes[index][1])
+            )
+        for req in self.requests:
+            req.data = req.process_response()
+        self.data = self.stack([req.data for req in self.requests])
+
+    def stack(self, frames, inner=None):
+        """Stack the frames of the variants with the overrides as outer index levels."""
+        if inner is None:
+            inner = "security" if self.requests[0].typed else "field"
+        stacked = list()
+        for (key, frame) in zip(self.keys(), frames):
+            # overrides a variant does not set are missing in its rows
+            index = pd.MultiIndex.from_arrays(
+                [[k] * len(frame) for k in key] + [frame.index], names=self.names + [inner]
+            )
+            stacked.append(frame.set_axis(index, axis=0))
+        return pd.concat(stacked)
+
+    @property
+    def errors(self):
+        """Security and field errors of every variant, one row per failed cell"""
+        return self.stack([req.errors for req in self.requests], "error")
+
+    def retry(self):
+        """Request the failed cells of each variant again and restack the data."""
+        for req in self.requests:
+            req.retry()
+        self.data = self.stack([req.data for req in self.requests])
+        return self.errors
@@ -0,0 +1,39 @@
+import unittest
+import betterbloomberg as bb
+
+
+class TestReferenceCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cache = bb.ReferenceCache()
+        self.tickers = ["AAPL US Equity", "MSFT US Equity"]
+        self.fields = ["PX_LAST", "CRNCY"]
+
+    def test_hit(self):
+        first = bb.ReferenceDataRequest(self.tickers, self.fields, cache=self.cache).data
+        second = bb.ReferenceDataRequest(self.tickers, self.fields, cache=self.cache)
+        self.assertEqual(len(second.requests), 0)
+        self.assertTrue(first.equals(second.data))
+        self.assertEqual(self.cache.stats(), {"hits": 4, "misses": 4})
+
+    def test_partial_overlap(self):
+        bb.ReferenceDataRequest(self.tickers, self.fields, cache=self.cache)
+        req = bb.ReferenceDataRequest(self.tickers + ["IBM US Equity", ], self.fields, cache=self.cache)
+        self.assertEqual(req.request_blocks, [(["IBM US Equity", ], self.fields)])
+        self.assertEqual(list(req.data.columns), self.tickers + ["IBM US Equity", ])
+
+    def test_overrides_key(self):
+        self.assertEqual(
+            bb.ReferenceCache.canonical({"B": 1, "A": "x"}),
+            bb.ReferenceCache.canonical({"A": "x", "B": "1"})
+        )
+
+    def test_typed_round_trip(self):
+        fields = self.fields + ["LAST_UPDATE_DT", ]
+        with bb.use_fake(bb.FakeBackend()):
+            first = bb.ReferenceDataRequest(self.tickers, fields, cache=self.cache, typed=True).data
+            second = bb.ReferenceDataRequest(self.tickers, fields, cache=self.cache, typed=True)
+        self.assertEqual(len(second.requests), 0)
+        self.assertEqual(second.data["LAST_UPDATE_DT"].dtype, "datetime64[ns]")
+        self.assertEqual(second.data["PX_LAST"].dtype, "float64")
+        self.assertTrue(first.equals(second.data))
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+import betterbloomberg as bb
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tickers = ["AAPL US Equity", "MSFT US Equity"]
+        self.fields = ["PX_LAST", "CRNCY"]
+        self.path = os.path.join(tempfile.mkdtemp(), "test.cassette")
+
+    def test_replay(self):
+        cassette = bb.Cassette(self.path)
+        with cassette.record():
+            live = bb.ReferenceDataRequest(self.tickers, self.fields).data
+            live_hist = bb.HistoricalDataRequest(self.tickers, "PX_LAST", "20200101", "20200131").data
+        self.assertEqual(len(cassette), 2)
+        with bb.Cassette.load(self.path).replay():
+            self.assertTrue(bb.ReferenceDataRequest(self.tickers, self.fields).data.equals(live))
+            replayed = bb.HistoricalDataRequest(self.tickers, "PX_LAST", "20200101", "20200131").data
+            self.assertTrue(replayed.equals(live_hist))
+
+    def test_not_recorded(self):
+        cassette = bb.Cassette()
+        with cassette.replay():
+            with self.assertRaises(Exception):
+                bb.ReferenceDataRequest(self.tickers, self.fields)
+
+
+class TestCassetteFake(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tickers = ["AAPL US Equity", "MSFT US Equity"]
+        self.fields = ["PX_LAST", "CRNCY"]
+        self.path = os.path.join(tempfile.mkdtemp(), "test.cassette")
+        self.backend = bb.FakeBackend(partial_size=1)
+
+    def record(self):
+        """Cassette of the requests sent to the fake backend and its responses."""
+        cassette = bb.Cassette(self.path)
+        for (request_type, request) in self.backend.requests:
+            cassette.interactions.append({
+                "request_type": request_type,
+                "request": request,
+                "events": list(self.backend.generate(request_type, request)),
+            })
+        return cassette
+
+    def test_replay(self):
+        with bb.use_fake(self.backend):
+            served = bb.ReferenceDataRequest(self.tickers, self.fields).data
+            served_hist = bb.HistoricalDataRequest(self.tickers, "PX_LAST", "20200101", "20200131").data
+        self.record().save()
+        cassette = bb.Cassette.load(self.path)
+        self.assertEqual(len(cassette), 2)
+        with cassette.replay():
+            self.assertTrue(bb.ReferenceDataRequest(self.tickers, self.fields).data.equals(served))
+            replayed = bb.HistoricalDataRequest(self.tickers, "PX_LAST", "20200101", "20200131").data
+            self.assertTrue(replayed.equals(served_hist))
+
+    def test_repeated(self):
+        with bb.use_fake(self.backend):
+            bb.ReferenceDataRequest(self.tickers[0], "PX_LAST")
+            bb.ReferenceDataRequest(self.tickers[0], "PX_LAST")
+        cassette = self.record()
+        # the second recording of the same request saw another price
+        message = cassette.interactions[1]["events"][-1][1][0][1]
+        message["securityData"][0]["fieldData"]["PX_LAST"] = 1.5
+        cassette.save()
+        with bb.Cassette.load(self.path).replay():
+            prices = [bb.ReferenceDataRequest(self.tickers[0], "PX_LAST").data.iloc[0, 0] for _ in range(3)]
+        # replayed in recorded order, then the last recording again
+        first = cassette.interactions[0]["events"][-1][1][0][1]["securityData"][0]["fieldData"]["PX_LAST"]
+        self.assertEqual(prices, [first, 1.5, 1.5])
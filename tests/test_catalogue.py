@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+import betterbloomberg as bb
+from betterbloomberg.columns import CATALOGUE_KINDS
+
+
+class TestFieldCatalogue(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.path = os.path.join(tempfile.mkdtemp(), "fields.json")
+        self.catalogue = bb.FieldCatalogue(self.path, batch_size=2)
+
+    def test_load(self):
+        self.catalogue.load(["PX_LAST", "PX_OPEN", "CRNCY"])
+        self.assertEqual(self.catalogue.datatype("PX_LAST"), "Double")
+        reloaded = bb.FieldCatalogue(self.path)
+        self.assertEqual(len(reloaded), 3)
+        self.assertIn("px_last", reloaded)
+
+    def test_validate(self):
+        with self.assertRaises(Exception) as ex:
+            bb.ReferenceDataRequest(
+                "AAPL US Equity",
+                ["PX_LAST", "bad field"],
+                catalogue=self.catalogue
+            )
+        self.assertEqual(ex.exception.args[0][0][-1], "INVALID_FIELD")
+
+    def test_partial(self):
+        tickers = ["AAPL US Equity", "MSFT US Equity"]
+        with bb.use_fake(bb.FakeBackend(bad_fields={"bad field"})):
+            req = bb.ReferenceDataRequest(
+                tickers,
+                ["PX_LAST", "bad field"],
+                catalogue=self.catalogue,
+                partial=True
+            )
+            self.assertEqual(list(req.errors["security"]), tickers)
+            self.assertEqual(set(req.errors["subcategory"]), {"INVALID_FIELD"})
+            # rejected by the catalogue, so not requested again
+            self.assertEqual(len(req.retry()), 2)
+            self.assertEqual(len(req.requests), 1)
+
+
+class TestCatalogueKinds(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = bb.use_fake(bb.FakeBackend())
+        self.fake.__enter__()
+        self.catalogue = bb.FieldCatalogue()
+
+    def tearDown(self) -> None:
+        self.fake.__exit__(None, None, None)
+
+    def typed(self, field, datatype):
+        self.catalogue.add(field, {"mnemonic": field, "datatype": datatype})
+        return bb.ReferenceDataRequest(
+            ["AAPL US Equity", "MSFT US Equity"], field, catalogue=self.catalogue, typed=True
+        ).data[field]
+
+    def test_float(self):
+        # integer values are decoded as floats when the catalogue says so
+        for datatype in ["Float32", "Float64", "Double", "Decimal"]:
+            with self.subTest(datatype=datatype):
+                self.assertEqual(self.typed("VOLUME", datatype).dtype, "float64")
+
+    def test_int(self):
+        for datatype in ["Int32", "Int64"]:
+            with self.subTest(datatype=datatype):
+                self.assertEqual(self.typed("PX_LAST", datatype).dtype, "int64")
+
+    def test_datetime(self):
+        for datatype in ["Date", "Datetime"]:
+            with self.subTest(datatype=datatype):
+                self.assertEqual(self.typed("LAST_UPDATE_DT", datatype).dtype, "datetime64[ns]")
+
+    def test_bool(self):
+        self.assertEqual(self.typed("VOLUME", "Bool").dtype, "bool")
+
+    def test_string(self):
+        for datatype in ["String", "Char", "Enumeration"]:
+            with self.subTest(datatype=datatype):
+                self.assertEqual(list(self.typed("VOLUME", datatype).map(type)), [str, str])
+
+    def test_ftype_labels(self):
+        # ftype labels are not datatypes, the element datatype is used instead
+        for ftype in ["Price", "Real", "Integer", "Character", "Boolean"]:
+            self.assertNotIn(ftype, CATALOGUE_KINDS)
+        self.assertEqual(self.typed("VOLUME", "Price").dtype, "int64")
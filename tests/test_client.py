@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+import betterbloomberg as bb
+
+
+class TestAsyncClient(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.client = bb.AsyncClient()
+        self.tickers = ["AAPL US Equity", "MSFT US Equity"]
+
+    def test_reference(self):
+        data = asyncio.run(self.client.reference(self.tickers, "PX_LAST"))
+        self.assertEqual(list(data.columns), self.tickers)
+
+    def test_gather(self):
+        async def run():
+            return await asyncio.gather(
+                self.client.reference(self.tickers, "PX_LAST"),
+                self.client.history(self.tickers, "PX_LAST", "20200101", "20200201"),
+                self.client.get("FieldInfo", field_id=["PX_LAST", ]),
+            )
+        reference, history, field_info = asyncio.run(run())
+        self.assertFalse(reference.empty)
+        self.assertFalse(history.empty)
+        self.assertFalse(field_info.empty)
+
+
+class TestGetMany(unittest.TestCase):
+
+    def test_mixed(self):
+        results = bb.get_many(
+            [
+                {"securities": "AAPL US Equity", "fields": "PX_LAST"},
+                {
+                    "req_type": "HistoricalDataRequest", "securities": "AAPL US Equity",
+                    "fields": "PX_LAST", "start": "20200101", "end": "20200201"
+                },
+                {"req_type": "FieldInfo", "field_id": "PX_LAST"},
+                {"securities": "bad sec", "fields": "PX_LAST"},
+            ],
+            max_in_flight=2
+        )
+        self.assertEqual(len(results), 4)
+        for data in results[:3]:
+            self.assertFalse(data.empty)
+        self.assertIsInstance(results[3], Exception)
+
+
+class TestAsyncLimits(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.backend = bb.FakeBackend(message_latency=0.001)
+        self.fake = bb.use_fake(self.backend)
+        self.fake.__enter__()
+        self.tickers = ["T{0} US Equity".format(i) for i in range(50)]
+        self.options = {"MaxPendingRequests": 2}
+
+    def tearDown(self) -> None:
+        self.fake.__exit__(None, None, None)
+
+    def test_max_pending(self):
+        kwargs = {"chunk": True, "chunk_size": 10, "session_options": self.options}
+        blocking = bb.ReferenceDataRequest(self.tickers, "PX_LAST", **kwargs).data
+        client = bb.AsyncClient(session_options=self.options)
+        data = asyncio.run(client.reference(self.tickers, "PX_LAST", **kwargs))
+        self.assertTrue(data.equals(blocking))
+        self.assertEqual(self.backend.stats()["rejected"], 0)
+        self.assertEqual(self.backend.stats()["peak_pending"], 2)
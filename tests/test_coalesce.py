@@ -0,0 +1,78 @@
+import threading
+import unittest
+import betterbloomberg as bb
+
+
+class TestCoalescer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tickers = ["AAPL US Equity", "MSFT US Equity", "IBM US Equity"]
+        self.fields = ["PX_LAST", "CRNCY"]
+
+    def test_merge(self):
+        coalescer = bb.Coalescer(window=0.1)
+        results = dict()
+
+        def ask(i, securities, fields):
+            results[i] = coalescer.reference(securities, fields)
+
+        threads = [
+            threading.Thread(target=ask, args=(0, self.tickers[:2], self.fields)),
+            threading.Thread(target=ask, args=(1, self.tickers[1:], self.fields[:1])),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(coalescer.stats(), {"asks": 2, "sent": 1})
+        self.assertEqual(list(results[0].columns), self.tickers[:2])
+        self.assertEqual(list(results[1].index), self.fields[:1])
+
+    def test_error(self):
+        coalescer = bb.Coalescer()
+        with self.assertRaises(Exception):
+            coalescer.reference("bad sec", "PX_LAST")
+
+
+class TestCoalescerFake(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.backend = bb.FakeBackend()
+        self.fake = bb.use_fake(self.backend)
+        self.fake.__enter__()
+        self.tickers = ["AAPL US Equity", "MSFT US Equity", "IBM US Equity"]
+        self.fields = ["PX_LAST", "CRNCY"]
+
+    def tearDown(self) -> None:
+        self.fake.__exit__(None, None, None)
+
+    def test_only_asked_cells(self):
+        coalescer = bb.Coalescer(window=0.1)
+        results = dict()
+
+        def ask(i, securities, fields):
+            results[i] = coalescer.reference(securities, fields)
+
+        threads = [
+            threading.Thread(target=ask, args=(0, self.tickers[:2], self.fields)),
+            threading.Thread(target=ask, args=(1, self.tickers[1:], self.fields[:1])),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(coalescer.stats(), {"asks": 2, "sent": 1})
+        sent = {
+            (s, f)
+            for (request_type, request) in self.backend.requests
+            for s in request["securities"] for f in request["fields"]
+        }
+        self.assertEqual(sent, {
+            (self.tickers[0], "PX_LAST"), (self.tickers[0], "CRNCY"),
+            (self.tickers[1], "PX_LAST"), (self.tickers[1], "CRNCY"),
+            (self.tickers[2], "PX_LAST"),
+        })
+        self.assertEqual(list(results[0].columns), self.tickers[:2])
+        self.assertEqual(list(results[0].index), self.fields)
+        self.assertEqual(list(results[1].columns), self.tickers[1:])
+        self.assertFalse(results[1].isna().any().any())
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import unittest
+import betterbloomberg as bb
+
+
+class TestFakeBackend(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.backend = bb.FakeBackend(
+            partial_size=2,
+            bad_securities={"bad sec"},
+            bad_fields={"bad field"},
+            hang_securities={"hang sec"}
+        )
+        self.fake = bb.use_fake(self.backend)
+        self.fake.__enter__()
+        self.tickers = ["AAPL US Equity", "MSFT US Equity", "IBM US Equity"]
+
+    def tearDown(self) -> None:
+        self.fake.__exit__(None, None, None)
+
+    def test_reference(self):
+        data = bb.ReferenceDataRequest(self.tickers, ["PARSEKYABLE_DES", "PX_LAST"]).data
+        self.assertEqual(list(data.loc["PARSEKYABLE_DES"]), self.tickers)
+        # the same values every time
+        again = bb.ReferenceDataRequest(self.tickers, ["PARSEKYABLE_DES", "PX_LAST"]).data
+        self.assertTrue(data.equals(again))
+
+    def test_errors(self):
+        with self.assertRaises(Exception) as ex:
+            bb.ReferenceDataRequest("bad sec", "PX_LAST")
+        self.assertEqual(ex.exception.args[-1][-1], "INVALID_SECURITY")
+        req = bb.ReferenceDataRequest(
+            [self.tickers[0], "bad sec"],
+            ["PX_LAST", "bad field"],
+            partial=True
+        )
+        self.assertEqual(len(req.errors), 3)
+
+    def test_historical(self):
+        data = bb.HistoricalDataRequest(self.tickers, "PX_LAST", "20200106", "20200117").data
+        self.assertEqual(len(data), 10)
+
+    def test_historical_columns(self):
+        self.backend.partial_size = 1
+        # two field blocks of 25 and one block per security
+        fields = ["PX_LAST", "LAST_UPDATE_DT"] + ["PX_{0}".format(i) for i in range(24)]
+        data = bb.HistoricalDataRequest(
+            self.tickers, fields, "20200106", "20200117", chunk=True, chunk_size=1
+        ).data
+        self.assertEqual(self.backend.stats()["sent"], 2 * 3)
+        self.assertEqual(data.index.dtype, "datetime64[ns]")
+        self.assertEqual(data.shape, (10, 3 * 26))
+        self.assertEqual(data[self.tickers[0], "PX_LAST"].dtype, "float64")
+        self.assertEqual(data[self.tickers[0], "LAST_UPDATE_DT"].dtype, object)
+        for sec_id in self.tickers:
+            for f in ["PX_LAST", "PX_23"]:
+                self.assertEqual(
+                    list(data[sec_id, f]),
+                    [self.backend.value(sec_id, f, day.date()) for day in data.index]
+                )
+
+    def test_max_pending(self):
+        securities = ["S{0} Equity".format(i) for i in range(50)]
+        options = {"MaxPendingRequests": 2}
+        with self.assertRaises(Exception):
+            bb.ReferenceDataRequest(securities, "PX_LAST", session_options=options)
+        data = bb.ReferenceDataRequest(
+            securities, "PX_LAST", chunk=True, chunk_size=10, session_options=options
+        ).data
+        self.assertEqual(data.shape, (1, 50))
+        self.assertEqual(self.backend.stats()["rejected"], 1)
+
+    def test_timeout(self):
+        with self.assertRaises(TimeoutError):
+            bb.ReferenceDataRequest("hang sec", "PX_LAST", timeout=0.1, retries=1, backoff=0.01)
+        self.assertEqual(self.backend.stats()["cancelled"], 2)
+
+    def test_session_lost(self):
+        self.backend.latency = 0.2
+        threading.Timer(0.05, self.backend.terminate).start()
+        data = bb.ReferenceDataRequest(self.tickers, "PX_LAST", retries=1, backoff=0.01).data
+        self.assertEqual(data.shape, (1, 3))
+        self.assertEqual(self.backend.stats()["sent"], 2)
+
+    def test_subscription(self):
+        with bb.Subscription(self.tickers + ["bad sec"], ["LAST_PRICE", "BID"]) as sub:
+            self.backend.publish(self.tickers[0], {"LAST_PRICE": 101.5})
+            self.assertEqual(sub.last(self.tickers[0], "LAST_PRICE"), 101.5)
+            self.assertEqual(list(sub.failures), ["bad sec"])
+
+    def test_give_up_cancels(self):
+        with self.assertRaises(Exception):
+            bb.ReferenceDataRequest(["hang sec", "bad sec"], "PX_LAST", chunk=True, chunk_size=1)
+        self.assertEqual(self.backend.stats()["cancelled"], 1)
+
+    def test_retry_errors(self):
+        self.backend.message_latency = 0.2
+        self.backend.partial_size = 1
+        threading.Timer(0.3, self.backend.terminate).start()
+        req = bb.ReferenceDataRequest(["bad sec"] + self.tickers, "PX_LAST", partial=True, retries=1, backoff=0)
+        self.assertEqual(self.backend.stats()["sent"], 2)
+        # the error received before the session was lost is not counted twice
+        self.assertEqual(len(req.errors), 1)
+
+    def test_async_session_lost(self):
+        self.backend.latency = 0.2
+        bb.ReferenceDataRequest(self.tickers, "PX_LAST")
+
+        async def run():
+            asyncio.get_running_loop().call_later(0.05, self.backend.terminate)
+            return await bb.AsyncClient().reference(self.tickers, "PX_LAST", retries=1, backoff=0.01)
+
+        data = asyncio.run(asyncio.wait_for(run(), 5))
+        self.assertEqual(data.shape, (1, 3))
+        self.assertEqual(self.backend.stats()["sent"], 3)
+
+    def test_subscription_restart(self):
+        with bb.Subscription(self.tickers, ["LAST_PRICE"]) as sub:
+            self.backend.publish(self.tickers[0], {"LAST_PRICE": 101.5})
+            self.backend.terminate()
+            with self.assertRaises(ConnectionError):
+                sub.last(self.tickers[0], "LAST_PRICE")
+            # any request restarts the session, which resubscribes
+            bb.ReferenceDataRequest(self.tickers[0], "PX_LAST")
+            self.backend.publish(self.tickers[0], {"LAST_PRICE": 102.0})
+            self.assertEqual(sub.last(self.tickers[0], "LAST_PRICE"), 102.0)
+            self.backend.terminate()
+            sub.start()
+            self.backend.publish(self.tickers[1], {"LAST_PRICE": 55.0})
+            self.assertEqual(sub.snapshot().loc[self.tickers[1], "LAST_PRICE"], 55.0)
+
+    def test_retry_long_bulk(self):
+        self.backend.members = 3
+        self.backend.message_latency = 0.3
+        self.backend.partial_size = 1
+        bb.ReferenceDataRequest(self.tickers[0], "PX_LAST")
+        threading.Timer(0.45, self.backend.terminate).start()
+        indices = ["A Index", "B Index", "C Index"]
+        req = bb.ReferenceDataRequest(indices, "INDX_MWEIGHT", long_bulk=True, retries=2, backoff=0)
+        self.assertEqual(self.backend.stats()["sent"], 3)
+        # the rows received before the session was lost are not kept twice
+        bulk = req.bulk["INDX_MWEIGHT"]
+        self.assertEqual(len(bulk), 9)
+        self.assertEqual(list(bulk.index.unique()), indices)
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+import betterbloomberg as bb
+
+
+class TestIntradayBarRequest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tickers = ["AAPL US Equity", "MSFT US Equity"]
+        self.end = pd.Timestamp.now("UTC").tz_localize(None).floor("D")
+        self.start = self.end - pd.Timedelta(days=7)
+
+    def test_run(self):
+        data = bb.IntradayBarRequest(
+            self.tickers,
+            self.start,
+            self.end,
+            interval=60,
+            window_days=2
+        ).data
+        self.assertEqual(list(data.index.get_level_values("security").unique()), self.tickers)
+        self.assertTrue(data.index.is_unique)
+        self.assertEqual(data["close"].dtype, "float64")
+        self.assertEqual(data["volume"].dtype, "int64")
+
+    def test_bad_sec(self):
+        with self.assertRaises(Exception) as ex:
+            bb.IntradayBarRequest("bad sec", self.start, self.end)
+        self.assertEqual(ex.exception.args[-1][-1], "INVALID_SECURITY")
+
+
+class TestIntradayTickRequest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.ticker = "AAPL US Equity"
+        self.end = pd.Timestamp.now("UTC").tz_localize(None).floor("D")
+        self.start = self.end - pd.Timedelta(days=3)
+        self.path = tempfile.mkdtemp()
+
+    def test_run(self):
+        req = bb.IntradayTickRequest(self.ticker, self.start, self.end, self.path, batch_size=10000)
+        summary = req.data
+        self.assertEqual(len(summary), 3)
+        day = summary.index.get_level_values("date")[-1]
+        ticks = req.load(self.ticker, day)
+        self.assertEqual(len(ticks), summary["rows"].iloc[-1])
+        self.assertEqual(ticks["value"].dtype, "float64")
+
+    def test_resume(self):
+        bb.IntradayTickRequest(self.ticker, self.start, self.end, self.path)
+        rerun = bb.IntradayTickRequest(self.ticker, self.start, self.end, self.path)
+        self.assertEqual(len(rerun.requests), 0)
+        self.assertEqual(len(rerun.data), 3)
+
+
+class TestIntradayTickRequestFake(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = bb.use_fake(bb.FakeBackend())
+        self.fake.__enter__()
+        self.ticker = "AAPL US Equity"
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        self.fake.__exit__(None, None, None)
+
+    def test_empty_day(self):
+        # the 4th and 5th of January 2020 are a weekend
+        summary = bb.IntradayTickRequest(self.ticker, "2020-01-03", "2020-01-06", self.path).data
+        self.assertEqual(list(summary["rows"] > 0), [True, False, False])
+
+    def test_async(self):
+        summary = bb.get_many([{
+            "req_type": "IntradayTickRequest", "securities": self.ticker,
+            "start": "2020-01-03", "end": "2020-01-06", "path": self.path
+        }], raise_errors=True)[0]
+        blocking = bb.IntradayTickRequest(self.ticker, "2020-01-03", "2020-01-06", self.path)
+        # everything was checkpointed by the async request
+        self.assertEqual(len(blocking.requests), 0)
+        self.assertEqual(summary["rows"].iloc[0], blocking.data["rows"].iloc[0])
+
+    def test_not_sent_keeps_files(self):
+        req = bb.IntradayTickRequest(self.ticker, "2020-01-03", "2020-01-04", self.path)
+        partition = req.partition(self.ticker, "20200103")
+        # an interrupted partition, without its checkpoint
+        os.remove(os.path.join(partition, "_SUCCESS"))
+        files = sorted(os.listdir(partition))
+        bb.IntradayTickRequest(self.ticker, "2020-01-03", "2020-01-04", self.path, send=False)
+        self.assertEqual(sorted(os.listdir(partition)), files)
+        bb.IntradayTickRequest(self.ticker, "2020-01-03", "2020-01-04", self.path)
+        self.assertIn("_SUCCESS", os.listdir(partition))
+
+    def test_retries(self):
+        with self.assertRaises(ValueError):
+            bb.IntradayTickRequest(self.ticker, "2020-01-03", "2020-01-04", self.path, retries=2)
@@ -0,0 +1,54 @@
+import unittest
+import betterbloomberg as bb
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = bb.use_fake(bb.FakeBackend(partial_size=2, bad_securities={"bad sec"}))
+        self.fake.__enter__()
+        self.seen = list()
+        self.stages = list()
+        self.exporter = bb.OpenMetricsExporter()
+        self.sink = lambda metrics: (self.seen.append(metrics), self.stages.append(metrics.stage))
+        bb.add_sink(self.sink)
+        bb.add_sink(self.exporter)
+        self.tickers = ["AAPL US Equity", "MSFT US Equity", "IBM US Equity"]
+
+    def tearDown(self) -> None:
+        bb.remove_sink(self.sink)
+        bb.remove_sink(self.exporter)
+        self.fake.__exit__(None, None, None)
+
+    def test_phases(self):
+        req = bb.ReferenceDataRequest(self.tickers, "PX_LAST")
+        self.assertEqual(self.stages, ["response"])
+        req.data
+        self.assertEqual(self.stages, ["response", "frame"])
+        metrics = req.metrics
+        for phase in ("session", "service", "generate", "send", "decode", "process", "frame"):
+            self.assertIn(phase, metrics.phases)
+        self.assertEqual((metrics.sent, metrics.events, metrics.messages), (1, 2, 2))
+
+    def test_error(self):
+        with self.assertRaises(Exception):
+            bb.ReferenceDataRequest("bad sec", "PX_LAST")
+        self.assertEqual(self.seen[-1].error, "Exception")
+        self.assertIn(
+            'betterbloomberg_requests_total{request="ReferenceDataRequest",outcome="error"} 1',
+            self.exporter.exposition()
+        )
+
+    def test_exposition(self):
+        bb.ReferenceDataRequest(self.tickers, "PX_LAST").data
+        text = self.exporter.exposition()
+        self.assertIn(
+            'betterbloomberg_request_phase_seconds_count{request="ReferenceDataRequest",phase="frame"} 1',
+            text
+        )
+        self.assertIn('betterbloomberg_messages_total{request="ReferenceDataRequest"} 2', text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_async(self):
+        bb.get_many([{"securities": self.tickers, "fields": "PX_LAST"}])
+        self.assertEqual(self.seen[0].messages, 2)
@@ -0,0 +1,61 @@
+import unittest
+import pandas as pd
+import betterbloomberg as bb
+
+
+class TestPortfolioBatchRequest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = bb.use_fake(bb.FakeBackend(members=4, bad_securities={"bad port"}))
+        self.fake.__enter__()
+        self.ports = ["U1 Client", "U2 Client"]
+        self.fields = ["PORTFOLIO_MWEIGHT", "PORTFOLIO_MPOSITION"]
+        self.dates = ["20200131", "20200228"]
+
+    def tearDown(self) -> None:
+        self.fake.__exit__(None, None, None)
+
+    def test_portfolios(self):
+        data = bb.PortfolioBatchRequest(self.ports, self.fields, self.dates).data
+        self.assertEqual(list(data.index.names), ["portfolio", "date", "security"])
+        self.assertEqual(list(data.index.get_level_values("portfolio").unique()), self.ports)
+        self.assertEqual(
+            list(data.index.get_level_values("date").unique()),
+            [pd.Timestamp("2020-01-31"), pd.Timestamp("2020-02-28")]
+        )
+        self.assertEqual(len(data), 2 * 2 * 4)
+        self.assertEqual(list(data.columns), self.fields)
+        self.assertEqual(data["PORTFOLIO_MWEIGHT"].dtype, "float64")
+        # the weights of each holdings sum to one
+        sums = data["PORTFOLIO_MWEIGHT"].groupby(level=["portfolio", "date"]).sum()
+        self.assertTrue((sums - 1.0).abs().max() < 1e-12)
+
+    def test_current(self):
+        data = bb.PortfolioBatchRequest(self.ports[0], "PORTFOLIO_MWEIGHT").data
+        self.assertEqual(len(data), 4)
+        self.assertTrue(data.index.get_level_values("date").isna().all())
+
+    def test_security_error(self):
+        with self.assertRaises(Exception) as ex:
+            bb.PortfolioBatchRequest(self.ports + ["bad port"], self.fields, self.dates)
+        self.assertEqual(ex.exception.args[-1][-1], "INVALID_SECURITY")
+        data = bb.PortfolioBatchRequest(
+            self.ports + ["bad port"], self.fields, self.dates, ignore_sec_error=True
+        ).data
+        self.assertEqual(list(data.index.get_level_values("portfolio").unique()), self.ports)
+
+    def test_members(self):
+        data = bb.PortfolioBatchRequest(self.ports, ["PORTFOLIO_MEMBERS", "PORTFOLIO_MWEIGHT"], self.dates).data
+        self.assertEqual(list(data.columns), ["PORTFOLIO_MEMBERS", "PORTFOLIO_MWEIGHT"])
+        self.assertEqual(data["PORTFOLIO_MEMBERS"].dtype, "bool")
+        self.assertTrue(data["PORTFOLIO_MEMBERS"].all())
+        self.assertEqual(len(data), 2 * 2 * 4)
+
+    def test_portfolio_data(self):
+        data = bb.PortfolioBatchRequest(self.ports[0], "PORTFOLIO_DATA").data
+        self.assertEqual(
+            list(data.columns),
+            ["PORTFOLIO_DATA.Position", "PORTFOLIO_DATA.Market Value", "PORTFOLIO_DATA.Cost", "PORTFOLIO_DATA.Weight"]
+        )
+        self.assertEqual(len(data), 4)
+        self.assertTrue(abs(data["PORTFOLIO_DATA.Weight"].sum() - 1.0) < 1e-12)
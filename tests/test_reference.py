@@ -58,6 +58,52 @@ class TestReferenceRequest(unittest.TestCase):
         ).data
         self.assertFalse(data.empty)
 
+    def test_cached_frame(self):
+        req = bb.ReferenceDataRequest(self.ticker, self.field, keep_raw=False)
+        self.assertIs(req.data, req.data)
+        self.assertIsNone(req.raw)
+
+    def test_chunk(self):
+        tickers = ["AAPL US Equity", "MSFT US Equity", "IBM US Equity"]
+        fields = [self.field, "PX_LAST"]
+        whole = bb.ReferenceDataRequest(tickers, fields).data
+        chunked = bb.ReferenceDataRequest(tickers, fields, chunk=True, chunk_size=1).data
+        self.assertEqual(list(whole.columns), list(chunked.columns))
+        self.assertEqual(list(whole.index), list(chunked.index))
+
+    def test_typed(self):
+        data = bb.ReferenceDataRequest(
+            [self.ticker, "MSFT US Equity"],
+            ["PX_LAST", "CRNCY"],
+            typed=True
+        ).data
+        self.assertEqual(list(data.index), [self.ticker, "MSFT US Equity"])
+        self.assertEqual(data["PX_LAST"].dtype, "float64")
+        self.assertEqual(data["CRNCY"].dtype, "category")
+
+    def test_partial(self):
+        req = bb.ReferenceDataRequest(
+            [self.ticker, "bad sec"],
+            [self.field, "bad field"],
+            partial=True
+        )
+        self.assertEqual(req.data[self.ticker][self.field], self.ticker)
+        errors = req.errors
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(
+            set(errors["subcategory"]),
+            {"INVALID_SECURITY", "INVALID_FIELD"}
+        )
+        self.assertEqual(len(req.retry()), 3)
+
+    def test_long_bulk(self):
+        tickers = ["INDU Index", "SPX Index"]
+        req = bb.ReferenceDataRequest(tickers, "INDX_MWEIGHT", long_bulk=True)
+        bulk = req.bulk["INDX_MWEIGHT"]
+        self.assertEqual(bulk.index.name, "security")
+        self.assertEqual(list(bulk.index.unique()), tickers)
+        self.assertEqual(bulk["Percentage Weight"].dtype, "float64")
+
 
 class TestHistoricalRequest(unittest.TestCase):
 
@@ -124,3 +170,39 @@ class TestHistoricalRequest(unittest.TestCase):
             ignore_field_error=True
         ).data
         self.assertFalse(data.empty)
+
+    def test_field_blocks(self):
+        # more than the 25 field limit for historical requests
+        fields = [
+            "PX_OPEN", "PX_HIGH", "PX_LOW", "PX_LAST", "PX_VOLUME", "PX_BID",
+            "PX_ASK", "PX_MID", "VWAP", "TURNOVER", "CUR_MKT_CAP", "EQY_SH_OUT",
+            "PE_RATIO", "PX_TO_BOOK_RATIO", "EQY_DVD_YLD_IND", "VOLATILITY_30D",
+            "VOLATILITY_90D", "RSI_14D", "MOV_AVG_50D", "MOV_AVG_200D",
+            "TOT_RETURN_INDEX_GROSS_DVDS", "DAY_TO_DAY_TOT_RETURN_GROSS_DVDS",
+            "HIGH_52WEEK", "LOW_52WEEK", "BEST_EPS", "BEST_PE_RATIO", "BEST_TARGET_PRICE",
+        ]
+        data = bb.HistoricalDataRequest(
+            self.ticker + ["MSFT US Equity", ],
+            fields,
+            self.start_date,
+            self.end_date,
+            chunk=True,
+            chunk_size=1,
+            ignore_field_error=True
+        ).data
+        self.assertEqual(
+            list(data.columns.get_level_values(0).unique()),
+            ["AAPL US Equity", "MSFT US Equity"]
+        )
+
+    def test_release(self):
+        req = bb.HistoricalDataRequest(self.ticker, self.field, self.start_date, self.end_date, keep_raw=False)
+        self.assertFalse(req.data.empty)
+        self.assertIsNone(req.raw)
+        self.assertEqual(req.buffer, dict())
+        with self.assertRaises(Exception):
+            req.retry()
+
+    def test_typed(self):
+        with self.assertRaises(ValueError):
+            bb.HistoricalDataRequest(self.ticker, self.field, self.start_date, self.end_date, typed=True)
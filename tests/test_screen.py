@@ -1,4 +1,5 @@
 import unittest
+import pandas as pd
 import betterbloomberg as bb
 
 class TestEQS(unittest.TestCase):
@@ -17,3 +18,72 @@ class TestEQS(unittest.TestCase):
         ).data
         self.assertFalse(data.empty)
 
+
+class TestEQSHistory(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.screen_name = "Core Capital Ratios"
+        self.screen_type = "GLOBAL"
+        self.screen_group = "General"
+
+    def test_run(self):
+        cache = bb.ScreenStore()
+        history = bb.EQSHistory(
+            self.screen_name,
+            self.screen_type,
+            self.screen_group,
+            "20200101",
+            "20200131",
+            freq="W-FRI",
+            cache=cache
+        )
+        self.assertEqual(len(history.membership), 5)
+        self.assertEqual(history.data.index.names, ["date", "security"])
+        rerun = bb.EQSHistory(
+            self.screen_name,
+            self.screen_type,
+            self.screen_group,
+            "20200101",
+            "20200131",
+            freq="W-FRI",
+            cache=cache
+        )
+        self.assertTrue(rerun.membership.equals(history.membership))
+        self.assertEqual(cache.stats(), {"hits": 5, "misses": 5})
+
+
+class TestEQSStreaming(unittest.TestCase):
+
+    def screen(self, partial_size, **kwargs):
+        with bb.use_fake(bb.FakeBackend(partial_size=partial_size, members=25)):
+            return bb.EQS("Core Capital Ratios", "GLOBAL", "General", **kwargs)
+
+    def test_partial_responses(self):
+        whole = self.screen(100)
+        streamed = self.screen(4)
+        self.assertEqual(streamed.metrics.messages, 7)
+        self.assertTrue(streamed.data.equals(whole.data))
+        typed = self.screen(4, typed=True)
+        self.assertEqual(len(typed.data), 25)
+
+
+class TestEQSHistoryFake(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = bb.use_fake(bb.FakeBackend(members=5))
+        self.fake.__enter__()
+
+    def tearDown(self) -> None:
+        self.fake.__exit__(None, None, None)
+
+    def test_default_end(self):
+        start = pd.Timestamp.today().normalize() - pd.Timedelta(days=14)
+        history = bb.EQSHistory("Core Capital Ratios", "GLOBAL", "General", start.strftime("%Y%m%d"))
+        self.assertEqual(len(history.membership), len(pd.bdate_range(start, pd.Timestamp.today())))
+        self.assertEqual(history.data.index.names, ["date", "security"])
+
+    def test_empty_range(self):
+        history = bb.EQSHistory("Core Capital Ratios", "GLOBAL", "General", "20200201", "20200101")
+        self.assertTrue(history.data.empty)
+        self.assertEqual(history.data.index.names, ["date", "security"])
+        self.assertTrue(history.membership.empty)
@@ -0,0 +1,35 @@
+import unittest
+from concurrent.futures import CancelledError
+import betterbloomberg as bb
+
+
+class TestSessionPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.ticker = "AAPL US Equity"
+        self.field = "PX_LAST"
+
+    def test_reuse(self):
+        first = bb.ReferenceDataRequest(self.ticker, self.field)
+        second = bb.FieldInfo([self.field, ])
+        self.assertIs(first.session, second.session)
+        self.assertIn("//blp/refdata", first.pooled_session.services)
+        self.assertIn("//blp/apiflds", first.pooled_session.services)
+
+    def test_restart(self):
+        first = bb.ReferenceDataRequest(self.ticker, self.field)
+        first.pooled_session.stop()
+        second = bb.ReferenceDataRequest(self.ticker, self.field)
+        self.assertTrue(second.pooled_session.is_alive())
+        self.assertIsNot(first.session, second.session)
+        self.assertFalse(second.data.empty)
+
+    def test_timeout(self):
+        data = bb.ReferenceDataRequest(self.ticker, self.field, timeout=30, retries=1).data
+        self.assertFalse(data.empty)
+
+    def test_cancel(self):
+        req = bb.ReferenceDataRequest(self.ticker, self.field, send=False)
+        req.cancel()
+        with self.assertRaises(CancelledError):
+            req.send_request()
@@ -0,0 +1,53 @@
+import tempfile
+import threading
+import unittest
+import numpy as np
+import pandas as pd
+import betterbloomberg as bb
+
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = bb.HistoryStore(tempfile.mkdtemp())
+        self.ticker = ["AAPL US Equity", ]
+        self.field = ["PX_LAST", ]
+
+    def test_tail_window(self):
+        bb.HistoricalDataRequest(self.ticker, self.field, "20200101", "20200131", store=self.store)
+        req = bb.HistoricalDataRequest(self.ticker, self.field, "20200101", "20200229", store=self.store)
+        self.assertEqual(
+            req.request_blocks,
+            [(self.ticker, self.field, "20200201", "20200229")]
+        )
+        full = bb.HistoricalDataRequest(self.ticker, self.field, "20200101", "20200229").data
+        self.assertTrue(full.equals(req.data))
+
+    def test_served_from_store(self):
+        bb.HistoricalDataRequest(self.ticker, self.field, "20200101", "20200131", store=self.store)
+        req = bb.HistoricalDataRequest(self.ticker, self.field, "20200110", "20200120", store=self.store)
+        self.assertEqual(len(req.requests), 0)
+        self.assertFalse(req.data.empty)
+
+    def test_failed_cells_not_covered(self):
+        with bb.use_fake(bb.FakeBackend(bad_fields={"bad field"})):
+            fields = self.field + ["bad field", ]
+            bb.HistoricalDataRequest(self.ticker, fields, "20200101", "20200131", store=self.store, partial=True)
+            req = bb.HistoricalDataRequest(self.ticker, fields, "20200101", "20200131", store=self.store, partial=True)
+        self.assertEqual(req.request_blocks, [(self.ticker, ["bad field", ], "20200101", "20200131")])
+        self.assertEqual(len(req.errors), 1)
+
+    def test_concurrent_writes(self):
+        key = bb.HistoryStore.key(self.ticker[0], self.field[0])
+        days = pd.bdate_range("20200101", "20200331")
+
+        def write(i):
+            self.store.write(key, days[i::4].values, np.full(len(days[i::4]), float(i)), "20200101", "20200331")
+
+        threads = [threading.Thread(target=write, args=(i, )) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        dates, values = self.store.read(key)
+        self.assertEqual(len(dates), len(days))
@@ -31,3 +31,17 @@ class TestStudy(unittest.TestCase):
             priceSourceClose="PX_LAST"
         ).data
         self.assertFalse(data.empty)
+
+
+class TestStudyStreaming(unittest.TestCase):
+
+    def study(self, rows_per_message):
+        with bb.use_fake(bb.FakeBackend(rows_per_message=rows_per_message)):
+            return bb.Study("IBM US Equity", "dmi", "20200101", "20200201")
+
+    def test_partial_responses(self):
+        whole = self.study(1000)
+        streamed = self.study(5)
+        self.assertEqual(whole.metrics.messages, 1)
+        self.assertEqual(streamed.metrics.messages, 5)
+        self.assertTrue(streamed.data.equals(whole.data))
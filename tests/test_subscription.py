@@ -0,0 +1,28 @@
+import time
+import unittest
+import betterbloomberg as bb
+
+
+class TestSubscription(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tickers = ["AAPL US Equity", "MSFT US Equity"]
+        self.fields = ["LAST_PRICE", "BID", "ASK"]
+
+    def test_snapshot(self):
+        with bb.Subscription(self.tickers, self.fields, interval=1.0) as sub:
+            snapshot = sub.snapshot()
+            deadline = time.time() + 10
+            while sub.num_updates == 0 and time.time() < deadline:
+                time.sleep(0.1)
+            self.assertGreater(sub.num_updates, 0)
+            self.assertEqual(list(snapshot.index), self.tickers)
+            self.assertEqual(list(snapshot.columns), self.fields)
+            # the snapshot is a view of the live values
+            self.assertTrue(snapshot.equals(sub.snapshot()))
+        self.assertIsNone(sub.subscriptions)
+
+    def test_shared_session(self):
+        req = bb.ReferenceDataRequest(self.tickers[0], "PX_LAST")
+        with bb.Subscription(self.tickers, self.fields) as sub:
+            self.assertIs(sub.pooled_session, req.pooled_session)
@@ -0,0 +1,30 @@
+import unittest
+import betterbloomberg as bb
+
+
+class TestOverrideSweep(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tickers = ["AAPL US Equity", "MSFT US Equity"]
+        self.field = "BEST_EPS"
+
+    def test_grid(self):
+        periods = ["1FY", "2FY", "3FY"]
+        sweep = bb.OverrideSweep(
+            self.tickers,
+            self.field,
+            {"BEST_FPERIOD_OVERRIDE": periods}
+        )
+        data = sweep.data
+        self.assertEqual(data.index.names, ["BEST_FPERIOD_OVERRIDE", "field"])
+        self.assertEqual(list(data.index.get_level_values(0)), periods)
+        self.assertEqual(list(data.columns), self.tickers)
+
+    def test_list(self):
+        sweep = bb.OverrideSweep(
+            self.tickers,
+            "CRNCY_ADJ_MKT_CAP",
+            [{"EQY_FUND_CRNCY": "USD"}, {"EQY_FUND_CRNCY": "EUR"}],
+            typed=True
+        )
+        self.assertEqual(len(sweep.data), 4)